@@ -16,8 +16,10 @@ public class MaxTemperatureDriver extends Configured implements Tool {
     @Override
     public int run(String[] args) throws Exception {
         if (args.length != 2) {
-            System.err.printf("Usage: %s [generic options] <input> <output>\n",
+            System.err.printf("Usage: %s [generic options] <input[,input...]> <output>\n",
                               getClass().getSimpleName());
+            System.err.printf("Only records of given stations are included with -D %s=<station[,station...]>\n",
+                              YearTemperatureMapper.STATIONS_PROPERTY);
             ToolRunner.printGenericCommandUsage(System.err);
             return -1;
         }
@@ -25,7 +27,7 @@ public class MaxTemperatureDriver extends Configured implements Tool {
         Job job = Job.getInstance(getConf(), "Max ncdc_analysis.map_reduce.temperature");
         job.setJarByClass(getClass());
 
-        FileInputFormat.addInputPath(job, new Path(args[0]));
+        FileInputFormat.addInputPaths(job, args[0]);
         FileInputFormat.setInputDirRecursive(job, true);
         FileOutputFormat.setOutputPath(job, new Path(args[1]));
 
@@ -7,18 +7,32 @@ import org.apache.hadoop.io.Text;
 import org.apache.hadoop.mapreduce.Mapper;
 
 import java.io.IOException;
+import java.util.Set;
 
 // Example is from Hadoop: The Definete Guide http://hadoopbook.com/
 public class YearTemperatureMapper
         extends Mapper<LongWritable, Text, Text, IntWritable> {
 
+    // Comma separated stations to include, e.g. -D ncdc.stations=010010-99999,010014-99999. All stations if unset
+    public static final String STATIONS_PROPERTY = "ncdc.stations";
+
     private NcdcRecordParser parser = new NcdcRecordParser();
+    private Set<String> stations;
+
+    @Override
+    protected void setup(Context context) {
+        String stationsValue = context.getConfiguration().get(STATIONS_PROPERTY);
+        stations = stationsValue == null ? null : NcdcRecordParser.parseStations(stationsValue);
+    }
 
     @Override
     public void map(LongWritable key, Text value, Context context)
             throws IOException, InterruptedException {
 
         parser.parse(value);
+        if (stations != null && !stations.contains(parser.getStation())) {
+            return;
+        }
         if (parser.isValidTemperature()) {
             context.write(new Text(parser.getYear()),
                           new IntWritable(parser.getAirTemperature()));
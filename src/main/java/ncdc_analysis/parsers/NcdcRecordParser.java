@@ -1,16 +1,31 @@
 package ncdc_analysis.parsers;
 
 import org.apache.hadoop.io.Text;
+import org.apache.spark.sql.Column;
 import org.apache.spark.sql.Dataset;
 import org.apache.spark.sql.Row;
 
+import java.util.Arrays;
+import java.util.Set;
+import java.util.stream.Collectors;
+
 import static org.apache.spark.sql.functions.col;
+import static org.apache.spark.sql.functions.length;
 import static org.apache.spark.sql.functions.lit;
+import static org.apache.spark.sql.functions.when;
 
 public class NcdcRecordParser {
 
     private static final int MISSING_TEMPERATURE = 9999;
 
+    // Slim records are projected at preprocessing time, see file_combiner --slim-output.
+    // Fixed width layout: station [0:11], timestamp yyyyMMddHHmm [11:23], temperature [23:28], quality [28]
+    private static final int SLIM_RECORD_LENGTH = 29;
+    // Raw records have 105 characters at least (control and mandatory data sections), shorter records are slim
+    // even with trailing padding or carriage return, same rule as in ncdc_analysis.parsers.ncdc_record_parser
+    private static final int MIN_RAW_RECORD_LENGTH = 105;
+
+    private String station;
     private String year;
     private int airTemperature;
     private String quality;
@@ -18,9 +33,15 @@ public class NcdcRecordParser {
     public static Dataset<Row> parse(Dataset<String> dataset) {
 
         // TODO For some reason substring start positions need to be shifted by +1, investigate why?
+        Column recordLength = length(dataset.col("value"));
+        Column isSlim = recordLength.geq(SLIM_RECORD_LENGTH).and(recordLength.lt(MIN_RAW_RECORD_LENGTH));
         Dataset<Row> df = dataset.select(
-                dataset.col("value").substr(16, 4).cast("int").alias("year"),
-                dataset.col("value").substr(88, 5).cast("int").alias("temperature")
+                when(isSlim, dataset.col("value").substr(12, 4))
+                        .otherwise(dataset.col("value").substr(16, 4)).cast("int").alias("year"),
+                when(isSlim, dataset.col("value").substr(24, 5))
+                        .otherwise(dataset.col("value").substr(88, 5)).cast("int").alias("temperature"),
+                when(isSlim, dataset.col("value").substr(1, 11))
+                        .otherwise(dataset.col("value").substr(5, 11)).alias("station")
         );
 
         // Filter out missing temperatures
@@ -32,18 +53,43 @@ public class NcdcRecordParser {
         return df;
     }
 
+    /**
+     * Parses comma separated station ids like in the station index, e.g. 010010-99999,010014-99999,
+     * to USAF + WBAN as in the records, e.g. 01001099999.
+     */
+    public static Set<String> parseStations(String stations) {
+        return Arrays.stream(stations.split(","))
+                .map(station -> station.trim().replace("-", ""))
+                .filter(station -> !station.isEmpty())
+                .collect(Collectors.toSet());
+    }
+
     // Example is from Hadoop: The Definete Guide http://hadoopbook.com/
     public void parse(String record) {
-        year = record.substring(15, 19);
+        if (isSlim(record)) {
+            station = record.substring(0, 11);
+            parse(record, 11, 23);
+        } else {
+            station = record.substring(4, 15);
+            parse(record, 15, 87);
+        }
+    }
+
+    private static boolean isSlim(String record) {
+        return record.length() >= SLIM_RECORD_LENGTH && record.length() < MIN_RAW_RECORD_LENGTH;
+    }
+
+    private void parse(String record, int yearStart, int temperatureStart) {
+        year = record.substring(yearStart, yearStart + 4);
         String airTemperatureString;
         // Remove leading plus sign as parseInt doesn't like them (pre-Java 7)
-        if (record.charAt(87) == '+') {
-            airTemperatureString = record.substring(88, 92);
+        if (record.charAt(temperatureStart) == '+') {
+            airTemperatureString = record.substring(temperatureStart + 1, temperatureStart + 5);
         } else {
-            airTemperatureString = record.substring(87, 92);
+            airTemperatureString = record.substring(temperatureStart, temperatureStart + 5);
         }
         airTemperature = Integer.parseInt(airTemperatureString);
-        quality = record.substring(92, 93);
+        quality = record.substring(temperatureStart + 5, temperatureStart + 6);
     }
 
     public void parse(Text record) {
@@ -54,6 +100,10 @@ public class NcdcRecordParser {
         return airTemperature != MISSING_TEMPERATURE && quality.matches("[01459]");
     }
 
+    public String getStation() {
+        return station;
+    }
+
     public String getYear() {
         return year;
     }
@@ -5,20 +5,22 @@ import org.apache.spark.sql.Dataset;
 import org.apache.spark.sql.Row;
 import org.apache.spark.sql.SparkSession;
 
+import java.util.Set;
+
 import static org.apache.spark.sql.functions.col;
 
 public class MaxTemperatureApp {
 
     public static void main(String[] args) {
-        if (args.length != 2) {
-            System.err.println("MaxTemperatureApp Usage: <input> <output>\n");
+        if (args.length != 2 && args.length != 3) {
+            System.err.println("MaxTemperatureApp Usage: <input> <output> [station[,station...]]\n");
             return;
         }
         MaxTemperatureApp app = new MaxTemperatureApp();
-        app.start(args[0], args[1]);
+        app.start(args[0], args[1], args.length == 3 ? NcdcRecordParser.parseStations(args[2]) : null);
     }
 
-    private void start(String input, String output) {
+    private void start(String input, String output, Set<String> stations) {
 
         // Requires --master to be set in spark-submit
         // In development, you can add following flag to your run configuration's VM Options:
@@ -27,9 +29,13 @@ public class MaxTemperatureApp {
                 .appName("NCDC MaxTemperature")
                 .getOrCreate();
 
-        Dataset<String> dataset = spark.read().textFile(input);
+        // Input can be a comma separated list of paths, see cluster_runner --years
+        Dataset<String> dataset = spark.read().textFile(input.split(","));
 
         Dataset<Row> df = NcdcRecordParser.parse(dataset);
+        if (stations != null) {
+            df = df.filter(col("station").isin(stations.toArray()));
+        }
         df.repartition(8);
         df.createOrReplaceTempView("ncdc_temperature");
 
@@ -39,12 +45,10 @@ public class MaxTemperatureApp {
                       "FROM " +
                       "  ncdc_temperature " +
                       "GROUP BY " +
-                      "  year " +
-                      "ORDER BY" +
                       "  year");
 
-        resultDf.coalesce(1)
-                .orderBy(col("year"))
+        // Parts are only sorted within partitions, the result fetcher merges them to globally ordered result
+        resultDf.sortWithinPartitions(col("year"))
                 .write().format("com.databricks.spark.csv")
                 .option("header", true)
                 .mode("overwrite")
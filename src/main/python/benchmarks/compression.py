@@ -0,0 +1,117 @@
+"""Compression codec benchmark of the combined yearly files.
+Measures compress and decompress speed and compression ratio of each codec and level on a sample of the years,
+so the codec of file_combiner --codec can be picked from data.
+
+Usage (from src/main/python): python -m benchmarks.compression --input <combined-yearly-folder>"""
+from dataclasses import dataclass
+import io
+import shutil
+import sys
+import time
+from typing import List, Optional, Sequence
+
+import click
+
+from ncdc_analysis.preprocessing.compression import CODECS, Codec, available_codecs, open_compressed
+from ncdc_analysis.preprocessing.sampling import get_yearly_files
+
+MB = 1024 * 1024
+
+
+@dataclass
+class CodecResult:
+    codec: str
+    level: int
+    raw_bytes: int
+    compressed_bytes: int
+    compress_seconds: float
+    decompress_seconds: float
+
+    @property
+    def ratio(self) -> float:
+        return self.raw_bytes / self.compressed_bytes
+
+    @property
+    def compress_speed(self) -> float:
+        """MB/s of uncompressed data."""
+        return self.raw_bytes / MB / self.compress_seconds
+
+    @property
+    def decompress_speed(self) -> float:
+        """MB/s of uncompressed data."""
+        return self.raw_bytes / MB / self.decompress_seconds
+
+
+def load_sample(folder: str, years: int, bytes_per_year: int) -> bytes:
+    """Uncompressed data of the first bytes_per_year bytes of evenly spaced years,
+    cut at the last full record."""
+    files = get_yearly_files(folder)
+    if not files:
+        raise ValueError(f"No yearly files in folder: {folder}")
+    step = max(1, len(files) // years)
+    sample = []
+    for file in files[::step][:years]:
+        with open_compressed(file, "rb") as f:
+            data = f.read(bytes_per_year)
+        sample.append(data[:data.rfind(b"\n") + 1] if len(data) == bytes_per_year else data)
+    return b"".join(sample)
+
+
+def measure_codec(codec: Codec, level: int, data: bytes, repeat: int) -> CodecResult:
+    """Best compress and decompress time of repeat runs, using the same streaming API as file_combiner."""
+    compress_timings, decompress_timings = [], []
+    compressed = b""
+    for _ in range(repeat):
+        buffer = io.BytesIO()
+        start = time.perf_counter()
+        with codec.open(buffer, "wb", level) as f:
+            f.write(data)
+        compress_timings.append(time.perf_counter() - start)
+        compressed = buffer.getvalue()
+
+        start = time.perf_counter()
+        with codec.open(io.BytesIO(compressed), "rb") as f:
+            shutil.copyfileobj(f, io.BytesIO())
+        decompress_timings.append(time.perf_counter() - start)
+    return CodecResult(codec=codec.name, level=level, raw_bytes=len(data), compressed_bytes=len(compressed),
+                       compress_seconds=min(compress_timings), decompress_seconds=min(decompress_timings))
+
+
+def run_benchmark(data: bytes, codecs: Sequence[str], levels: Optional[List[int]] = None,
+                  repeat: int = 3) -> List[CodecResult]:
+    """Measures each codec with its default level, or with each of levels that is valid for the codec."""
+    results = []
+    for name in codecs:
+        codec = CODECS[name]
+        codec_levels = [level for level in levels if codec.min_level <= level <= codec.max_level] if levels \
+            else [codec.default_level]
+        for level in codec_levels:
+            results.append(measure_codec(codec, level, data, repeat))
+    return results
+
+
+@click.command()
+@click.option("--input", required=True, help="folder of combined yearly files, see file_combiner")
+@click.option("--years", default=5, help="number of evenly spaced years in the sample")
+@click.option("--mb-per-year", default=16, help="uncompressed MB of records per year in the sample")
+@click.option("--codec", "codecs", multiple=True, type=click.Choice(list(CODECS)),
+              help="codecs to measure (multiple), defaults to all installed codecs")
+@click.option("--level", "levels", multiple=True, type=int,
+              help="levels to measure (multiple), defaults to the default level of each codec")
+@click.option("--repeat", default=3, help="number of runs per measurement, best run is used")
+def codec_benchmark(input, years, mb_per_year, codecs, levels, repeat):
+    codecs = codecs or available_codecs()
+    missing = [name for name in codecs if not CODECS[name].is_available()]
+    if missing:
+        print(f"Codecs are not installed: {', '.join(missing)}")
+        sys.exit(1)
+    data = load_sample(input, years, mb_per_year * MB)
+    print(f"Sample: {len(data) / MB:.1f} MB uncompressed")
+    print(f"{'codec':<8}{'level':>6}{'ratio':>8}{'compress MB/s':>16}{'decompress MB/s':>18}")
+    for result in run_benchmark(data, codecs, list(levels), repeat):
+        print(f"{result.codec:<8}{result.level:>6}{result.ratio:>8.2f}"
+              f"{result.compress_speed:>16.1f}{result.decompress_speed:>18.1f}")
+
+
+if __name__ == "__main__":
+    codec_benchmark()
@@ -0,0 +1,106 @@
+"""Gzip decompression benchmark of the installed backends (see ncdc_analysis.preprocessing.compression.GZIP_BACKENDS).
+Reads a sample of the NOAA station files, which keeps the file size distribution of the archive,
+checks that every backend inflates them to identical bytes and reports the speedup over stdlib gzip.
+
+Usage (from src/main/python): python -m benchmarks.gzip_backends --input <noaa-folder>"""
+from dataclasses import dataclass
+from glob import glob
+import os
+import random
+import sys
+import time
+from typing import List, Sequence
+
+import click
+
+from ncdc_analysis.preprocessing.compression import GZIP_BACKENDS, GzipCodec, available_gzip_backends
+
+MB = 1024 * 1024
+
+
+@dataclass
+class BackendResult:
+    backend: str
+    mode: str  # "decompress" (one call per file) or "stream" (open and read in chunks)
+    raw_bytes: int
+    seconds: float
+
+    @property
+    def speed(self) -> float:
+        """MB/s of uncompressed data."""
+        return self.raw_bytes / MB / self.seconds
+
+
+def sample_station_files(folder: str, files: int, seed: int = 0) -> List[str]:
+    """Random sample of station files of the year-named folders, see file_combiner."""
+    paths = sorted(glob(os.path.join(folder, "19*", "*-19*.gz")))
+    if not paths:
+        raise ValueError(f"No station files in folder: {folder}")
+    return random.Random(seed).sample(paths, min(files, len(paths)))
+
+
+def _read_stream(codec: GzipCodec, path: str) -> bytes:
+    with codec.open(path, "rb") as f:
+        return f.read()
+
+
+def _read_decompress(codec: GzipCodec, path: str) -> bytes:
+    with open(path, "rb") as f:
+        return codec.decompress(f.read())
+
+
+READERS = {"decompress": _read_decompress, "stream": _read_stream}
+
+
+def measure_backend(backend: str, mode: str, paths: Sequence[str], repeat: int) -> BackendResult:
+    codec = GzipCodec(backend)
+    reader = READERS[mode]
+    timings = []
+    raw_bytes = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        raw_bytes = sum(len(reader(codec, path)) for path in paths)
+        timings.append(time.perf_counter() - start)
+    return BackendResult(backend=backend, mode=mode, raw_bytes=raw_bytes, seconds=min(timings))
+
+
+def check_identical(backends: Sequence[str], paths: Sequence[str]):
+    """Raises ValueError if a backend inflates any file to different bytes than stdlib gzip."""
+    expected = GzipCodec("gzip")
+    for path in paths:
+        data = _read_decompress(expected, path)
+        for backend in backends:
+            for mode, reader in READERS.items():
+                if reader(GzipCodec(backend), path) != data:
+                    raise ValueError(f"Backend {backend} ({mode}) output differs from gzip: {path}")
+
+
+@click.command()
+@click.option("--input", required=True, help="noaa folder which includes year-named folders of station .gz files")
+@click.option("--files", default=500, help="number of station files in the sample")
+@click.option("--backend", "backends", multiple=True, type=click.Choice(list(GZIP_BACKENDS)),
+              help="backends to measure (multiple), defaults to all installed backends")
+@click.option("--repeat", default=3, help="number of runs per measurement, best run is used")
+@click.option("--seed", default=0, help="seed of the file sample")
+def gzip_backend_benchmark(input, files, backends, repeat, seed):
+    backends = list(backends or available_gzip_backends())
+    missing = [backend for backend in backends if backend not in available_gzip_backends()]
+    if missing:
+        print(f"Gzip backends are not installed: {', '.join(missing)}")
+        sys.exit(1)
+    paths = sample_station_files(input, files, seed)
+    sizes = sorted(os.path.getsize(path) for path in paths)
+    print(f"Sample: {len(paths)} files, {sum(sizes) / MB:.1f} MB compressed, "
+          f"median {sizes[len(sizes) // 2] / 1024:.0f} KB, max {sizes[-1] / 1024:.0f} KB")
+    check_identical(backends, paths)
+
+    baseline = {mode: measure_backend("gzip", mode, paths, repeat) for mode in READERS}
+    print(f"{'backend':<10}{'mode':<12}{'MB/s':>10}{'speedup':>10}")
+    for backend in backends:
+        for mode in READERS:
+            result = baseline[mode] if backend == "gzip" else measure_backend(backend, mode, paths, repeat)
+            print(f"{backend:<10}{mode:<12}{result.speed:>10.1f}{baseline[mode].seconds / result.seconds:>9.2f}x")
+
+
+if __name__ == "__main__":
+    gzip_backend_benchmark()
@@ -0,0 +1,79 @@
+"""Startup-time benchmark of the CLIs.
+Measures module import time and --help latency in fresh interpreters, on top of the bare interpreter startup,
+and fails if any of them exceeds the budget.
+
+Usage (from src/main/python): python -m benchmarks.startup"""
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import click
+
+CLI_MODULES = ["ncdc_analysis.cli.cluster_runner",
+               "ncdc_analysis.cli.data_generator",
+               "ncdc_analysis.cli.file_combiner",
+               "ncdc_analysis.cli.local_runner",
+               "ncdc_analysis.cli.sampler"]
+HEAVY_MODULES = ["boto3", "botocore", "pandas", "numpy", "toolz", "dotenv"]
+PYTHON_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run_python(args: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], cwd=PYTHON_ROOT, capture_output=True, text=True, check=True)
+
+
+def time_python(args: List[str], repeat: int) -> float:
+    """Best wall time of running python with args, best of repeat to reduce noise."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _run_python(args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def loaded_heavy_modules(module: str) -> List[str]:
+    """Heavy dependencies that are loaded by importing module."""
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    output = _run_python(["-c", code]).stdout.strip()
+    return output.split(",") if output else []
+
+
+def measure_startup(repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    """Import and --help times of each CLI in seconds, bare interpreter startup is deducted."""
+    interpreter = time_python(["-c", "pass"], repeat)
+    results = {}
+    for module in CLI_MODULES:
+        results[module] = {
+            "import": time_python(["-c", f"import {module}"], repeat) - interpreter,
+            "help": time_python(["-m", module, "--help"], repeat) - interpreter,
+        }
+    return results
+
+
+@click.command()
+@click.option("--import-budget", default=0.15, help="Max import time of a CLI module in seconds")
+@click.option("--help-budget", default=0.25, help="Max --help latency of a CLI in seconds")
+@click.option("--repeat", default=5, help="Number of runs per measurement, best run is used")
+def startup_benchmark(import_budget, help_budget, repeat):
+    failures = []
+    for module, timings in measure_startup(repeat).items():
+        heavy = loaded_heavy_modules(module)
+        print(f"{module}: import {timings['import']:.3f}s, --help {timings['help']:.3f}s"
+              + (f", loads {', '.join(heavy)}" if heavy else ""))
+        if timings["import"] > import_budget:
+            failures.append(f"{module} import {timings['import']:.3f}s > {import_budget}s")
+        if timings["help"] > help_budget:
+            failures.append(f"{module} --help {timings['help']:.3f}s > {help_budget}s")
+        if heavy:
+            failures.append(f"{module} loads heavy modules at import: {', '.join(heavy)}")
+    if failures:
+        print("Startup budget exceeded:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("Startup within budget.")
+
+
+if __name__ == "__main__":
+    startup_benchmark()
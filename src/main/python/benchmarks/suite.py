@@ -0,0 +1,227 @@
+"""Benchmark suite of the preprocessing, result fetching and parsing hot paths.
+Runs each case on synthetic inputs of several sizes, S3 is replaced by local folders (see ncdc_analysis.filesystem).
+Every measurement runs in a fresh interpreter, so peak RSS is the peak of the case alone. Wall time, throughput
+and peak RSS are compared to a JSON baseline, and the suite fails if any metric regresses more than the tolerance.
+
+Usage (from src/main/python):
+  python -m benchmarks.suite --save-baseline  # record baseline of this machine to benchmarks/baseline.json
+  python -m benchmarks.suite                  # compare to the baseline"""
+from dataclasses import asdict, dataclass
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from typing import Callable, Dict, List, Optional
+
+import click
+
+from benchmarks.startup import PYTHON_ROOT
+
+MB = 1024 * 1024
+SIZES = {"small": 4 * MB, "medium": 32 * MB, "large": 256 * MB}
+DEFAULT_BASELINE = os.path.join(PYTHON_ROOT, "benchmarks", "baseline.json")
+STATS_COLUMNS = ["min", "max", "avg", "count"]
+SYNTHETIC_YEARS = [1950, 1951, 1952, 1953]
+
+
+@dataclass
+class Measurement:
+    seconds: float
+    throughput_mb_s: float
+    peak_rss_mb: float
+
+
+# Setup functions write the input of the case to the folder and return the number of input bytes.
+# Run functions are timed in a fresh interpreter.
+
+def _setup_noaa(folder: str, size: int) -> int:
+    from ncdc_analysis.preprocessing.synthetic_data import generate_data
+    return generate_data(os.path.join(folder, "noaa"), SYNTHETIC_YEARS, size).bytes
+
+
+def _setup_noaa_year(folder: str, size: int) -> int:
+    from ncdc_analysis.preprocessing.synthetic_data import generate_data
+    return generate_data(os.path.join(folder, "noaa"), SYNTHETIC_YEARS[:1], size).bytes
+
+
+def _mapr_lines(size: int) -> List[str]:
+    line = "{:09d}\t-123, 456, 12.345678, 2920"
+    return [line.format(n) for n in range(size // len(line.format(0)))]
+
+
+def _setup_mapr_text(folder: str, size: int) -> int:
+    with open(os.path.join(folder, "mapr.txt"), "w") as f:
+        f.write("\n".join(_mapr_lines(size)))
+    return size
+
+
+def _setup_spark_text(folder: str, size: int) -> int:
+    with open(os.path.join(folder, "spark.csv"), "w") as f:
+        f.write("\n".join(["year,min,max,avg,count"] + [line.replace("\t", ",").replace(", ", ",")
+                                                         for line in _mapr_lines(size)]))
+    return size
+
+
+def _setup_mapr_parts(folder: str, size: int, parts: int = 8) -> int:
+    """Part files of MapReduce job, keys are partitioned by hash so each part is sorted but interleaved."""
+    os.makedirs(os.path.join(folder, "mapr_parts"))
+    lines = _mapr_lines(size)
+    for part in range(parts):
+        with open(os.path.join(folder, "mapr_parts", f"part-r-{part:05d}"), "w") as f:
+            f.writelines(line + "\n" for line in lines[part::parts])
+    with open(os.path.join(folder, "mapr_parts", "_SUCCESS"), "w"):
+        pass
+    return size
+
+
+def _run_combine_files(folder: str):
+    from ncdc_analysis.core.combine_files import combine_files
+    output = tempfile.mkdtemp(dir=folder)
+    combine_files(os.path.join(folder, "noaa"), output)
+
+
+def _run_combine_gz_files_to_one(folder: str):
+    from ncdc_analysis.preprocessing.combine_files_to_yearly import NcdcFolder, combine_gz_files_to_one
+    output = tempfile.mkdtemp(dir=folder)
+    year = str(SYNTHETIC_YEARS[0])
+    combine_gz_files_to_one(NcdcFolder(year, os.path.join(folder, "noaa", year)), os.path.join(output, year))
+
+
+def _run_clean_mapr_results(folder: str):
+    from ncdc_analysis.postprocessing.map_reduce_utils import clean_mapr_results
+    with open(os.path.join(folder, "mapr.txt")) as f:
+        data = f.read()
+    clean_mapr_results(data, col_names=STATS_COLUMNS)
+
+
+def _run_clean_spark_results(folder: str):
+    from ncdc_analysis.postprocessing.spark_utils import clean_spark_results
+    with open(os.path.join(folder, "spark.csv")) as f:
+        data = f.read()
+    clean_spark_results(data)
+
+
+def _run_fetch_hadoop_style_results(folder: str):
+    from ncdc_analysis.filesystem import LocalPath
+    from ncdc_analysis.postprocessing.result_fetchers import EMRResultFetcher
+    EMRResultFetcher._fetch_hadoop_style_results(LocalPath(os.path.join(folder, "mapr_parts")), STATS_COLUMNS)
+
+
+@dataclass
+class BenchmarkCase:
+    name: str
+    setup: Callable[[str, int], int]
+    run: Callable[[str], None]
+
+
+CASES = {case.name: case for case in [
+    BenchmarkCase("combine_files", _setup_noaa, _run_combine_files),
+    BenchmarkCase("combine_gz_files_to_one", _setup_noaa_year, _run_combine_gz_files_to_one),
+    BenchmarkCase("clean_mapr_results", _setup_mapr_text, _run_clean_mapr_results),
+    BenchmarkCase("clean_spark_results", _setup_spark_text, _run_clean_spark_results),
+    BenchmarkCase("fetch_hadoop_style_results", _setup_mapr_parts, _run_fetch_hadoop_style_results),
+]}
+
+
+def run_case(name: str, folder: str):
+    """Entry point of the measurement interpreter, prints wall time and peak RSS as JSON."""
+    import resource
+    import time
+
+    start = time.perf_counter()
+    CASES[name].run(folder)
+    seconds = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    rss_unit = 1 if sys.platform == "darwin" else 1024
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * rss_unit
+    print(json.dumps({"seconds": seconds, "peak_rss_mb": peak_rss / MB}))
+
+
+def measure_case(name: str, size: int, workdir: str, repeat: int = 3) -> Measurement:
+    """Best wall time and lowest peak RSS of repeat runs, input is set up once outside of the measurement."""
+    folder = tempfile.mkdtemp(prefix=f"{name}_", dir=workdir)
+    input_bytes = CASES[name].setup(folder, size)
+    runs = []
+    for _ in range(repeat):
+        code = f"from benchmarks.suite import run_case; run_case({name!r}, {folder!r})"
+        output = subprocess.run([sys.executable, "-c", code], cwd=PYTHON_ROOT, capture_output=True, text=True,
+                                check=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    seconds = min(run["seconds"] for run in runs)
+    return Measurement(seconds=seconds, throughput_mb_s=input_bytes / MB / seconds,
+                       peak_rss_mb=min(run["peak_rss_mb"] for run in runs))
+
+
+def compare(results: Dict[str, Measurement], baseline: Dict[str, Dict[str, float]],
+            tolerance: float) -> List[str]:
+    """Regressions of results against baseline, e.g. wall time over 10% longer than baseline with tolerance 0.1.
+    Wall time and peak RSS regress when they grow, throughput when it shrinks."""
+    regressions = []
+    for key, measurement in results.items():
+        if key not in baseline:
+            continue
+        base = baseline[key]
+        if measurement.seconds > base["seconds"] * (1 + tolerance):
+            regressions.append(f"{key}: wall time {measurement.seconds:.3f}s > baseline {base['seconds']:.3f}s")
+        if measurement.throughput_mb_s < base["throughput_mb_s"] * (1 - tolerance):
+            regressions.append(f"{key}: throughput {measurement.throughput_mb_s:.1f} MB/s < "
+                               f"baseline {base['throughput_mb_s']:.1f} MB/s")
+        if measurement.peak_rss_mb > base["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(f"{key}: peak RSS {measurement.peak_rss_mb:.1f} MB > "
+                               f"baseline {base['peak_rss_mb']:.1f} MB")
+    return regressions
+
+
+def read_baseline(path: str) -> Optional[Dict[str, Dict[str, float]]]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def write_baseline(path: str, results: Dict[str, Measurement]):
+    baseline = {"python": platform.python_version(), "machine": platform.machine(),
+                "results": {key: asdict(measurement) for key, measurement in sorted(results.items())}}
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2)
+
+
+@click.command()
+@click.option("--case", "cases", multiple=True, type=click.Choice(list(CASES)),
+              help="Cases to run (multiple), defaults to all")
+@click.option("--size", "sizes", multiple=True, default=["small", "medium"], type=click.Choice(list(SIZES)),
+              help="Input sizes (multiple): small (4 MB), medium (32 MB) or large (256 MB). "
+                   "Defaults to small and medium")
+@click.option("--repeat", default=3, help="Number of runs per measurement, best run is used")
+@click.option("--baseline", default=DEFAULT_BASELINE, help="Path of the baseline JSON")
+@click.option("--save-baseline", is_flag=True, help="Save the results as the new baseline instead of comparing")
+@click.option("--tolerance", default=0.2, help="Allowed relative regression of any metric, e.g. 0.2 = 20%")
+def benchmark_suite(cases, sizes, repeat, baseline, save_baseline, tolerance):
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in cases or CASES:
+            for size in sizes:
+                measurement = measure_case(name, SIZES[size], workdir, repeat)
+                results[f"{name}/{size}"] = measurement
+                print(f"{name}/{size}: {measurement.seconds:.3f}s, {measurement.throughput_mb_s:.1f} MB/s, "
+                      f"peak RSS {measurement.peak_rss_mb:.1f} MB")
+
+    if save_baseline:
+        write_baseline(baseline, results)
+        print(f"Baseline saved to {baseline}")
+        return
+    baseline_results = read_baseline(baseline)
+    if baseline_results is None:
+        print(f"No baseline in {baseline}, create one with --save-baseline")
+        sys.exit(1)
+    regressions = compare(results, baseline_results, tolerance)
+    if regressions:
+        print(f"Regressions over {tolerance:.0%} tolerance:\n  " + "\n  ".join(regressions))
+        sys.exit(1)
+    print("No regressions.")
+
+
+if __name__ == "__main__":
+    benchmark_suite()
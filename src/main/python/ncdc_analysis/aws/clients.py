@@ -0,0 +1,123 @@
+from dataclasses import dataclass, field
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class ClientConfig:
+    """Connection settings of boto3 clients created by get_client.
+    Adaptive retry mode backs off client side when AWS starts throttling."""
+    max_pool_connections: int = 50
+    max_attempts: int = 10
+    retry_mode: str = "adaptive"
+    connect_timeout: float = 10
+    read_timeout: float = 60
+
+    def to_botocore_config(self):
+        from botocore.config import Config
+        return Config(max_pool_connections=self.max_pool_connections,
+                      retries={"max_attempts": self.max_attempts, "mode": self.retry_mode},
+                      connect_timeout=self.connect_timeout,
+                      read_timeout=self.read_timeout)
+
+
+DEFAULT_CLIENT_CONFIG = ClientConfig()
+
+
+@dataclass
+class OperationMetrics:
+    calls: int = 0
+    errors: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+
+    @property
+    def avg_latency(self) -> float:
+        return self.total_latency / self.calls if self.calls else 0.0
+
+
+@dataclass
+class ClientMetrics:
+    """Call counts and latencies of AWS operations, e.g. 's3.GetObject', of the clients created by get_client."""
+    operations: Dict[str, OperationMetrics] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, operation: str, latency: float, error: bool = False):
+        with self._lock:
+            metrics = self.operations.setdefault(operation, OperationMetrics())
+            metrics.calls += 1
+            metrics.errors += int(error)
+            metrics.total_latency += latency
+            metrics.max_latency = max(metrics.max_latency, latency)
+
+    def reset(self):
+        with self._lock:
+            self.operations = {}
+
+    def report(self) -> str:
+        lines = ["AWS calls:"]
+        for operation, metrics in sorted(self.operations.items()):
+            lines.append(f"  {operation}: {metrics.calls} calls, {metrics.errors} errors, "
+                         f"avg {metrics.avg_latency * 1000:.1f}ms, max {metrics.max_latency * 1000:.1f}ms")
+        return "\n".join(lines)
+
+
+CLIENT_METRICS = ClientMetrics()
+
+_sessions: Dict[Optional[str], Any] = {}
+_clients: Dict[Tuple[str, Optional[str], Optional[str], ClientConfig], Any] = {}
+_lock = threading.Lock()
+
+
+def _register_metrics(client, service: str):
+    def _before_call(context, **kwargs):
+        context["ncdc_start_time"] = time.perf_counter()
+
+    def _record(operation_name: str, context: Dict, error: bool):
+        start_time = context.pop("ncdc_start_time", None)
+        if start_time is not None:
+            CLIENT_METRICS.record(f"{service}.{operation_name}", time.perf_counter() - start_time, error=error)
+
+    def _after_call(model, context, http_response=None, **kwargs):
+        _record(model.name, context, error=http_response is None or http_response.status_code >= 400)
+
+    def _after_call_error(event_name, context, **kwargs):
+        # Raised before a response was received, e.g. connection errors after retries
+        _record(event_name.rsplit(".", 1)[-1], context, error=True)
+
+    client.meta.events.register("before-call", _before_call)
+    client.meta.events.register("after-call", _after_call)
+    client.meta.events.register("after-call-error", _after_call_error)
+
+
+def get_session(profile_name: Optional[str] = None):
+    """Cached boto3 session per profile."""
+    with _lock:
+        if profile_name not in _sessions:
+            import boto3
+            _sessions[profile_name] = boto3.Session(profile_name=profile_name)
+        return _sessions[profile_name]
+
+
+def get_client(service: str, profile_name: Optional[str] = None, region_name: Optional[str] = None,
+               config: ClientConfig = DEFAULT_CLIENT_CONFIG):
+    """Cached boto3 client per service, profile, region and config.
+    Clients are thread safe, so they can be shared for concurrent fetching and polling,
+    which reuses the pooled connections instead of new TLS handshakes."""
+    key = (service, profile_name, region_name, config)
+    if key in _clients:
+        return _clients[key]
+    session = get_session(profile_name)
+    with _lock:
+        if key not in _clients:
+            client = session.client(service, region_name=region_name, config=config.to_botocore_config())
+            _register_metrics(client, service)
+            _clients[key] = client
+        return _clients[key]
+
+
+def clear_client_cache():
+    with _lock:
+        _sessions.clear()
+        _clients.clear()
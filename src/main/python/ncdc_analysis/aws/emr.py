@@ -1,12 +1,15 @@
 from abc import abstractmethod, ABCMeta
-import boto3
+import click
 from dataclasses import dataclass, field
 from itertools import chain
 import math
+from ncdc_analysis.aws.clients import get_client, CLIENT_METRICS
 from ncdc_analysis.aws.s3 import S3Path
-from ncdc_analysis.postprocessing.result_fetchers import EMRResultFetcher
-from settings import AWS_REGION
-from typing import Any, Dict, Optional, List
+import settings
+from typing import Any, Dict, Optional, List, Tuple, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ncdc_analysis.postprocessing.result_fetchers import EMRResultFetcher
 
 
 @dataclass
@@ -50,6 +53,8 @@ class EMRSparkStep(EMRStep):
     packages: List[str] = field(default_factory=list)
     name: str = "Spark Jar Step"
     action_on_failure: str = "CONTINUE"
+    # spark-submit --conf settings, see ncdc_analysis.aws.spark_tuning
+    conf: Dict[str, str] = field(default_factory=dict)
 
     # Class args
     _args_defaults = ["spark-submit",
@@ -60,6 +65,9 @@ class EMRSparkStep(EMRStep):
     def _build_packages(self) -> List:
         return ["--packages", ",".join(self.packages)] if self.packages else []
 
+    def _build_conf(self) -> List:
+        return list(chain.from_iterable(["--conf", f"{key}={value}"] for key, value in sorted(self.conf.items())))
+
     def to_dict(self) -> Dict:
         d = {
             "Name": self.name,
@@ -69,6 +77,7 @@ class EMRSparkStep(EMRStep):
                 "Args": [*self._args_defaults,
                          *["--class", self.jar_class],
                          *self._build_packages(),
+                         *self._build_conf(),
                          *[self.jar_path],
                          *self.jar_args]
             }
@@ -76,22 +85,214 @@ class EMRSparkStep(EMRStep):
         return d
 
 
+DEFAULT_RELEASE_LABEL = "emr-5.23.0"
+# First release of each major version that supports managed scaling, later majors support it from the start
+MANAGED_SCALING_RELEASE_LABELS = {5: "emr-5.30.0", 6: "emr-6.1.0"}
+AUTO_SCALING_ROLE = "EMR_AutoScaling_DefaultRole"
+
+
+def parse_release_label(release_label: str) -> Tuple[int, ...]:
+    """Parses EMR release label to comparable version, e.g. 'emr-5.23.0' -> (5, 23, 0)"""
+    prefix, _, version = release_label.partition("-")
+    if prefix != "emr" or not all(part.isdigit() for part in version.split(".")):
+        raise ValueError(f"Invalid EMR release label, should be like emr-5.23.0: {release_label}")
+    return tuple(map(int, version.split(".")))
+
+
+def release_at_least(release_label: str, first_releases: Dict[int, str]) -> bool:
+    """True if the release is at least the first release of its major version in first_releases.
+    Earlier major versions are not supported and later ones are supported from the start."""
+    version = parse_release_label(release_label)
+    if version[0] < min(first_releases):
+        return False
+    minimum = first_releases.get(version[0])
+    return minimum is None or version >= parse_release_label(minimum)
+
+
+def supports_managed_scaling(release_label: str) -> bool:
+    return release_at_least(release_label, MANAGED_SCALING_RELEASE_LABELS)
+
+
+@dataclass
+class InstanceGroup:
+    """Uniform instance group of EMR cluster, role is MASTER, CORE or TASK.
+    SPOT market uses the on-demand price as maximum price, unless bid_price (USD per hour) is given."""
+    role: str
+    instance_type: str
+    instance_count: int
+    market: str = "ON_DEMAND"
+    bid_price: Optional[str] = None
+    auto_scaling_policy: Optional[Dict] = None
+
+    def to_dict(self) -> Dict:
+        d = {
+            "Name": f"{self.role.capitalize()} nodes",
+            "InstanceRole": self.role,
+            "Market": self.market,
+            "InstanceType": self.instance_type,
+            "InstanceCount": self.instance_count,
+        }
+        if self.bid_price is not None:
+            d["BidPrice"] = self.bid_price
+        if self.auto_scaling_policy is not None:
+            d["AutoScalingPolicy"] = self.auto_scaling_policy
+        return d
+
+
+@dataclass
+class ManagedScaling:
+    """EMR managed scaling of core and task nodes (master is not counted) between min and max instances.
+    Core nodes are kept at max_core_capacity, so that the cluster grows and shrinks with task nodes,
+    which do not store HDFS blocks and can be spot instances."""
+    min_capacity: int
+    max_capacity: int
+    max_core_capacity: Optional[int] = None
+
+    def to_dict(self) -> Dict:
+        limits = {"UnitType": "Instances",
+                  "MinimumCapacityUnits": self.min_capacity,
+                  "MaximumCapacityUnits": self.max_capacity}
+        if self.max_core_capacity is not None:
+            limits["MaximumCoreCapacityUnits"] = self.max_core_capacity
+        return {"ComputeLimits": limits}
+
+
+@dataclass
+class AutomaticScaling:
+    """Automatic scaling policy of the task group between min and max instances by available YARN memory:
+    adds a node when less than scale_out_threshold percent is available and removes one above scale_in_threshold."""
+    min_capacity: int
+    max_capacity: int
+    scale_out_threshold: float = 15.0
+    scale_in_threshold: float = 75.0
+    cool_down: int = 300  # seconds
+
+    def _rule(self, name: str, adjustment: int, operator: str, threshold: float) -> Dict:
+        return {
+            "Name": name,
+            "Action": {"SimpleScalingPolicyConfiguration": {"AdjustmentType": "CHANGE_IN_CAPACITY",
+                                                            "ScalingAdjustment": adjustment,
+                                                            "CoolDown": self.cool_down}},
+            "Trigger": {"CloudWatchAlarmDefinition": {
+                "ComparisonOperator": operator,
+                "EvaluationPeriods": 1,
+                "MetricName": "YARNMemoryAvailablePercentage",
+                "Namespace": "AWS/ElasticMapReduce",
+                "Period": 300,
+                "Statistic": "AVERAGE",
+                "Threshold": threshold,
+                "Unit": "PERCENT",
+                "Dimensions": [{"Key": "JobFlowId", "Value": "${emr.clusterId}"}],
+            }},
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            "Constraints": {"MinCapacity": self.min_capacity, "MaxCapacity": self.max_capacity},
+            "Rules": [self._rule("ScaleOutMemory", 1, "LESS_THAN", self.scale_out_threshold),
+                      self._rule("ScaleInMemory", -1, "GREATER_THAN", self.scale_in_threshold)],
+        }
+
+
+@dataclass
+class ClusterLayout:
+    """Separate master, core and (optional) task instance groups of EMR cluster and their scaling,
+    see from_options. Without a layout EMRConfigBuilder uses instance_count nodes of one instance_type."""
+    master: InstanceGroup
+    core: InstanceGroup
+    task: Optional[InstanceGroup] = None
+    scaling: Optional[Union[ManagedScaling, AutomaticScaling]] = None
+
+    @classmethod
+    def from_options(cls, instance_type: str, instance_count: int,
+                     master_instance_type: Optional[str] = None,
+                     core_instance_type: Optional[str] = None,
+                     task_instance_type: Optional[str] = None,
+                     task_instance_count: int = 0,
+                     task_spot: bool = False,
+                     task_bid_price: Optional[str] = None,
+                     scaling: Optional[str] = None,
+                     min_capacity: Optional[int] = None,
+                     max_capacity: Optional[int] = None) -> "ClusterLayout":
+        """Layout of one master and instance_count - 1 core nodes, instance types default to instance_type and
+        task nodes to the core instance type. Scaling is "managed" (capacity counts core and task nodes)
+        or "automatic" (capacity counts task nodes), both default to the initial size as min capacity.
+        With automatic scaling, task_instance_count should be within the capacity (0 starts at min capacity)."""
+        if instance_count < 2:
+            raise ValueError("Instance groups require instance-count of 2 at least, one master and one core node")
+        if task_instance_count < 0:
+            raise ValueError(f"Task instance count should not be negative, got {task_instance_count}")
+        core_count = instance_count - 1
+        core_type = core_instance_type or instance_type
+        market = "SPOT" if task_spot else "ON_DEMAND"
+        if task_bid_price and not task_spot:
+            raise ValueError("Task bid price requires spot task nodes")
+
+        task, scaling_policy = None, None
+        if scaling == "managed":
+            min_capacity = core_count + task_instance_count if min_capacity is None else min_capacity
+            scaling_policy = ManagedScaling(min_capacity=min_capacity, max_capacity=max_capacity or min_capacity,
+                                            max_core_capacity=core_count)
+        elif scaling == "automatic":
+            min_capacity = task_instance_count if min_capacity is None else min_capacity
+            max_capacity = max_capacity or min_capacity
+            if task_instance_count and not min_capacity <= task_instance_count <= max_capacity:
+                raise click.BadParameter(f"{task_instance_count} is outside automatic scaling capacity "
+                                         f"{min_capacity}-{max_capacity}", param_hint="'--task-instance-count'")
+            # Without initial task nodes the task group starts at min capacity
+            task_instance_count = task_instance_count or min_capacity
+            scaling_policy = AutomaticScaling(min_capacity=min_capacity, max_capacity=max_capacity)
+        elif scaling is not None:
+            raise ValueError(f"Unknown scaling {scaling}, should be managed or automatic")
+        elif min_capacity is not None or max_capacity is not None:
+            raise ValueError("Min and max capacity require scaling")
+        if scaling_policy is not None and not 0 <= scaling_policy.min_capacity <= scaling_policy.max_capacity:
+            raise ValueError(f"Scaling capacity should be 0 <= min <= max, got min {scaling_policy.min_capacity} "
+                             f"and max {scaling_policy.max_capacity}")
+
+        # Scaling grows the task group, so it is created even without initial task nodes
+        if task_instance_count or scaling_policy is not None:
+            task = InstanceGroup("TASK", task_instance_type or core_type, task_instance_count, market=market,
+                                 bid_price=task_bid_price,
+                                 auto_scaling_policy=scaling_policy.to_dict() if scaling == "automatic" else None)
+        elif task_spot or task_instance_type:
+            raise ValueError("Task instance options require task-instance-count or scaling")
+        return cls(master=InstanceGroup("MASTER", master_instance_type or instance_type, 1),
+                   core=InstanceGroup("CORE", core_type, core_count),
+                   task=task,
+                   scaling=scaling_policy)
+
+    @property
+    def instance_groups(self) -> List[InstanceGroup]:
+        return [group for group in [self.master, self.core, self.task] if group is not None]
+
+
 class EMRConfigBuilder:
-    """Builds boto3's EMR-client run configuration based on given parameters."""
+    """Builds boto3's EMR-client run configuration based on given parameters.
+    With a layout the cluster has separate master, core and task instance groups, see ClusterLayout."""
     name: str
     instance_count: int
     instance_type: str
     logs_path: str
     action_on_failure: str
+    release_label: str
+    layout: Optional[ClusterLayout]
     _spark: bool
     _steps: List[EMRStep]
 
-    def __init__(self, name, instance_count, instance_type, logs_path, action_on_failure="CONTINUE"):
+    def __init__(self, name, instance_count, instance_type, logs_path, action_on_failure="CONTINUE",
+                 release_label=DEFAULT_RELEASE_LABEL, layout: Optional[ClusterLayout] = None):
+        if layout is not None and isinstance(layout.scaling, ManagedScaling) and \
+                not supports_managed_scaling(release_label):
+            raise ValueError(f"Managed scaling requires release {' or '.join(MANAGED_SCALING_RELEASE_LABELS.values())} "
+                             f"or later of the major version, got {release_label}")
         self.name = name
         self.instance_count = instance_count
         self.instance_type = instance_type
         self.logs_path = logs_path
         self.action_on_failure = action_on_failure
+        self.release_label = release_label
+        self.layout = layout
         self._steps = []
 
     def add_step(self, step: EMRStep):
@@ -101,18 +302,27 @@ class EMRConfigBuilder:
         d = dict(
                 Name=self.name,
                 LogUri=self.logs_path,
-                ReleaseLabel="emr-5.23.0",
-                Instances={
-                    "MasterInstanceType": self.instance_type,
-                    "SlaveInstanceType": self.instance_type,
-                    "InstanceCount": self.instance_count
-                },
+                ReleaseLabel=self.release_label,
+                Instances=self._build_instances(),
                 VisibleToAllUsers=True,
                 JobFlowRole="EMR_EC2_DefaultRole",
                 ServiceRole="EMR_DefaultRole",
             )
+        if self.layout is not None and isinstance(self.layout.scaling, ManagedScaling):
+            d["ManagedScalingPolicy"] = self.layout.scaling.to_dict()
+        if self.layout is not None and isinstance(self.layout.scaling, AutomaticScaling):
+            d["AutoScalingRole"] = AUTO_SCALING_ROLE
         return d
 
+    def _build_instances(self) -> Dict:
+        if self.layout is None:
+            return {
+                "MasterInstanceType": self.instance_type,
+                "SlaveInstanceType": self.instance_type,
+                "InstanceCount": self.instance_count
+            }
+        return {"InstanceGroups": [group.to_dict() for group in self.layout.instance_groups]}
+
     def _build_config_steps(self) -> Dict:
         steps: List[Dict] = [step.to_dict() for step in self._steps]
         return dict(Steps=steps)
@@ -136,7 +346,7 @@ class EMRConfigBuilder:
 
 class EMRRunner:
     config: EMRConfigBuilder
-    result_fetcher: EMRResultFetcher
+    result_fetcher: "EMRResultFetcher"
     output_path: S3Path
     results: Optional[Any] = None
     max_wait: int
@@ -161,6 +371,7 @@ class EMRRunner:
         if self.result_fetcher:
             self.fetch_results()
             print("Results fetched")
+        print(CLIENT_METRICS.report())
 
     def fetch_results(self):
         self.results = self.result_fetcher.fetch(self.output_path)
@@ -172,9 +383,7 @@ class EMRRunner:
         self._cluster_id = cluster_id
 
     def _init_emr_session(self):
-        session = boto3.Session(profile_name="emr_runner")
-        client = session.client("emr", region_name=AWS_REGION)
-        self._client = client
+        self._client = get_client("emr", profile_name="emr_runner", region_name=settings.AWS_REGION)
 
     def _wait_for_cluster_completion(self) -> None:
         """Blocks until all EMR Steps has been completed.
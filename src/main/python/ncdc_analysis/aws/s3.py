@@ -1,11 +1,87 @@
 from dataclasses import dataclass
+from fnmatch import fnmatch
+import io
 import os
 from urllib.parse import urlparse
-from typing import Tuple, List, Dict
+from typing import Tuple, List, Dict, Iterator, Optional
+
+from ncdc_analysis.filesystem import FileStat
+
+DEFAULT_S3_BUFFER_SIZE = 8 * 1024 * 1024
+
+
+def _default_client():
+    from ncdc_analysis.aws.clients import get_client
+    return get_client("s3", profile_name="default")
+
+
+class S3RawReader(io.RawIOBase):
+    """Seekable raw reader of S3 object. Sequential reads stream one GET response,
+    seeking reopens the stream at the new position with a ranged GET."""
+
+    def __init__(self, s3_client, bucket: str, key: str, size: Optional[int] = None):
+        self._client = s3_client
+        self._bucket = bucket
+        self._key = key
+        self._size = size
+        self._position = 0
+        self._body = None
+
+    @property
+    def size(self) -> int:
+        if self._size is None:
+            self._size = self._client.head_object(Bucket=self._bucket, Key=self._key)["ContentLength"]
+        return self._size
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset != self._position:
+            self._close_body()
+            self._position = offset
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        if self._size is not None and self._position >= self._size:
+            return 0
+        if self._body is None:
+            try:
+                response = self._client.get_object(Bucket=self._bucket, Key=self._key, Range=f"bytes={self._position}-")
+            except self._client.exceptions.ClientError as e:
+                if e.response["Error"]["Code"] == "InvalidRange":
+                    return 0
+                raise
+            self._body = response["Body"]
+        data = self._body.read(len(buffer))
+        buffer[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def _close_body(self):
+        if self._body is not None:
+            self._body.close()
+            self._body = None
+
+    def close(self):
+        self._close_body()
+        super().close()
 
 
 @dataclass
 class S3Path:
+    """S3 object or prefix with filesystem-style API, see ncdc_analysis.filesystem.LocalPath for local counterpart.
+    Methods use the shared default client from ncdc_analysis.aws.clients if s3_client is not given."""
     bucket: str
     key: str
 
@@ -13,6 +89,10 @@ class S3Path:
     def path(self) -> str:
         return os.path.join("s3://", self.bucket, self.key)
 
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.key.rstrip("/"))
+
     def join(self, key_extension: str):
         new_path = os.path.join(self.path, key_extension)
         return self.from_path(new_path)
@@ -30,22 +110,100 @@ class S3Path:
         bucket, key = cls._s3_path_to_folder_and_key(path)
         return cls(bucket, key)
 
+    @property
+    def _folder_prefix(self) -> str:
+        return self.key if not self.key or self.key.endswith("/") else self.key + "/"
+
+    def list_objects(self, prefix: Optional[str] = None, delimiter: Optional[str] = None,
+                     s3_client=None) -> Iterator[Dict]:
+        """Lazily paginated list_objects_v2 responses under prefix (default self.key)."""
+        s3_client = s3_client or _default_client()
+        kwargs = dict(Bucket=self.bucket, Prefix=self.key if prefix is None else prefix)
+        if delimiter:
+            kwargs["Delimiter"] = delimiter
+        for page in s3_client.get_paginator("list_objects_v2").paginate(**kwargs):
+            yield page
+
+    def iterdir(self, s3_client=None) -> Iterator["S3Path"]:
+        """Objects and "folders" (common prefixes) directly under the prefix, lazily paginated."""
+        for page in self.list_objects(prefix=self._folder_prefix, delimiter="/", s3_client=s3_client):
+            for common_prefix in page.get("CommonPrefixes", []):
+                yield S3Path(self.bucket, common_prefix["Prefix"])
+            for obj in page.get("Contents", []):
+                yield S3Path(self.bucket, obj["Key"])
+
+    def scandir(self, s3_client=None) -> Iterator[Tuple["S3Path", FileStat]]:
+        """Objects directly under the prefix with their stats, from the listing without extra requests."""
+        for page in self.list_objects(prefix=self._folder_prefix, delimiter="/", s3_client=s3_client):
+            for obj in page.get("Contents", []):
+                yield S3Path(self.bucket, obj["Key"]), FileStat(size=obj["Size"], etag=obj["ETag"].strip('"'),
+                                                                last_modified=obj["LastModified"])
+
+    def scantree(self, s3_client=None) -> Iterator[Tuple["S3Path", FileStat]]:
+        """Objects under the prefix (recursively) with their stats, from one listing without delimiter."""
+        for page in self.list_objects(prefix=self._folder_prefix, s3_client=s3_client):
+            for obj in page.get("Contents", []):
+                yield S3Path(self.bucket, obj["Key"]), FileStat(size=obj["Size"], etag=obj["ETag"].strip('"'),
+                                                                last_modified=obj["LastModified"])
+
+    def glob(self, pattern: str, s3_client=None) -> Iterator["S3Path"]:
+        """Objects under the prefix (recursively) whose key relative to the prefix matches the pattern."""
+        prefix = self._folder_prefix
+        for page in self.list_objects(prefix=prefix, s3_client=s3_client):
+            for obj in page.get("Contents", []):
+                if fnmatch(obj["Key"][len(prefix):], pattern):
+                    yield S3Path(self.bucket, obj["Key"])
+
+    def exists(self, s3_client=None) -> bool:
+        try:
+            self.stat(s3_client)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def stat(self, s3_client=None) -> FileStat:
+        s3_client = s3_client or _default_client()
+        try:
+            head = s3_client.head_object(Bucket=self.bucket, Key=self.key)
+        except s3_client.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                raise FileNotFoundError(self.path) from e
+            raise
+        return FileStat(size=head["ContentLength"], etag=head["ETag"].strip('"'), last_modified=head["LastModified"])
+
+    def open(self, buffer_size: int = DEFAULT_S3_BUFFER_SIZE, s3_client=None) -> io.BufferedReader:
+        """Streaming buffered binary reader, supports seeking for split processing."""
+        raw = S3RawReader(s3_client or _default_client(), self.bucket, self.key)
+        return io.BufferedReader(raw, buffer_size=buffer_size)
+
+    def read_range(self, start: int, end: int, s3_client=None) -> bytes:
+        """Bytes from start (inclusive) to end (exclusive) with one ranged GET."""
+        if end <= start:
+            return b""
+        s3_client = s3_client or _default_client()
+        response = s3_client.get_object(Bucket=self.bucket, Key=self.key, Range=f"bytes={start}-{end - 1}")
+        return response["Body"].read()
+
+    def read_bytes(self, s3_client=None) -> bytes:
+        s3_client = s3_client or _default_client()
+        try:
+            return s3_client.get_object(Bucket=self.bucket, Key=self.key)["Body"].read()
+        except s3_client.exceptions.NoSuchKey as e:
+            raise FileNotFoundError(self.path) from e
+
+    def read_text(self, encoding="utf-8", s3_client=None) -> str:
+        return self.read_bytes(s3_client).decode(encoding)
+
 
 def s3_listdir(s3_client, path: S3Path) -> List[Dict]:
-    """'ls' for s3 bucket, returns results in List
-    TODO refactor to be S3Path methods."""
-    objects_response = s3_client.list_objects_v2(Bucket=path.bucket, Prefix=path.key)
-    if objects_response["KeyCount"] == 0:
-        return []
-    dirs = []
-    for key in objects_response["Contents"]:
-        dirs.append(key)
-    return dirs
+    """'ls' for s3 bucket, returns object dicts of all keys with path as prefix in List.
+    See S3Path.iterdir and S3Path.glob for lazy alternatives."""
+    return [obj for page in path.list_objects(s3_client=s3_client) for obj in page.get("Contents", [])]
 
 
 def s3_read_to_mem(s3_client, path: S3Path, encoding="utf-8"):
-    """Download s3 key to memory
-    TODO TODO refactor to be S3Path methods."""
+    """Download s3 key to memory, see S3Path.open for streaming alternative."""
     file_obj = s3_client.get_object(Bucket=path.bucket, Key=path.key)
     data = file_obj["Body"].read().decode(encoding)
     return data
+
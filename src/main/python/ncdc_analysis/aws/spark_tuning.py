@@ -0,0 +1,111 @@
+from dataclasses import dataclass
+import math
+from typing import Dict, Iterable, Optional
+
+# EMR leaves roughly a quarter of the instance memory to the OS and Hadoop daemons,
+# e.g. m5.xlarge has 16 GiB of which 12288 MB is given to YARN (yarn.nodemanager.resource.memory-mb)
+YARN_MEMORY_FRACTION = 0.75
+MAX_EXECUTOR_CORES = 5  # More cores per executor tends to saturate HDFS/S3 client throughput
+MIN_MEMORY_OVERHEAD_MB = 384
+MEMORY_OVERHEAD_FRACTION = 0.1
+PARTITION_BYTES = 128 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class InstanceType:
+    name: str
+    vcpus: int
+    memory_gib: float
+
+    @property
+    def yarn_memory_mb(self) -> int:
+        return int(self.memory_gib * 1024 * YARN_MEMORY_FRACTION)
+
+
+INSTANCE_TYPES: Dict[str, InstanceType] = {instance.name: instance for instance in [
+    InstanceType("m4.large", 2, 8),
+    InstanceType("m4.xlarge", 4, 16),
+    InstanceType("m4.2xlarge", 8, 32),
+    InstanceType("m4.4xlarge", 16, 64),
+    InstanceType("m4.10xlarge", 40, 160),
+    InstanceType("m5.xlarge", 4, 16),
+    InstanceType("m5.2xlarge", 8, 32),
+    InstanceType("m5.4xlarge", 16, 64),
+    InstanceType("m5.12xlarge", 48, 192),
+    InstanceType("c4.xlarge", 4, 7.5),
+    InstanceType("c4.2xlarge", 8, 15),
+    InstanceType("c5.xlarge", 4, 8),
+    InstanceType("c5.2xlarge", 8, 16),
+    InstanceType("c5.4xlarge", 16, 32),
+    InstanceType("r4.xlarge", 4, 30.5),
+    InstanceType("r4.2xlarge", 8, 61),
+    InstanceType("r5.xlarge", 4, 32),
+    InstanceType("r5.2xlarge", 8, 64),
+    InstanceType("r5.4xlarge", 16, 128),
+]}
+
+
+@dataclass
+class SparkTuning:
+    """Executor sizing of a Spark job, see derive_tuning."""
+    executor_instances: int
+    executor_cores: int
+    executor_memory_mb: int
+    executor_memory_overhead_mb: int
+    shuffle_partitions: int
+
+    def to_conf(self) -> Dict[str, str]:
+        """spark-submit --conf settings. Dynamic allocation (EMR default) is disabled,
+        as it would ignore the sizing and scale executors by pending tasks instead."""
+        return {
+            "spark.dynamicAllocation.enabled": "false",
+            "spark.executor.instances": str(self.executor_instances),
+            "spark.executor.cores": str(self.executor_cores),
+            "spark.executor.memory": f"{self.executor_memory_mb}m",
+            "spark.executor.memoryOverhead": f"{self.executor_memory_overhead_mb}m",
+            "spark.sql.shuffle.partitions": str(self.shuffle_partitions),
+        }
+
+
+def get_instance_type(name: str) -> InstanceType:
+    if name not in INSTANCE_TYPES:
+        raise ValueError(f"Unknown instance type {name}, known types: {', '.join(INSTANCE_TYPES)}")
+    return INSTANCE_TYPES[name]
+
+
+def derive_tuning(instance_type: str, instance_count: int, input_bytes: Optional[int] = None) -> SparkTuning:
+    """Derives executor sizing from the cluster shape and input size.
+    One vCPU per node is left to the daemons on larger instances, and the cores are split to executors of
+    at most MAX_EXECUTOR_CORES cores that share the YARN memory of the node. One executor slot is left to the
+    driver (cluster deploy mode). Shuffle partitions are two per executor core, or more for large inputs
+    so that partitions stay around PARTITION_BYTES."""
+    instance = get_instance_type(instance_type)
+    # Master does not run YARN containers, unless it is the only node
+    worker_nodes = max(1, instance_count - 1)
+    usable_cores = instance.vcpus - 1 if instance.vcpus > 4 else instance.vcpus
+    executor_cores = min(MAX_EXECUTOR_CORES, usable_cores)
+    executors_per_node = usable_cores // executor_cores
+
+    container_mb = instance.yarn_memory_mb // executors_per_node
+    overhead_mb = max(MIN_MEMORY_OVERHEAD_MB, math.ceil(container_mb * MEMORY_OVERHEAD_FRACTION))
+    executor_instances = max(1, executors_per_node * worker_nodes - 1)
+
+    shuffle_partitions = 2 * executor_instances * executor_cores
+    if input_bytes:
+        shuffle_partitions = max(shuffle_partitions, math.ceil(input_bytes / PARTITION_BYTES))
+    return SparkTuning(executor_instances=executor_instances,
+                       executor_cores=executor_cores,
+                       executor_memory_mb=container_mb - overhead_mb,
+                       executor_memory_overhead_mb=overhead_mb,
+                       shuffle_partitions=shuffle_partitions)
+
+
+def parse_spark_conf(settings: Iterable[str]) -> Dict[str, str]:
+    """Parses key=value settings, e.g. ['spark.sql.shuffle.partitions=64'] -> {'spark.sql.shuffle.partitions': '64'}"""
+    conf = {}
+    for setting in settings:
+        key, separator, value = setting.partition("=")
+        if not separator or not key.strip():
+            raise ValueError(f"Invalid Spark setting, should be key=value: {setting}")
+        conf[key.strip()] = value.strip()
+    return conf
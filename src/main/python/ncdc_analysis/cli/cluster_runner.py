@@ -1,54 +1,155 @@
 import click
-from ..core.cluster import run_mapr_job, run_spark_job
-from settings import NCDC_S3_JAR_PATH, NCDC_S3_LOGS_PATH, NCDC_S3_OUT_PATH, LOCAL_OUTPUT_PATH, \
-    NCDC_S3_DATA_PROD_PATH, NCDC_S3_DATA_TEST_PATH
+from ..core.input_selection import parse_years, parse_stations
+import settings
+
+# Heavy dependencies (boto3, pandas) and .env are loaded only when the job is run,
+# so that --help and invalid arguments return fast. See benchmarks.startup
 
 
 @click.command()
 @click.option("--job-type", help="EMR job type", type=click.Choice(["mapreduce", "spark"]))
-@click.option("--jar-path", default=NCDC_S3_JAR_PATH,
+@click.option("--jar-path", default=lambda: settings.NCDC_S3_JAR_PATH,
               help="S3 path to .jar, defaults to env variable NCDC_JARS_S3_PATH")
 @click.option("--jar-class", help="Class to run with Spark, not supported with job-type mapreduce")
 @click.option("--packages",
               help="Extra packages provided for Spark (see. spark-submit), separate packages with commas ','. "
                    "Not supported with job-type mapreduce")
-@click.option("--logs-path", default=NCDC_S3_LOGS_PATH,
+@click.option("--logs-path", default=lambda: settings.NCDC_S3_LOGS_PATH,
               help="S3 output path for logs, defaults to env variable NCDC_LOGS_S3_PATH")
 @click.option("--input-data", default="test",
               help="""Input data used for the job. Accepts following parameters:
               1) test (default) => Uses env variable NCDC_LOGS_S3_DATA_TEST_PATH
               2) prod => Uses env variable NCDC_LOGS_S3_DATA_PROD_PATH
               3) other => Tries use input_data as S3 path for input_data data""")
-@click.option("--out-s3", default=NCDC_S3_OUT_PATH,
+@click.option("--out-s3", default=lambda: settings.NCDC_S3_OUT_PATH,
               help="S3 path used to output results, defaults to env variable NCDC_S3_OUT_PATH")
-@click.option("--out-local", default=LOCAL_OUTPUT_PATH,
+@click.option("--out-local", default=lambda: settings.LOCAL_OUTPUT_PATH,
               help="local path used to output results, defaults to env variable NCDC_S3_OUT_PATH")
 @click.option("--instance-type", default="m4.large",
               help="EMR instance type, used for master and slave instances.")
 @click.option("--instance-count", default=3,
               help="Number of instances used for the EMR cluster.")
+@click.option("--master-instance-type",
+              help="Instance type of the master node, defaults to instance-type. Any of the master, core, task or "
+                   "scaling options creates the cluster with instance groups of one master and instance-count - 1 "
+                   "core nodes")
+@click.option("--core-instance-type", help="Instance type of the core nodes, defaults to instance-type")
+@click.option("--task-instance-type", help="Instance type of the task nodes, defaults to core instance type")
+@click.option("--task-instance-count", default=0, help="Number of task nodes, which do not store HDFS data")
+@click.option("--task-spot", is_flag=True, help="Use spot instances for the task nodes")
+@click.option("--task-bid-price", help="Maximum spot price of the task nodes in USD per hour, "
+                                       "defaults to the on-demand price")
+@click.option("--scaling", type=click.Choice(["managed", "automatic"]),
+              help="managed: EMR managed scaling of core and task nodes between min and max capacity, "
+                   "core nodes are kept at their initial count (requires release-label emr-5.30.0 or later on 5.x "
+                   "and emr-6.1.0 or later on 6.x). "
+                   "automatic: task nodes are scaled between min and max capacity by available YARN memory")
+@click.option("--min-capacity", type=int, help="Minimum number of scaled nodes, defaults to the initial count")
+@click.option("--max-capacity", type=int, help="Maximum number of scaled nodes, defaults to min-capacity")
+@click.option("--release-label", help="EMR release, defaults to emr-5.23.0. Managed scaling requires e.g. emr-6.15.0, "
+                                      "zstd compressed input emr-5.30.0 or later")
+@click.option("--incremental", is_flag=True,
+              help="Only compute statistics for new or changed yearly input files and merge them to the "
+                   "statistics table in out-local. Only supported with job-type mapreduce")
+@click.option("--years",
+              help="Only read yearly input files of given years, e.g. 1930-1950,1960")
+@click.option("--stations",
+              help="Only include records of given stations, separate stations with commas ','. The jobs filter the "
+                   "records, yearly input files are skipped only if they include none of the stations, so usually "
+                   "the same data is read. Skipping files requires station index written by file_combiner. "
+                   "Not supported with incremental")
+@click.option("--out-format", multiple=True, default=["csv"], type=click.Choice(["csv", "parquet", "feather"]),
+              help="Format of the results in out-local, csv (default), parquet or feather. Can be given multiple times")
+@click.option("--results-dataset",
+              help="Local path of Parquet dataset where results of all runs are appended, "
+                   "partitioned by job class and run timestamp")
+@click.option("--shards", default=1,
+              help="Split the yearly input files to given number of year ranges of roughly equal size and run each "
+                   "range in its own cluster of instance-count instances in parallel, the results are merged. "
+                   "Only supported with job-type mapreduce")
+@click.option("--spark-conf", multiple=True,
+              help="Spark setting as key=value, e.g. spark.sql.shuffle.partitions=64. Overrides the executor sizing "
+                   "derived from instance-type, instance-count and input size. Can be given multiple times. "
+                   "Not supported with job-type mapreduce")
 def runner(job_type, jar_path, jar_class, packages, logs_path, input_data, out_s3, out_local,
-           instance_type, instance_count):
+           instance_type, instance_count, master_instance_type, core_instance_type, task_instance_type,
+           task_instance_count, task_spot, task_bid_price, scaling, min_capacity, max_capacity, release_label,
+           incremental, years, stations, out_format, results_dataset, shards, spark_conf):
+    from ..aws.emr import DEFAULT_RELEASE_LABEL, ClusterLayout
+    from ..aws.spark_tuning import parse_spark_conf
+    from ..core.cluster import run_mapr_job, run_spark_job, run_incremental_stats_job, run_sharded_stats_job, \
+        select_input_paths
+
     if input_data == "prod":
-        input_data = NCDC_S3_DATA_PROD_PATH
+        input_data = settings.NCDC_S3_DATA_PROD_PATH
     elif input_data == "test":
-        input_data = NCDC_S3_DATA_TEST_PATH
+        input_data = settings.NCDC_S3_DATA_TEST_PATH
+
+    years = parse_years(years) if years else None
+    stations = parse_stations(stations) if stations else None
+    if stations and incremental:
+        raise ValueError("stations not supported with incremental, "
+                         "the statistics table has the statistics of all stations of each year")
+    if (years or stations) and not incremental and shards == 1:
+        input_data = select_input_paths(input_data, years=years, stations=stations)
+
+    layout = None
+    if master_instance_type or core_instance_type or task_instance_type or task_instance_count or task_spot \
+            or scaling:
+        layout = ClusterLayout.from_options(instance_type, instance_count, master_instance_type=master_instance_type,
+                                            core_instance_type=core_instance_type,
+                                            task_instance_type=task_instance_type,
+                                            task_instance_count=task_instance_count, task_spot=task_spot,
+                                            task_bid_price=task_bid_price, scaling=scaling,
+                                            min_capacity=min_capacity, max_capacity=max_capacity)
+    elif task_bid_price:
+        raise ValueError("task-bid-price requires task-spot")
+    elif min_capacity is not None or max_capacity is not None:
+        raise ValueError("min-capacity and max-capacity require scaling")
+    release_label = release_label or DEFAULT_RELEASE_LABEL
 
     if job_type == "mapreduce":
         if jar_class:
             raise ValueError("jar-class not supported with job-type mapreduce")
         if packages:
             raise ValueError("packages not supported with job-type mapreduce")
+        if spark_conf:
+            raise ValueError("spark-conf not supported with job-type mapreduce")
+        if incremental and shards > 1:
+            raise ValueError("shards not supported with incremental")
+        if shards > 1:
+            run_sharded_stats_job(input_path=input_data, jar_path=jar_path, logs_path=logs_path, out_s3=out_s3,
+                                  out_local=out_local, instance_count=instance_count, instance_type=instance_type,
+                                  shards=shards, years=years, stations=stations,
+                                  out_formats=out_format, results_dataset=results_dataset,
+                                  layout=layout, release_label=release_label)
+            return
+        if incremental:
+            run_incremental_stats_job(input_path=input_data, jar_path=jar_path, logs_path=logs_path, out_s3=out_s3,
+                                      out_local=out_local, instance_count=instance_count,
+                                      instance_type=instance_type, years=years,
+                                      out_formats=out_format, results_dataset=results_dataset,
+                                      layout=layout, release_label=release_label)
+            return
         run_mapr_job(input_path=input_data, jar_path=jar_path, logs_path=logs_path, out_s3=out_s3, out_local=out_local,
-                     instance_count=instance_count, instance_type=instance_type)
+                     instance_count=instance_count, instance_type=instance_type,
+                     out_formats=out_format, results_dataset=results_dataset,
+                     layout=layout, release_label=release_label, stations=stations)
     elif job_type == "spark":
+        if incremental:
+            raise ValueError("incremental not supported with job-type spark")
+        if shards > 1:
+            raise ValueError("shards not supported with job-type spark")
         if not jar_class:
             raise ValueError("Please provide jar-class for spark job")
         if packages:
             packages = packages.split(",")
         run_spark_job(input_path=input_data, jar_path=jar_path, jar_class=jar_class, logs_path=logs_path,
                       out_s3=out_s3, out_local=out_local, packages=packages,
-                      instance_count=instance_count, instance_type=instance_type)
+                      instance_count=instance_count, instance_type=instance_type,
+                      out_formats=out_format, results_dataset=results_dataset,
+                      conf_overrides=parse_spark_conf(spark_conf), layout=layout,
+                      release_label=release_label, stations=stations)
 
 
 if __name__ == "__main__":
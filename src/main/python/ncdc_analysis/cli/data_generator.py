@@ -0,0 +1,29 @@
+import click
+from ..core.input_selection import parse_years
+
+
+@click.command()
+@click.option("--output", help="the path where year-named folders of station .gz files will be created")
+@click.option("--size", default="100MB",
+              help="Approximate uncompressed size of the data, e.g. 500MB or 200GB. Defaults to 100MB")
+@click.option("--years", default="1940-1949", help="Years of the data, e.g. 1930-1950,1960. Defaults to 1940-1949")
+@click.option("--seed", default=0, help="Seed of the data, same seed and options always give identical files")
+@click.option("--workers", default=1, help="Number of processes generating years in parallel")
+def data_generator(output, size, years, seed, workers):
+    """Generates deterministic synthetic NCDC data in the folder layout of ftp://ftp.ncdc.noaa.gov/pub/data/noaa/,
+    for testing file_combiner, local_runner and EMR jobs at scale without downloading the real data."""
+    if not output:
+        print("""Script to generate synthetic NCDC data, which can be combined with file_combiner.
+        Usage: --output <output_path> [--size <size>] [--years <years>]
+        See --help for parameter description.""")
+        return
+
+    from ..preprocessing.synthetic_data import generate_data, parse_size
+
+    report = generate_data(output, sorted(map(int, parse_years(years))), parse_size(size), seed=seed,
+                           workers=workers)
+    print(report.report())
+
+
+if __name__ == "__main__":
+    data_generator()
@@ -1,19 +1,37 @@
 import click
 from ..core.combine_files import combine_files
+from ..preprocessing.compression import CODECS
+
+MB = 1024 * 1024
 
 
 @click.command()
 @click.option("--input", help="noaa folder which includes year-named folders")
 @click.option("--output", help="the path where new year-named files will be created")
-def combiner(input, output):
+@click.option("--slim-output", default=None,
+              help="optional path where year-named files are also written in the compact slim record format, "
+                   "which keeps only valid temperature records and station, timestamp, temperature and quality fields")
+@click.option("--codec", default="gzip", type=click.Choice(list(CODECS)),
+              help="compression codec of the year-named files, bzip2 files are splittable in Hadoop, "
+                   "zstd and lz4 require optional Python packages zstandard and lz4")
+@click.option("--level", default=None, type=int,
+              help="compression level of the codec, defaults to gzip 9, bzip2 9, zstd 3 and lz4 0")
+@click.option("--sort", is_flag=True,
+              help="sort records of each year by station and timestamp, which compresses better and writes "
+                   "_blocks.csv index of independently compressed blocks for station and date range reads")
+@click.option("--sort-memory", default=256, help="memory budget of the external sort in MB, sorted runs are "
+                                                 "spilled to disk next to the output")
+@click.option("--sort-block-size", default=4, help="uncompressed size of the sorted blocks in MB")
+def combiner(input, output, slim_output, codec, level, sort, sort_memory, sort_block_size):
     """When fetching data with FTP from ftp://ftp.ncdc.noaa.gov/pub/data/noaa/ the data is splitted to small files.
     We reprocess the files for bigger chunks to increase the performance of our analysis-stack."""
     if input and output:
-        combine_files(input, output)
+        combine_files(input, output, slim_output, codec, level, sort_memory=sort_memory * MB if sort else None,
+                      block_bytes=sort_block_size * MB)
     else:
         print(f"""Script to combine small .gz files fetched from ftp://ftp.ncdc.noaa.gov/pub/data/noaa/ 
         for large year-based files. 
-        Usage: --input <input_path> --output <output_path> 
+        Usage: --input <input_path> --output <output_path> [--slim-output <slim_output_path>] [--sort]
         See --help for parameter description.""")
 
 
@@ -0,0 +1,43 @@
+import click
+
+
+@click.command()
+@click.option("--input", help="Folder with combined yearly files, see file_combiner")
+@click.option("--output", help="Path of the result .csv file")
+@click.option("--sample-rate", default=1.0,
+              help="Fraction of records (or blocks) sampled from each year, 1.0 (default) uses all data")
+@click.option("--block-size", default=1,
+              help="Number of consecutive records sampled together, 1 (default) samples individual records")
+@click.option("--seed", default=0, help="Seed of the sample, same seed and rate always give the same sample")
+@click.option("--max-avg-error", type=float,
+              help="Rerun with full data if 95% confidence interval half-width of any yearly average exceeds this. "
+                   "In result units, tenths of degree Celsius")
+@click.option("--max-count-error", type=float,
+              help="Rerun with full data if relative 95% confidence interval half-width of any yearly count "
+                   "exceeds this, e.g. 0.05")
+def local_runner(input, output, sample_rate, block_size, seed, max_avg_error, max_count_error):
+    """Computes yearly temperature statistics locally, optionally from a sample of the data
+    for fast exploratory runs."""
+    if not (input and output):
+        print("""Script to compute yearly temperature statistics locally from files combined with file_combiner.
+        Usage: --input <input_path> --output <output_path> [--sample-rate <rate>]
+        See --help for parameter description.""")
+        return
+
+    from ..core.local_engine import compute_stats, max_errors
+
+    stats = compute_stats(input, sample_rate=sample_rate, seed=seed, block_size=block_size)
+    if sample_rate < 1:
+        errors = max_errors(stats)
+        print(f"Sample max errors: average ±{errors['avg']:.2f}, count ±{errors['count']:.2%}")
+        too_inaccurate = (max_avg_error is not None and errors["avg"] > max_avg_error) or \
+                         (max_count_error is not None and errors["count"] > max_count_error)
+        if too_inaccurate:
+            print("Sample error above threshold, rerunning with full data.")
+            stats = compute_stats(input)
+    stats.to_csv(output)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    local_runner()
@@ -0,0 +1,24 @@
+import click
+from ..preprocessing.sampling import write_sample
+
+
+@click.command()
+@click.option("--input", help="Folder with combined yearly files, see file_combiner")
+@click.option("--output", help="the path where sampled year-named files will be created")
+@click.option("--sample-rate", type=float, help="Fraction of records (or blocks) sampled from each year")
+@click.option("--block-size", default=1,
+              help="Number of consecutive records sampled together, 1 (default) samples individual records")
+@click.option("--seed", default=0, help="Seed of the sample, same seed and rate always give the same sample")
+def sampler(input, output, sample_rate, block_size, seed):
+    """Writes deterministic stratified-by-year sample of the combined yearly files.
+    The sample can be used as smaller input data for exploratory runs, also in EMR."""
+    if input and output and sample_rate:
+        write_sample(input, output, rate=sample_rate, seed=seed, block_size=block_size)
+    else:
+        print(f"""Script to sample combined yearly files for exploratory runs.
+        Usage: --input <input_path> --output <output_path> --sample-rate <rate>
+        See --help for parameter description.""")
+
+
+if __name__ == "__main__":
+    sampler()
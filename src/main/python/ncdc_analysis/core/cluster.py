@@ -1,9 +1,138 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import os
 from ncdc_analysis.aws.s3 import S3Path
-from ncdc_analysis.aws.emr import EMRRunner, EMRConfigBuilder, EMRSparkStep, EMRHadoopStep
-from ncdc_analysis.postprocessing.result_fetchers import EMRResultCsvFetcher
-from typing import Optional, List
+from ncdc_analysis.aws.emr import DEFAULT_RELEASE_LABEL, ClusterLayout, EMRRunner, EMRConfigBuilder, EMRSparkStep, \
+    EMRHadoopStep, release_at_least
+from ncdc_analysis.core.input_selection import YearlyInput, select_inputs, shard_inputs, to_input_arg
+from ncdc_analysis.filesystem import to_path
+from ncdc_analysis.postprocessing.result_fetchers import EMRResultSinkFetcher
+from ncdc_analysis.preprocessing.compression import CODECS, Codec
+from typing import Dict, Optional, List, Sequence, Set, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from ncdc_analysis.postprocessing.incremental_stats import StatsTable
+
+# MapReduce job is the mainClass of the jar, see pom.xml (Issue #5)
+MAPREDUCE_JOB_CLASS = "ncdc_analysis.map_reduce.temperature.TemperatureStatsDriver"
+# Hadoop property of the stations the MapReduce jobs include, see YearTemperatureMapper
+STATIONS_PROPERTY = "ncdc.stations"
+
+
+def build_result_fetcher(out_local: str,
+                         run_timestamp: str,
+                         job_class: str,
+                         out_formats: Sequence[str] = ("csv",),
+                         results_dataset: Optional[str] = None,
+                         col_names: Optional[List[str]] = None,
+                         spark: bool = False) -> EMRResultSinkFetcher:
+    """Result fetcher that writes the results to out_local in given formats (csv, parquet, feather),
+    and appends them to results_dataset if given."""
+    from ncdc_analysis.postprocessing.result_sinks import SINKS, ResultsDatasetSink, RunInfo
+
+    sinks = [SINKS[out_format](out_local) for out_format in out_formats]
+    if results_dataset:
+        sinks.append(ResultsDatasetSink(results_dataset))
+    run = RunInfo(run_timestamp=run_timestamp, job_class=job_class)
+    return EMRResultSinkFetcher(sinks=sinks, run=run, col_names=col_names, spark=spark)
+
+
+def select_input_paths(input_path: str,
+                       years: Optional[Set[str]] = None,
+                       stations: Optional[Set[str]] = None) -> str:
+    """Resolves yearly input files under input_path matching the selected years and stations.
+    Returns the files as comma separated paths, which can be passed to the jobs as input.
+    Stations only drop the yearly files that include none of them, the jobs filter the records of the stations."""
+    inputs = select_inputs(to_path(input_path), years=years, stations=stations)
+    return to_input_arg(inputs)
+
+
+def _hadoop_station_args(stations: Optional[Set[str]]) -> List[str]:
+    """Generic options of the MapReduce jobs to include only the records of the stations, all if None."""
+    return ["-D", f"{STATIONS_PROPERTY}={','.join(sorted(stations))}"] if stations else []
+
+
+def _hadoop_reads(codec: Codec, release_label: str) -> bool:
+    return codec.hadoop_readable and (codec.min_emr_releases is None
+                                      or release_at_least(release_label, codec.min_emr_releases))
+
+
+def _codec_requirement(codec: Codec) -> str:
+    if not codec.hadoop_readable:
+        return "local only"
+    return "requires " + " or ".join(f"{label} or later on {major}.x"
+                                     for major, label in codec.min_emr_releases.items())
+
+
+def check_input_codecs(input_path: str, release_label: str = DEFAULT_RELEASE_LABEL):
+    """Raises ValueError if job input (comma separated files or folders) has files compressed with a codec
+    that Hadoop of the EMR release cannot read, so that the job fails when submitted and not on the cluster.
+    Paths with a codec extension are files, others are listed recursively."""
+    codecs = {codec.extension: codec for codec in CODECS.values()}
+    unreadable: Dict[str, List[str]] = {}
+    for path in map(to_path, input_path.split(",")):
+        files = [path] if os.path.splitext(path.name)[1] in codecs else [file for file, _ in path.scantree()]
+        for file in files:
+            codec = codecs.get(os.path.splitext(file.name)[1])
+            if codec is not None and not _hadoop_reads(codec, release_label):
+                unreadable.setdefault(codec.name, []).append(file.name)
+    if unreadable:
+        raise ValueError(f"Input files are compressed with a codec Hadoop of {release_label} cannot read, "
+                         f"combine them with another codec for EMR: "
+                         + "; ".join(f"{name} ({_codec_requirement(CODECS[name])}): {', '.join(names)}"
+                                     for name, names in unreadable.items()))
+
+
+def input_size(input_path: str) -> Optional[int]:
+    """Size in bytes of the job input, which is comma separated files or folders (of e.g. yearly files).
+    Folders are summed recursively. Returns None if any of the paths does not exist."""
+    size = 0
+    for path in map(to_path, input_path.split(",")):
+        tree_size = sum(stat.size for _, stat in path.scantree())
+        if tree_size:
+            size += tree_size
+            continue
+        try:
+            size += path.stat().size
+        except FileNotFoundError:
+            print(f"Input size is unknown, no files in {path.path}")
+            return None
+    return size
+
+
+def spark_conf(instance_type: str, instance_count: int, input_path: str,
+               overrides: Optional[Dict[str, str]] = None,
+               layout: Optional[ClusterLayout] = None) -> Dict[str, str]:
+    """spark-submit --conf settings derived from the cluster shape and the input size, updated with overrides.
+    Instance types without a tuning profile use the EMR defaults, and executors are sized for the instances only
+    if the input size is unknown.
+    With a layout executors run on core and task nodes. If task nodes are of another type, executors are sized for
+    the node type with less memory per executor, so they fit on every node. Dynamic allocation is kept when the
+    cluster scales or has mixed node types, so that executors are placed on all (new) nodes."""
+    from ncdc_analysis.aws.spark_tuning import INSTANCE_TYPES, derive_tuning
+
+    dynamic_allocation = False
+    if layout is not None:
+        worker_types = {layout.core.instance_type}
+        instance_count = 1 + layout.core.instance_count  # derive_tuning counts the master in instance_count
+        if layout.task is not None:
+            worker_types.add(layout.task.instance_type)
+            instance_count += layout.task.instance_count
+        instance_type = layout.core.instance_type
+        if worker_types <= set(INSTANCE_TYPES):
+            instance_type = min(sorted(worker_types),
+                                key=lambda name: derive_tuning(name, instance_count).executor_memory_mb)
+        dynamic_allocation = layout.scaling is not None or len(worker_types) > 1
+    conf = {}
+    if instance_type in INSTANCE_TYPES:
+        conf = derive_tuning(instance_type, instance_count, input_size(input_path)).to_conf()
+        if dynamic_allocation:
+            del conf["spark.dynamicAllocation.enabled"], conf["spark.executor.instances"]
+    else:
+        print(f"No Spark tuning profile for instance type {instance_type}, using EMR defaults")
+    conf.update(overrides or {})
+    return conf
 
 
 def run_mapr_job(input_path: str,
@@ -13,27 +142,171 @@ def run_mapr_job(input_path: str,
                  out_local: str,
                  instance_count: int,
                  instance_type: str,
-                 val_col_names: Optional[List[str]] = None):
-    """Run MapReduce job in EMR.
-    Waits until the cluster has been terminated and saves the results to LOCAL_OUTPUT_PATH in .csv"""
+                 val_col_names: Optional[List[str]] = None,
+                 out_formats: Sequence[str] = ("csv",),
+                 results_dataset: Optional[str] = None,
+                 layout: Optional[ClusterLayout] = None,
+                 release_label: str = DEFAULT_RELEASE_LABEL,
+                 stations: Optional[Set[str]] = None):
+    """Run MapReduce job in EMR, only for the records of the stations if given.
+    Waits until the cluster has been terminated and saves the results to LOCAL_OUTPUT_PATH in out_formats"""
 
+    check_input_codecs(input_path, release_label)
     run_timestamp: str = datetime.now().isoformat()
     output_path = os.path.join(out_s3, run_timestamp)
 
     emr_config = EMRConfigBuilder(name="MapReduce Job",
                                   instance_count=instance_count,
                                   instance_type=instance_type,
-                                  logs_path=logs_path)
-    step = EMRHadoopStep(jar_path=jar_path, jar_args=[input_path, output_path])
+                                  logs_path=logs_path,
+                                  release_label=release_label,
+                                  layout=layout)
+    step = EMRHadoopStep(jar_path=jar_path, jar_args=[*_hadoop_station_args(stations), input_path, output_path])
     emr_config.add_step(step)
 
-    csv_fetcher = EMRResultCsvFetcher()
-    csv_fetcher.output_path = os.path.join(out_local, f"{run_timestamp}_ncdc_emr_results.csv")
-    csv_fetcher.col_names = val_col_names
+    result_fetcher = build_result_fetcher(out_local=out_local, run_timestamp=run_timestamp,
+                                          job_class=MAPREDUCE_JOB_CLASS, out_formats=out_formats,
+                                          results_dataset=results_dataset, col_names=val_col_names)
 
     runner = EMRRunner(config=emr_config, output_path=S3Path.from_path(output_path),
-                       result_fetcher=csv_fetcher)
+                       result_fetcher=result_fetcher)
     runner.execute()
+    return runner.results
+
+
+def run_incremental_stats_job(input_path: str,
+                              jar_path: str,
+                              logs_path: str,
+                              out_s3: str,
+                              out_local: str,
+                              instance_count: int,
+                              instance_type: str,
+                              years: Optional[Set[str]] = None,
+                              out_formats: Sequence[str] = ("csv",),
+                              results_dataset: Optional[str] = None,
+                              layout: Optional[ClusterLayout] = None,
+                              release_label: str = DEFAULT_RELEASE_LABEL) -> "StatsTable":
+    """Run TemperatureStatsDriver MapReduce job in EMR only for the years that are new or changed since the last run.
+    The results are merged to the stats table in out_local, see ncdc_analysis.postprocessing.incremental_stats"""
+    from ncdc_analysis.postprocessing.incremental_stats import StatsTable, STATS_COLUMNS
+
+    table = StatsTable.load(out_local)
+    inputs = select_inputs(to_path(input_path), years=years)
+    stale_inputs = table.stale_inputs(inputs)
+    if not stale_inputs:
+        print("Statistics table is up to date.")
+        return table
+
+    print(f"Computing statistics for years: {', '.join(i.year for i in stale_inputs)}")
+    partials = run_mapr_job(input_path=to_input_arg(stale_inputs), jar_path=jar_path, logs_path=logs_path,
+                            out_s3=out_s3, out_local=out_local, instance_count=instance_count,
+                            instance_type=instance_type, val_col_names=STATS_COLUMNS,
+                            out_formats=out_formats, results_dataset=results_dataset, layout=layout,
+                            release_label=release_label)
+    replaced_years = table.update(partials, stale_inputs)
+    table.save()
+    if replaced_years:
+        print(f"Replaced recomputed years: {', '.join(replaced_years)}")
+    missing_inputs = table.stale_inputs(stale_inputs)
+    if missing_inputs:
+        print(f"No results for years, they are computed again on the next run: "
+              f"{', '.join(i.year for i in missing_inputs)}")
+    return table
+
+
+def _run_stats_shard(shard: List[YearlyInput],
+                     name: str,
+                     output_path: str,
+                     jar_path: str,
+                     logs_path: str,
+                     instance_count: int,
+                     instance_type: str,
+                     run_timestamp: str,
+                     layout: Optional[ClusterLayout] = None,
+                     release_label: str = DEFAULT_RELEASE_LABEL,
+                     stations: Optional[Set[str]] = None) -> "pd.DataFrame":
+    """Runs TemperatureStatsDriver for one shard in its own cluster, returns the partial statistics."""
+    from ncdc_analysis.postprocessing.incremental_stats import STATS_COLUMNS
+    from ncdc_analysis.postprocessing.result_sinks import RunInfo
+
+    emr_config = EMRConfigBuilder(name=name,
+                                  instance_count=instance_count,
+                                  instance_type=instance_type,
+                                  logs_path=logs_path,
+                                  release_label=release_label,
+                                  layout=layout)
+    emr_config.add_step(EMRHadoopStep(jar_path=jar_path,
+                                      jar_args=[*_hadoop_station_args(stations), to_input_arg(shard), output_path]))
+    # Shard results are only written after the merge
+    result_fetcher = EMRResultSinkFetcher(sinks=[], run=RunInfo(run_timestamp, MAPREDUCE_JOB_CLASS),
+                                          col_names=STATS_COLUMNS)
+    runner = EMRRunner(config=emr_config, output_path=S3Path.from_path(output_path),
+                       result_fetcher=result_fetcher)
+    runner.execute()
+    return runner.results
+
+
+def run_sharded_stats_job(input_path: str,
+                          jar_path: str,
+                          logs_path: str,
+                          out_s3: str,
+                          out_local: str,
+                          instance_count: int,
+                          instance_type: str,
+                          shards: int,
+                          years: Optional[Set[str]] = None,
+                          stations: Optional[Set[str]] = None,
+                          out_formats: Sequence[str] = ("csv",),
+                          results_dataset: Optional[str] = None,
+                          layout: Optional[ClusterLayout] = None,
+                          release_label: str = DEFAULT_RELEASE_LABEL) -> "pd.DataFrame":
+    """Run TemperatureStatsDriver MapReduce job in EMR with scatter/gather:
+    splits the yearly inputs to contiguous year ranges of roughly equal size, runs each range in its own cluster
+    in parallel and merges the partial statistics (min of mins, max of maxes, summed counts, weighted average).
+    Merged results have the same schema as run_mapr_job results and are saved to out_local in out_formats.
+    If any shard fails, the shards that succeeded are reported with their output paths."""
+    from ncdc_analysis.postprocessing.incremental_stats import STATS_COLUMNS, cast_stats, merge_stats
+    from ncdc_analysis.postprocessing.map_reduce_utils import infer_numeric_dtypes
+    import pandas as pd
+
+    run_timestamp: str = datetime.now().isoformat()
+    inputs = select_inputs(to_path(input_path), years=years, stations=stations)
+    check_input_codecs(to_input_arg(inputs), release_label)
+    input_shards = shard_inputs(inputs, shards)
+    print(f"Running {len(input_shards)} shards: "
+          + ", ".join(f"{shard[0].year}-{shard[-1].year}" for shard in input_shards))
+
+    output_paths = [os.path.join(out_s3, run_timestamp, f"shard-{n:03d}") for n in range(len(input_shards))]
+    with ThreadPoolExecutor(max_workers=len(input_shards)) as executor:
+        futures = [executor.submit(_run_stats_shard, shard=shard,
+                                   name=f"MapReduce Job shard {n + 1}/{len(input_shards)}",
+                                   output_path=output_paths[n], jar_path=jar_path, logs_path=logs_path,
+                                   instance_count=instance_count, instance_type=instance_type,
+                                   run_timestamp=run_timestamp, layout=layout, release_label=release_label,
+                                   stations=stations)
+                   for n, shard in enumerate(input_shards)]
+        partials, succeeded, failed = [], [], []
+        for shard, output_path, future in zip(input_shards, output_paths, futures):
+            years_range = f"{shard[0].year}-{shard[-1].year}"
+            try:
+                partials.append(future.result())
+                succeeded.append(f"{years_range} ({output_path})")
+            except Exception as e:
+                print(f"Shard {years_range} failed: {e}")
+                failed.append((years_range, e))
+
+    if failed:
+        raise RuntimeError(f"{len(failed)}/{len(input_shards)} shards failed: "
+                           + ", ".join(years_range for years_range, _ in failed)
+                           + ". Succeeded shards: " + (", ".join(succeeded) or "none")) from failed[0][1]
+
+    # Same index name and dtypes as run_mapr_job results, see clean_mapr_results and infer_numeric_dtypes
+    results = infer_numeric_dtypes(merge_stats(cast_stats(pd.concat(partials))).rename_axis("index"))
+    result_writer = build_result_fetcher(out_local=out_local, run_timestamp=run_timestamp,
+                                         job_class=MAPREDUCE_JOB_CLASS, out_formats=out_formats,
+                                         results_dataset=results_dataset, col_names=STATS_COLUMNS)
+    result_writer.write(results)
+    return results
 
 
 def run_spark_job(input_path: str,
@@ -44,24 +317,37 @@ def run_spark_job(input_path: str,
                   instance_count: int,
                   instance_type: str,
                   jar_class: str,
-                  packages: Optional[List[str]]):
-    """Run Spark job in EMR."""
+                  packages: Optional[List[str]],
+                  out_formats: Sequence[str] = ("csv",),
+                  results_dataset: Optional[str] = None,
+                  conf_overrides: Optional[Dict[str, str]] = None,
+                  layout: Optional[ClusterLayout] = None,
+                  release_label: str = DEFAULT_RELEASE_LABEL,
+                  stations: Optional[Set[str]] = None):
+    """Run Spark job in EMR. Executors are sized for the cluster and input, see spark_conf.
+    Stations are passed to the job as the last argument, comma separated, see MaxTemperatureApp."""
+    check_input_codecs(input_path, release_label)
     run_timestamp: str = datetime.now().isoformat()
     output_path = os.path.join(out_s3, run_timestamp)
 
     emr_config = EMRConfigBuilder(name="Spark Job",
                                   instance_count=instance_count,
                                   instance_type=instance_type,
-                                  logs_path=logs_path)
-    step = EMRSparkStep(jar_path=jar_path, jar_args=[input_path, output_path],
+                                  logs_path=logs_path,
+                                  release_label=release_label,
+                                  layout=layout)
+    conf = spark_conf(instance_type, instance_count, input_path, conf_overrides, layout)
+    jar_args = [input_path, output_path] + ([",".join(sorted(stations))] if stations else [])
+    step = EMRSparkStep(jar_path=jar_path, jar_args=jar_args,
                         jar_class=jar_class,
-                        packages=packages)
+                        packages=packages,
+                        conf=conf)
     emr_config.add_step(step)
 
-    csv_fetcher = EMRResultCsvFetcher()
-    csv_fetcher.output_path = os.path.join(out_local, f"{run_timestamp}_ncdc_emr_results.csv")
-    csv_fetcher.spark = True
+    result_fetcher = build_result_fetcher(out_local=out_local, run_timestamp=run_timestamp, job_class=jar_class,
+                                          out_formats=out_formats, results_dataset=results_dataset, spark=True)
 
     runner = EMRRunner(config=emr_config, output_path=S3Path.from_path(output_path),
-                       result_fetcher=csv_fetcher)
+                       result_fetcher=result_fetcher)
     runner.execute()
+    return runner.results
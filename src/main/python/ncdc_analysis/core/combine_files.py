@@ -1,11 +1,35 @@
 import os
-from typing import List
-from ..preprocessing.combine_files_to_yearly import  get_ncdc_folders, combine_gz_files_to_one, NcdcFolder
+from typing import List, Optional
+from ..preprocessing.combine_files_to_yearly import  get_ncdc_folders, combine_gz_files_to_one, NcdcFolder, \
+    write_station_index, combine_gz_files_sorted
+from ..preprocessing.compression import get_codec
+from ..preprocessing.record_sort import BLOCK_INDEX_FILE, DEFAULT_BLOCK_BYTES, SortedBlock, write_block_index
 
+STATION_INDEX_FILE = "_index.csv"
 
-def combine_files(input_folder, output_folder):
-    """Combines NCDC Weather data from year-named folders including .gz files to one .gz file for each year."""
+
+def combine_files(input_folder, output_folder, slim_output_folder=None, codec: str = "gzip",
+                  level: Optional[int] = None, sort_memory: Optional[int] = None,
+                  block_bytes: int = DEFAULT_BLOCK_BYTES):
+    """Combines NCDC Weather data from year-named folders including .gz files to one file for each year,
+    compressed with the codec (see ncdc_analysis.preprocessing.compression).
+    If sort_memory (bytes) is given, records are sorted by station and timestamp and the block index is written,
+    see ncdc_analysis.preprocessing.record_sort.
+    If slim_output_folder is given, the combined files are also written there in the slim record format."""
+    compression = get_codec(codec)
+    compression.check_level(level)
     folders: List[NcdcFolder] = get_ncdc_folders(input_folder)
+    blocks: List[SortedBlock] = []
     for folder in folders:
         output_file = os.path.join(output_folder, folder.year)
-        combine_gz_files_to_one(folder, output_file)
+        if sort_memory:
+            blocks += combine_gz_files_sorted(folder, output_file, codec, level, sort_memory, block_bytes)
+        else:
+            combine_gz_files_to_one(folder, output_file, codec, level)
+    write_station_index(folders, os.path.join(output_folder, STATION_INDEX_FILE), compression.extension)
+    if sort_memory:
+        write_block_index(sorted(blocks, key=lambda block: block.file), os.path.join(output_folder, BLOCK_INDEX_FILE))
+    if slim_output_folder:
+        from ..preprocessing.slim_records import write_slim
+        report = write_slim(output_folder, slim_output_folder, level)
+        print(report.report())
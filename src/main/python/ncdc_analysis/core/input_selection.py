@@ -0,0 +1,117 @@
+import csv
+from dataclasses import dataclass
+from io import StringIO
+import os
+import re
+from typing import Dict, List, Optional, Set, Union
+
+from ncdc_analysis.aws.s3 import S3Path
+from ncdc_analysis.core.combine_files import STATION_INDEX_FILE
+from ncdc_analysis.filesystem import LocalPath
+
+YEARLY_FILE_PATTERN = re.compile(r"^(?P<year>\d{4})(\.[a-z0-9]+)?$")
+
+
+@dataclass
+class YearlyInput:
+    """One combined yearly input file, see ncdc_analysis.core.combine_files.
+    fingerprint changes whenever the content of the file changes (S3 ETag)."""
+    year: str
+    path: Union[S3Path, LocalPath]
+    fingerprint: str
+    size: int = 0  # bytes, 0 if unknown
+
+
+def year_from_key(key: str) -> str:
+    """Parses the year from yearly file key, e.g. 'data/gz/1990.gz' -> '1990'.
+    Returns empty string if the key is not a yearly file."""
+    match = YEARLY_FILE_PATTERN.match(os.path.basename(key))
+    return match.group("year") if match else ""
+
+
+def list_yearly_inputs(input_path: Union[S3Path, LocalPath]) -> List[YearlyInput]:
+    """Lists yearly input files under input_path (S3 or local folder), sorted by year."""
+    inputs = []
+    for path, stat in input_path.scandir():
+        year = year_from_key(path.name)
+        if year:
+            inputs.append(YearlyInput(year=year, path=path, fingerprint=stat.etag, size=stat.size))
+    return sorted(inputs, key=lambda i: i.year)
+
+
+def parse_years(years: str) -> Set[str]:
+    """Parses year selector, e.g. '1930-1950,1960' -> {'1930', ..., '1950', '1960'}"""
+    selected = set()
+    for part in filter(None, map(str.strip, years.split(","))):
+        start, separator, end = part.partition("-")
+        if not start.isdigit() or (separator and not end.isdigit()):
+            raise ValueError(f"Invalid year selector: {part}")
+        end = end or start
+        if int(end) < int(start):
+            raise ValueError(f"Invalid year range: {part}")
+        selected.update(str(year) for year in range(int(start), int(end) + 1))
+    return selected
+
+
+def parse_stations(stations: str) -> Set[str]:
+    """Parses comma separated station ids, e.g. '010010-99999,010014-99999'"""
+    return set(filter(None, map(str.strip, stations.split(","))))
+
+
+def read_station_index(input_path: Union[S3Path, LocalPath]) -> Optional[Dict[str, Set[str]]]:
+    """Reads the station index written by file_combiner, returns None if input_path has no index.
+    Index maps years to the stations that are included in the yearly file."""
+    try:
+        data = input_path.join(STATION_INDEX_FILE).read_text()
+    except FileNotFoundError:
+        return None
+    index: Dict[str, Set[str]] = {}
+    for row in csv.DictReader(StringIO(data)):
+        index.setdefault(row["year"], set()).add(row["station"])
+    return index
+
+
+def select_inputs(input_path: Union[S3Path, LocalPath], years: Optional[Set[str]] = None,
+                  stations: Optional[Set[str]] = None) -> List[YearlyInput]:
+    """Lists yearly input files under input_path, pruned to the selected years and stations.
+    Station selection prunes the yearly files that do not include any of the stations,
+    it requires the station index written by file_combiner."""
+    inputs = list_yearly_inputs(input_path)
+    if years:
+        inputs = [i for i in inputs if i.year in years]
+    if stations:
+        index = read_station_index(input_path)
+        if index is None:
+            raise ValueError(f"Station selection requires {STATION_INDEX_FILE} in {input_path.path}, "
+                             f"see file_combiner")
+        inputs = [i for i in inputs if index.get(i.year, set()) & stations]
+    if not inputs:
+        raise ValueError(f"No yearly input files matching the selection in following path: {input_path.path}")
+    return inputs
+
+
+def to_input_arg(inputs: List[YearlyInput]) -> str:
+    """Input paths in the comma separated format accepted by the Hadoop and Spark jobs."""
+    return ",".join(i.path.path for i in inputs)
+
+
+def shard_inputs(inputs: List[YearlyInput], shards: int) -> List[List[YearlyInput]]:
+    """Splits inputs to at most shards contiguous year ranges of roughly equal size in bytes,
+    e.g. for running the ranges in separate EMR clusters. A shard is never split inside a year."""
+    if shards < 1:
+        raise ValueError(f"Number of shards should be at least 1, got {shards}")
+    inputs = sorted(inputs, key=lambda i: i.year)
+    # Files of unknown size are weighted as one byte
+    total = sum(max(i.size, 1) for i in inputs)
+    result: List[List[YearlyInput]] = []
+    shard: List[YearlyInput] = []
+    cumulative = 0
+    for i in inputs:
+        shard.append(i)
+        cumulative += max(i.size, 1)
+        if len(result) < shards - 1 and cumulative >= total * (len(result) + 1) / shards:
+            result.append(shard)
+            shard = []
+    if shard:
+        result.append(shard)
+    return result
@@ -0,0 +1,89 @@
+from dataclasses import dataclass
+import math
+from typing import Dict, List, Optional
+import pandas as pd
+
+from ncdc_analysis.core.input_selection import year_from_key
+from ncdc_analysis.parsers.ncdc_record_parser import parse_valid_temperature
+from ncdc_analysis.preprocessing.compression import open_compressed
+from ncdc_analysis.preprocessing.sampling import get_yearly_files, sample_units, year_rng
+
+Z_95 = 1.959964
+
+
+@dataclass
+class YearStats:
+    """Running statistics of one year. Sampled records are grouped to units (blocks of records),
+    unit level sums are kept for the ratio estimator variance of the average."""
+    min: Optional[int] = None
+    max: Optional[int] = None
+    units: int = 0
+    count: int = 0  # sum of unit counts
+    total: int = 0  # sum of unit temperature sums
+    total_sq: float = 0  # sum of squared unit temperature sums
+    count_sq: int = 0  # sum of squared unit counts
+    total_x_count: float = 0  # sum of unit temperature sum * unit count
+
+    def add_unit(self, temperatures: List[int]):
+        self.units += 1
+        if not temperatures:
+            return
+        unit_count, unit_total = len(temperatures), sum(temperatures)
+        unit_min, unit_max = min(temperatures), max(temperatures)
+        self.min = unit_min if self.min is None else min(self.min, unit_min)
+        self.max = unit_max if self.max is None else max(self.max, unit_max)
+        self.count += unit_count
+        self.total += unit_total
+        self.total_sq += unit_total ** 2
+        self.count_sq += unit_count ** 2
+        self.total_x_count += unit_total * unit_count
+
+    def to_dict(self, rate: float, z: float = Z_95) -> Dict:
+        """Estimates of the full data statistics with confidence intervals.
+        min and max are the sample extremes, with sampling they are bounds of the true values."""
+        avg = self.total / self.count
+        finite_population = 1 - rate
+        if self.units > 1:
+            residuals_sq = self.total_sq - 2 * avg * self.total_x_count + avg ** 2 * self.count_sq
+            mean_count = self.count / self.units
+            avg_var = finite_population * residuals_sq / ((self.units - 1) * self.units * mean_count ** 2)
+        else:
+            avg_var = 0.0 if rate == 1 else math.inf
+        count_var = finite_population * self.count_sq / rate ** 2
+        avg_error = z * math.sqrt(max(avg_var, 0.0))
+        count_error = z * math.sqrt(count_var)
+        count = self.count / rate
+        return {"min": self.min, "max": self.max, "avg": avg, "count": int(round(count)),
+                "avg_ci_low": avg - avg_error, "avg_ci_high": avg + avg_error,
+                "count_ci_low": count - count_error, "count_ci_high": count + count_error}
+
+
+def compute_stats(input_folder: str, sample_rate: float = 1.0, seed: int = 0, block_size: int = 1) -> pd.DataFrame:
+    """Computes TemperatureStatsDriver statistics locally from combined yearly files, see file_combiner.
+    With sample_rate < 1, computes the statistics from deterministic sample stratified by year
+    and reports 95% confidence intervals of the averages and counts."""
+    rows = {}
+    for file in get_yearly_files(input_folder):
+        year = year_from_key(file)
+        stats = YearStats()
+        with open_compressed(file, "rt") as f:
+            for unit in sample_units(f, sample_rate, year_rng(seed, year), block_size):
+                parsed = filter(None, map(parse_valid_temperature, unit))
+                stats.add_unit([temperature for _, temperature in parsed])
+        if stats.count:
+            rows[year] = stats.to_dict(sample_rate)
+    df = pd.DataFrame.from_dict(rows, orient="index")
+    df.index.name = "year"
+    return df
+
+
+def max_errors(stats: pd.DataFrame) -> Dict[str, float]:
+    """Largest half-width of average confidence intervals (in result units)
+    and largest relative half-width of count confidence intervals over all years.
+    Errors are infinite if the sample has no rows or any interval is unknown, so that they exceed any threshold."""
+    if stats.empty:
+        return {"avg": math.inf, "count": math.inf}
+    avg_error = ((stats["avg_ci_high"] - stats["avg_ci_low"]) / 2).max(skipna=False)
+    count_error = ((stats["count_ci_high"] - stats["count_ci_low"]) / 2 / stats["count"]).max(skipna=False)
+    return {name: math.inf if math.isnan(error) else float(error)
+            for name, error in [("avg", avg_error), ("count", count_error)]}
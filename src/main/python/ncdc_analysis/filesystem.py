@@ -0,0 +1,123 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from fnmatch import fnmatch
+import io
+import os
+from typing import BinaryIO, Iterator, List, Tuple, Union
+
+
+@dataclass
+class FileStat:
+    size: int
+    # Changes whenever the content changes, S3 ETag or local modification time and size
+    etag: str
+    last_modified: datetime
+
+
+@dataclass
+class LocalPath:
+    """Local directory backend with the same filesystem API as ncdc_analysis.aws.s3.S3Path,
+    so that pipeline stages can be run against local folders in tests and benchmarks."""
+    path: str
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(os.path.normpath(self.path))
+
+    def join(self, key_extension: str):
+        return LocalPath(os.path.join(self.path, key_extension))
+
+    @classmethod
+    def from_path(cls, path: str):
+        return cls(path)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def iterdir(self) -> Iterator["LocalPath"]:
+        """Files and folders directly under the folder, sorted by name. Like S3 keys, files have nothing under them."""
+        if not os.path.isdir(self.path):
+            return
+        for name in sorted(os.listdir(self.path)):
+            yield self.join(name)
+
+    def scandir(self) -> Iterator[Tuple["LocalPath", FileStat]]:
+        """Files directly under the folder with their stats, sorted by name.
+        Like S3 keys, files have nothing under them."""
+        if not os.path.isdir(self.path):
+            return
+        for name in sorted(os.listdir(self.path)):
+            file_path = self.join(name)
+            if os.path.isfile(file_path.path):
+                yield file_path, file_path.stat()
+
+    def scantree(self) -> Iterator[Tuple["LocalPath", FileStat]]:
+        """Files under the folder (recursively) with their stats, sorted by path."""
+        for root, dirs, files in os.walk(self.path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = LocalPath(os.path.join(root, name))
+                yield file_path, file_path.stat()
+
+    def glob(self, pattern: str) -> Iterator["LocalPath"]:
+        """Files under the folder (recursively) whose path relative to the folder matches the pattern."""
+        for root, dirs, files in os.walk(self.path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                if fnmatch(os.path.relpath(file_path, self.path), pattern):
+                    yield LocalPath(file_path)
+
+    def stat(self) -> FileStat:
+        st = os.stat(self.path)
+        return FileStat(size=st.st_size, etag=f"{st.st_mtime_ns}-{st.st_size}",
+                        last_modified=datetime.fromtimestamp(st.st_mtime, tz=timezone.utc))
+
+    def open(self, buffer_size: int = io.DEFAULT_BUFFER_SIZE) -> BinaryIO:
+        return open(self.path, "rb", buffering=buffer_size)
+
+    def read_range(self, start: int, end: int) -> bytes:
+        """Bytes from start (inclusive) to end (exclusive)."""
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            return f.read(end - start)
+
+    def read_bytes(self) -> bytes:
+        with self.open() as f:
+            return f.read()
+
+    def read_text(self, encoding="utf-8") -> str:
+        return self.read_bytes().decode(encoding)
+
+
+def to_path(path: str) -> Union["S3Path", LocalPath]:
+    """S3Path for s3:// paths, LocalPath otherwise."""
+    from ncdc_analysis.aws.s3 import S3Path
+    return S3Path.from_path(path) if path.startswith("s3://") else LocalPath(path)
+
+
+def iter_lines(path: Union["S3Path", LocalPath], encoding="utf-8", buffer_size: int = 256 * 1024) -> Iterator[str]:
+    """Streams lines of a text file without line endings, the file is opened lazily at first read.
+    Buffer is kept small as many files can be streamed at the same time, e.g. in k-way merge."""
+    with io.TextIOWrapper(path.open(buffer_size=buffer_size), encoding=encoding) as f:
+        for line in f:
+            yield line.rstrip("\n")
+
+
+def read_split_lines(path: Union["S3Path", LocalPath], start: int, end: int, encoding="utf-8") -> List[str]:
+    """Lines of an uncompressed text file that belong to split [start, end), with Hadoop's LineRecordReader semantics:
+    a line belongs to the split where it starts, so the split skips its first partial line and reads past end
+    to finish its last line. Splits can be processed independently with ranged reads."""
+    lines = []
+    with path.open() as f:
+        position = start
+        if start > 0:
+            f.seek(start - 1)
+            position = start - 1 + len(f.readline())
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            lines.append(line.decode(encoding))
+    return lines
@@ -0,0 +1,51 @@
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+MISSING_TEMPERATURE = 9999
+# Set of characters, as substring test would accept an empty (truncated) quality flag
+VALID_QUALITY_CODES = frozenset("01459")
+
+# Slim records are projected at preprocessing time, see ncdc_analysis.preprocessing.slim_records.
+# Fixed width layout: station (USAF + WBAN) [0:11], timestamp (yyyyMMddHHmm) [11:23], temperature [23:28], quality [28]
+SLIM_RECORD_LENGTH = 29
+# Raw records have 105 characters at least (control and mandatory data sections)
+MIN_RAW_RECORD_LENGTH = 105
+
+
+@dataclass
+class NcdcRecord:
+    """Python counterpart of ncdc_analysis.parsers.NcdcRecordParser, parses fixed width NCDC records (raw or slim)."""
+    year: str
+    air_temperature: int
+    quality: str
+
+    @classmethod
+    def parse(cls, record: str):
+        if SLIM_RECORD_LENGTH <= len(record) < MIN_RAW_RECORD_LENGTH:
+            return cls(year=record[11:15], air_temperature=int(record[23:28]), quality=record[28:29])
+        return cls(year=record[15:19], air_temperature=int(record[87:92]), quality=record[92:93])
+
+    def is_valid_temperature(self) -> bool:
+        return self.air_temperature != MISSING_TEMPERATURE and self.quality in VALID_QUALITY_CODES
+
+
+def parse_valid_temperature(record: str) -> Optional[Tuple[str, int]]:
+    """Fast path for the local engine, returns (year, air_temperature) or None if the temperature is not valid.
+    Temperatures are int by default where last digit is the first decimal, e.g. 102 -> 10.2C"""
+    if SLIM_RECORD_LENGTH <= len(record) < MIN_RAW_RECORD_LENGTH:
+        # Slim records are filtered at preprocessing time
+        return record[11:15], int(record[23:28])
+    quality = record[92:93]
+    if quality not in VALID_QUALITY_CODES:
+        return None
+    air_temperature = int(record[87:92])
+    if air_temperature == MISSING_TEMPERATURE:
+        return None
+    return record[15:19], air_temperature
+
+
+def to_slim_record(record: str) -> Optional[str]:
+    """Projects raw record to the slim layout, returns None if the temperature is not valid."""
+    if parse_valid_temperature(record) is None:
+        return None
+    return record[4:27] + record[87:93]
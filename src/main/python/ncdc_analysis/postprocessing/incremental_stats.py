@@ -0,0 +1,83 @@
+from dataclasses import dataclass, field
+import os
+from typing import Dict, List
+import pandas as pd
+
+from ncdc_analysis.core.input_selection import YearlyInput
+
+STATS_COLUMNS = ["min", "max", "avg", "count"]
+STATS_DTYPES = {"min": "int64", "max": "int64", "avg": "float64", "count": "int64"}
+STATS_TABLE_FILE = "ncdc_stats.csv"
+STATS_MANIFEST_FILE = "ncdc_stats_manifest.csv"
+
+
+def cast_stats(stats: pd.DataFrame) -> pd.DataFrame:
+    """Casts cleaned TemperatureStatsDriver results (see clean_mapr_results) to numeric types."""
+    stats = stats[STATS_COLUMNS].astype(STATS_DTYPES)
+    stats.index = stats.index.astype(str)
+    stats.index.name = "year"
+    return stats
+
+
+def merge_stats(stats: pd.DataFrame) -> pd.DataFrame:
+    """Merges rows with the same year exactly, as TemperatureStatsReducer.StatsWriteable would:
+    min of mins, max of maxes, sum of counts and count weighted average."""
+    weighted = stats.assign(_total=stats["avg"] * stats["count"])
+    grouped = weighted.groupby(level=0).agg({"min": "min", "max": "max", "_total": "sum", "count": "sum"})
+    grouped["avg"] = grouped["_total"] / grouped["count"]
+    merged = grouped[STATS_COLUMNS].astype(STATS_DTYPES)
+    merged.index.name = "year"
+    return merged
+
+
+@dataclass
+class StatsTable:
+    """Canonical per-year statistics table that is kept up to date between runs.
+    Manifest records the fingerprint of the yearly input each row was computed from,
+    so only new or changed years need to be sent to EMR."""
+    folder: str
+    stats: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=STATS_COLUMNS))
+    manifest: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def table_path(self) -> str:
+        return os.path.join(self.folder, STATS_TABLE_FILE)
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.folder, STATS_MANIFEST_FILE)
+
+    @classmethod
+    def load(cls, folder: str):
+        """Loads the table from folder, returns an empty table if it does not exist yet."""
+        table = cls(folder=folder)
+        if os.path.exists(table.table_path):
+            stats = pd.read_csv(table.table_path, index_col="year", dtype={"year": str})
+            table.stats = cast_stats(stats)
+        if os.path.exists(table.manifest_path):
+            manifest = pd.read_csv(table.manifest_path, dtype=str)
+            table.manifest = dict(zip(manifest["year"], manifest["fingerprint"]))
+        return table
+
+    def save(self):
+        self.stats.sort_index().to_csv(self.table_path)
+        manifest = pd.DataFrame(sorted(self.manifest.items()), columns=["year", "fingerprint"])
+        manifest.to_csv(self.manifest_path, index=False)
+
+    def stale_inputs(self, inputs: List[YearlyInput]) -> List[YearlyInput]:
+        """Returns the inputs that are new or have changed since they were last computed."""
+        return [i for i in inputs if self.manifest.get(i.year) != i.fingerprint]
+
+    def update(self, partials: pd.DataFrame, inputs: List[YearlyInput]) -> List[str]:
+        """Merges partial results computed from inputs to the table.
+        Years of inputs that already exist in the table were recomputed from scratch,
+        so they are replaced instead of merged. Returns the replaced years.
+        Years without partial results keep their rows and fingerprint, so they are still stale on the next run."""
+        partials = merge_stats(cast_stats(partials))
+        computed = [i for i in inputs if i.year in partials.index]
+        replaced = sorted({i.year for i in computed} & set(self.stats.index))
+        kept = self.stats.drop(index=replaced)
+        self.stats = pd.concat([kept, partials]).sort_index() if len(kept) else partials.sort_index()
+        for i in computed:
+            self.manifest[i.year] = i.fingerprint
+        return replaced
@@ -1,13 +1,13 @@
 import pandas as pd
 from toolz.functoolz import pipe
-from typing import List, Optional, Union
+from typing import Iterable, List, Optional, Union
 
 
-def clean_mapr_results(raw_data: Union[str, List[str]], col_names: Optional[List[str]] = None) -> pd.DataFrame:
+def clean_mapr_results(raw_data: Union[str, Iterable[str]], col_names: Optional[List[str]] = None) -> pd.DataFrame:
     """Cleans mapreduce result strings. Also supports comma separated value array.
     Expects raw_data in following format which are by default outputted by MapReduce:
     'key1\tval_a, val_b, val_c\nkey2\tval_d, val_e, val_f'
-    Input can be also List of such input strings"""
+    Input can be also Iterable (e.g. List) of such input strings"""
     def _split_lines(data):
         return data.split("\n")
 
@@ -23,7 +23,7 @@ def clean_mapr_results(raw_data: Union[str, List[str]], col_names: Optional[List
     def _strip_items(data):
         return map(lambda item: list(map(lambda x: x.strip(), item)), data)
 
-    # Flatten List[str] -> str
+    # Flatten Iterable[str] -> str
     if not isinstance(raw_data, str):
         data: str = "\n".join(raw_data)
     else:
@@ -36,3 +36,18 @@ def clean_mapr_results(raw_data: Union[str, List[str]], col_names: Optional[List
     df_col_names = ["index"] + col_names
     df = pd.DataFrame(data=clean_data, columns=df_col_names).set_index("index")
     return df
+
+
+def infer_numeric_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """MapReduce results are cleaned as strings, converts numeric columns and index to numeric dtypes."""
+    def _to_numeric(values):
+        try:
+            return pd.to_numeric(values)
+        except (ValueError, TypeError):
+            return values
+
+    df = df.apply(_to_numeric)
+    index_name = df.index.name
+    df.index = _to_numeric(df.index)
+    df.index.name = index_name
+    return df
@@ -0,0 +1,94 @@
+import heapq
+import os
+import shutil
+import tempfile
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, Union
+
+# Maximum number of parts merged at once. More parts (e.g. Spark's 200 shuffle partitions) are merged in passes
+# through local temporary files, like sorted runs in ncdc_analysis.preprocessing.record_sort, so that open S3 streams
+# stay well below the connection pool of the client (see ncdc_analysis.aws.clients)
+MERGE_FAN_IN = 32
+
+
+def natural_key(key: str) -> Tuple[int, Union[int, str]]:
+    """Sort key that orders numeric keys as numbers, e.g. Spark's int year column."""
+    try:
+        return 0, int(key)
+    except ValueError:
+        return 1, key
+
+
+def mapr_key(line: str) -> str:
+    """MapReduce sorts Text keys by their bytes, which is the same as str order for the ncdc keys."""
+    return line.split("\t", 1)[0]
+
+
+def spark_csv_key(line: str) -> Tuple[int, Union[int, str]]:
+    return natural_key(line.split(",", 1)[0])
+
+
+def _spill_merge(parts: List[Iterable[str]], key: Callable[[str], object], tmp_dir: str) -> str:
+    """Merges parts to a temporary file, returns its path. The parts are exhausted, which closes their streams."""
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=tmp_dir, suffix=".run", delete=False) as f:
+        f.writelines(line + "\n" for line in heapq.merge(*parts, key=key))
+        return f.name
+
+
+def _read_run(path: str) -> Iterator[str]:
+    """Lines of a merged run without line endings, the run is deleted when read."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            yield line.rstrip("\n")
+    os.remove(path)
+
+
+def merge_sorted_parts(parts: Iterable[Iterable[str]], key: Callable[[str], object]) -> Iterator[str]:
+    """Streaming k-way merge of lines of part files that are each sorted by key.
+    At most MERGE_FAN_IN parts are read at the same time: with more parts, batches of parts are first merged
+    to temporary files, which are merged in turn. Only the current line of each read part is kept in memory,
+    so parts should open their streams lazily at first read (see ncdc_analysis.filesystem.iter_lines)."""
+    parts = list(parts)
+    tmp_dir: Optional[str] = None
+    try:
+        while len(parts) > MERGE_FAN_IN:
+            tmp_dir = tmp_dir or tempfile.mkdtemp(prefix="part_merge_")
+            batch, parts = parts[:MERGE_FAN_IN], parts[MERGE_FAN_IN:]
+            parts.append(_read_run(_spill_merge(batch, key, tmp_dir)))
+        yield from heapq.merge(*parts, key=key)
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def merge_mapr_parts(parts: Iterable[Iterable[str]]) -> Iterator[str]:
+    """Merges part-r-* files of MapReduce job to one globally ordered stream of lines."""
+    non_empty_parts = [filter(None, part) for part in parts]
+    return merge_sorted_parts(non_empty_parts, key=mapr_key)
+
+
+def merge_spark_csv_parts(parts: Iterable[Iterable[str]]) -> Iterator[str]:
+    """Merges part-* csv files of Spark job that are sorted within the partitions (sortWithinPartitions).
+    Every non-empty part starts with a header, the header is yielded only once.
+    Headers are checked when the parts are read by the merge, so parts are not opened upfront."""
+    headers: List[str] = []
+
+    def body(part: Iterable[str]) -> Iterator[str]:
+        lines = filter(None, part)
+        part_header = next(lines, None)
+        if part_header is None:
+            return
+        if not headers:
+            headers.append(part_header)
+        elif part_header != headers[0]:
+            raise ValueError(f"Part files have different headers: {headers[0]} != {part_header}")
+        yield from lines
+
+    merged = merge_sorted_parts([body(part) for part in parts], key=spark_csv_key)
+    # The merge has read the first line of every part (of the last pass) when it yields its first line
+    first = next(merged, None)
+    if not headers:
+        return
+    yield headers[0]
+    if first is not None:
+        yield first
+        yield from merged
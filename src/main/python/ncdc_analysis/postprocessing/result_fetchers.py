@@ -1,43 +1,38 @@
 from abc import ABCMeta, abstractmethod
-import boto3
-from typing import List, Optional, Union
-import pandas as pd
+from typing import Iterator, List, Optional, Union, TYPE_CHECKING
 
-from ncdc_analysis.aws.s3 import S3Path, s3_listdir, s3_read_to_mem
-from ..postprocessing.map_reduce_utils import clean_mapr_results
-from ..postprocessing.spark_utils import clean_spark_results
+from ncdc_analysis.aws.s3 import S3Path
+from ncdc_analysis.filesystem import LocalPath, iter_lines
+from ..postprocessing.part_merge import merge_mapr_parts, merge_spark_csv_parts
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from ..postprocessing.result_sinks import ResultSink, RunInfo
 
 
 class EMRResultFetcher(metaclass=ABCMeta):
 
     @staticmethod
-    def _fetch_hadoop_style_results(path: S3Path, col_names: Union[bool, Optional[List[str]]],
-                                    spark: bool = False) -> pd.DataFrame:
-        """Fetches and cleans MapReduce formatted results from given s3-path.
+    def _fetch_hadoop_style_results(path: Union[S3Path, LocalPath], col_names: Union[bool, Optional[List[str]]],
+                                    spark: bool = False) -> "pd.DataFrame":
+        """Fetches and cleans MapReduce formatted results from given s3-path (or local folder).
         col_names behaves as following:
           True == column names in the first row
           None == generates int column names from index 0
           List[str] == Uses these as column names"""
-        session = boto3.Session(profile_name="default")
-        s3 = session.client("s3")
-
-        keys = s3_listdir(s3, path)
-        if not keys:
-            raise ValueError(f"No files in in following S3-path: {path.path}")
-
-        key_names: List[str] = map(lambda d: d["Key"], keys)
-        raw_data: List[str] = []
-        result_prefix: S3Path = path.join("part-")
-        for key_name in key_names:
-            if key_name.startswith(result_prefix.key):
-                key_full_path: S3Path = S3Path(bucket=path.bucket, key=key_name)
-                data = s3_read_to_mem(s3, key_full_path)
-                raw_data.append(data)
+        from ..postprocessing.map_reduce_utils import clean_mapr_results
+        from ..postprocessing.spark_utils import clean_spark_results
+
+        part_paths = list(path.glob("part-*"))
+        if not part_paths:
+            raise ValueError(f"No result files in following path: {path.path}")
+        parts: List[Iterator[str]] = [iter_lines(part_path) for part_path in part_paths]
 
+        # Part files are sorted by key, so k-way merge gives globally ordered results
         if spark:
-            results: pd.DataFrame = clean_spark_results(raw_data)
+            results: "pd.DataFrame" = clean_spark_results(merge_spark_csv_parts(parts))
         else:
-            results: pd.DataFrame = clean_mapr_results(raw_data, col_names=col_names)
+            results: "pd.DataFrame" = clean_mapr_results(merge_mapr_parts(parts), col_names=col_names)
         return results
 
     @abstractmethod
@@ -53,3 +48,31 @@ class EMRResultCsvFetcher(EMRResultFetcher):
     def fetch(self, path: S3Path):
         result_df = self._fetch_hadoop_style_results(path=path, col_names=self.col_names, spark=self.spark)
         result_df.to_csv(self.output_path)
+        return result_df
+
+
+class EMRResultSinkFetcher(EMRResultFetcher):
+    """Writes the results to all given sinks with numeric dtypes preserved,
+    see ncdc_analysis.postprocessing.result_sinks"""
+    sinks: List["ResultSink"]
+    run: "RunInfo"
+    col_names: Optional[List[str]] = None
+    spark: bool = False
+
+    def __init__(self, sinks: List["ResultSink"], run: "RunInfo", col_names=None, spark=False):
+        self.sinks = sinks
+        self.run = run
+        self.col_names = col_names
+        self.spark = spark
+
+    def fetch(self, path: S3Path):
+        from ..postprocessing.map_reduce_utils import infer_numeric_dtypes
+
+        result_df = self._fetch_hadoop_style_results(path=path, col_names=self.col_names, spark=self.spark)
+        result_df = infer_numeric_dtypes(result_df)
+        self.write(result_df)
+        return result_df
+
+    def write(self, result_df: "pd.DataFrame"):
+        for sink in self.sinks:
+            sink.write(result_df, self.run)
@@ -0,0 +1,89 @@
+from abc import ABCMeta, abstractmethod
+from dataclasses import dataclass
+import os
+from typing import Optional
+import pandas as pd
+
+RESULTS_FILE_PREFIX = "ncdc_emr_results"
+
+
+@dataclass
+class RunInfo:
+    """Identifies the EMR run the results are from."""
+    run_timestamp: str
+    job_class: str
+
+
+def to_columnar(df: pd.DataFrame) -> pd.DataFrame:
+    """Columnar formats require string column names and Feather does not store the index,
+    so named index (e.g. MapReduce keys) is moved to a column."""
+    df = df.reset_index() if df.index.name else df.reset_index(drop=True)
+    df.columns = [str(col) for col in df.columns]
+    return df
+
+
+class ResultSink(metaclass=ABCMeta):
+    """Writes fetched results, see EMRResultSinkFetcher."""
+
+    @abstractmethod
+    def write(self, df: pd.DataFrame, run: RunInfo):
+        pass
+
+
+@dataclass
+class CsvSink(ResultSink):
+    folder: str
+
+    def write(self, df: pd.DataFrame, run: RunInfo):
+        df.to_csv(os.path.join(self.folder, f"{run.run_timestamp}_{RESULTS_FILE_PREFIX}.csv"))
+
+
+@dataclass
+class ParquetSink(ResultSink):
+    folder: str
+
+    def write(self, df: pd.DataFrame, run: RunInfo):
+        to_columnar(df).to_parquet(os.path.join(self.folder, f"{run.run_timestamp}_{RESULTS_FILE_PREFIX}.parquet"),
+                                   index=False)
+
+
+@dataclass
+class FeatherSink(ResultSink):
+    folder: str
+
+    def write(self, df: pd.DataFrame, run: RunInfo):
+        to_columnar(df).to_feather(os.path.join(self.folder, f"{run.run_timestamp}_{RESULTS_FILE_PREFIX}.feather"))
+
+
+@dataclass
+class ResultsDatasetSink(ResultSink):
+    """Append-only Parquet dataset of all runs, partitioned by job class and run timestamp:
+    <root>/job_class=<job_class>/run_timestamp=<run_timestamp>/results.parquet
+    Results of all runs can be queried with one scan, see read_results_dataset."""
+    root: str
+
+    def partition_path(self, run: RunInfo) -> str:
+        return os.path.join(self.root, f"job_class={run.job_class}", f"run_timestamp={run.run_timestamp}")
+
+    def write(self, df: pd.DataFrame, run: RunInfo):
+        partition = self.partition_path(run)
+        if os.path.exists(partition):
+            raise ValueError(f"Results of the run already exist in the dataset: {partition}")
+        os.makedirs(partition)
+        to_columnar(df).to_parquet(os.path.join(partition, "results.parquet"), index=False)
+
+
+SINKS = {"csv": CsvSink, "parquet": ParquetSink, "feather": FeatherSink}
+
+
+def read_results_dataset(root: str, job_class: Optional[str] = None) -> pd.DataFrame:
+    """Reads results of all runs from ResultsDatasetSink dataset, partition keys are returned as columns."""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(root, format="parquet", partitioning="hive")
+    # Runs of different jobs can have different columns
+    schema = pa.unify_schemas([fragment.physical_schema for fragment in dataset.get_fragments()] + [dataset.schema])
+    dataset = ds.dataset(root, schema=schema, format="parquet", partitioning="hive")
+    filter_expr = ds.field("job_class") == job_class if job_class else None
+    return dataset.to_table(filter=filter_expr).to_pandas()
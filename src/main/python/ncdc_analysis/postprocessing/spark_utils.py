@@ -1,11 +1,11 @@
 from io import StringIO
-from typing import Union, List
+from typing import Iterable, Union
 import pandas as pd
 
 
-def clean_spark_results(csv_data: Union[str, List[str]]) -> pd.DataFrame:
+def clean_spark_results(csv_data: Union[str, Iterable[str]]) -> pd.DataFrame:
     """Reads spark result csv-data to pandas dataframe."""
-    # Flatten List[str] -> str
+    # Flatten Iterable[str] -> str
     if not isinstance(csv_data, str):
         data: str = "\n".join(csv_data)
     else:
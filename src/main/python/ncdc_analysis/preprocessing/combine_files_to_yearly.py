@@ -1,10 +1,15 @@
+import csv
 from dataclasses import dataclass
 from glob import glob
-import gzip
 import os
-from typing import List
+from typing import Iterator, List, Optional
 import shutil
 import sys
+import tempfile
+
+from ncdc_analysis.preprocessing.compression import CODECS, get_codec
+from ncdc_analysis.preprocessing.record_sort import DEFAULT_BLOCK_BYTES, DEFAULT_SORT_MEMORY, SortedBlock, \
+    external_sort, write_sorted_blocks
 
 
 @dataclass
@@ -34,22 +39,71 @@ def get_gz_files(folder_path: str) -> List[str]:
     return glob(os.path.join(folder_path, "*-19*.gz"))
 
 
-def compress_existing_file(file, delete_old_file=False, new_file_name=None):
-    """Compresses existing file. If no new file name is given, just adds .gz to the end."""
+def get_station_id(gz_file: str) -> str:
+    """NCDC files are named by station and year, e.g. 010010-99999-1990.gz -> 010010-99999"""
+    file_name = get_path_last_item(gz_file)
+    return file_name.rsplit("-", 1)[0]
+
+
+def write_station_index(folders: List[NcdcFolder], index_file: str, extension: str = ".gz"):
+    """Writes csv index of the stations that are included in each combined yearly file.
+    Index is used by cluster_runner to prune input files with --stations."""
+    with open(index_file, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["year", "station", "file"])
+        for folder in sorted(folders, key=lambda folder: folder.year):
+            stations = sorted(set(map(get_station_id, get_gz_files(folder.path))))
+            for station in stations:
+                writer.writerow([folder.year, station, f"{folder.year}{extension}"])
+
+
+def compress_existing_file(file, delete_old_file=False, new_file_name=None, codec: str = "gzip",
+                           level: Optional[int] = None):
+    """Compresses existing file. If no new file name is given, just adds codec extension (e.g. .gz) to the end."""
+    compression = get_codec(codec)
     if not new_file_name:
-        new_file_name = file + ".gz"
+        new_file_name = file + compression.extension
     with open(file, "rb") as f_in:
-        with gzip.open(new_file_name, 'wb') as f_out:
+        with compression.open(new_file_name, 'wb', level) as f_out:
             shutil.copyfileobj(f_in, f_out)
     if delete_old_file:
         os.remove(file)
 
 
-def combine_gz_files_to_one(folder, output_file):
-    """Finds all .gz files in a given folder, combines the data of the files and compresses the data again."""
+def combine_gz_files_to_one(folder, output_file, codec: str = "gzip", level: Optional[int] = None) -> str:
+    """Finds all .gz files in a given folder, combines the data of the files and compresses the data again
+    with the codec. Data is streamed to the output file without uncompressed intermediate file.
+    Returns the path of the combined file, which is output_file with the codec extension."""
+    compression = get_codec(codec)
+    # Station files are small, so they are read and inflated in one call with the fastest installed gzip backend
+    gzip_reader = CODECS["gzip"]
+    compressed_file = output_file + compression.extension
     gz_files = get_gz_files(folder.path)
-    with open(output_file, "wb+") as outfile:
+    with compression.open(compressed_file, "wb", level) as outfile:
         for file in gz_files:
-            with gzip.open(file, "rb") as infile:
-                outfile.write(infile.read())
-    compress_existing_file(output_file, delete_old_file=True)
+            with open(file, "rb") as infile:
+                outfile.write(gzip_reader.decompress(infile.read()))
+    return compressed_file
+
+
+def read_station_records(gz_files: List[str]) -> Iterator[bytes]:
+    """Newline terminated records of the station files, the last line of a file may lack the newline."""
+    gzip_reader = CODECS["gzip"]
+    for file in gz_files:
+        with open(file, "rb") as infile:
+            for record in gzip_reader.decompress(infile.read()).splitlines(keepends=True):
+                yield record if record.endswith(b"\n") else record + b"\n"
+
+
+def combine_gz_files_sorted(folder, output_file, codec: str = "gzip", level: Optional[int] = None,
+                            sort_memory: int = DEFAULT_SORT_MEMORY,
+                            block_bytes: int = DEFAULT_BLOCK_BYTES) -> List[SortedBlock]:
+    """Like combine_gz_files_to_one, but records are sorted by station and timestamp with external merge sort
+    of bounded memory. Similar adjacent records compress better and the file is written as independently
+    compressed blocks, whose key ranges are returned for the block index (see record_sort)."""
+    compression = get_codec(codec)
+    compressed_file = output_file + compression.extension
+    # Runs are spilled next to the output, as system temp may be too small for a year of records
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(compressed_file) or ".") as tmp_dir:
+        records = external_sort(read_station_records(get_gz_files(folder.path)), tmp_dir, sort_memory)
+        return write_sorted_blocks(records, compressed_file, compression, level, block_bytes)
@@ -0,0 +1,205 @@
+from abc import ABCMeta, abstractmethod
+import importlib
+import importlib.util
+import io
+import os
+from typing import Dict, IO, List, Optional
+
+# Gzip implementations in order of preference, all are drop-in replacements of stdlib gzip (open and decompress).
+# ISA-L and zlib-ng inflate several times faster than zlib, stdlib gzip is the fallback.
+GZIP_BACKENDS = {"isal": "isal.igzip", "zlib_ng": "zlib_ng.gzip_ng", "gzip": "gzip"}
+
+
+def _is_installed(module: str) -> bool:
+    try:
+        return importlib.util.find_spec(module) is not None
+    except ModuleNotFoundError:  # parent package is not installed
+        return False
+
+
+def available_gzip_backends() -> List[str]:
+    return [name for name, module in GZIP_BACKENDS.items() if _is_installed(module)]
+
+
+class Codec(metaclass=ABCMeta):
+    """Compression codec of the combined yearly files. Extensions are the ones Hadoop's CompressionCodecFactory
+    uses to pick the codec for input files, so the files can be used as EMR input as is.
+    Codecs that Hadoop cannot read use an extension Hadoop does not claim and are for local processing only."""
+    name: str
+    extension: str
+    # Python module that implements the codec. zstandard and lz4 are optional extras (listed in py_environment.yml),
+    # is_available checks that the module is installed
+    module: str
+    min_level: int
+    max_level: int
+    default_level: int
+    # Hadoop can split the files to many map tasks
+    splittable: bool = False
+    # Hadoop reads the files, i.e. they can be used as EMR input
+    hadoop_readable: bool = True
+    # First EMR release of each major version whose Hadoop has the codec, all releases if None
+    min_emr_releases: Optional[Dict[int, str]] = None
+
+    def is_available(self) -> bool:
+        return _is_installed(self.module)
+
+    def check_level(self, level: Optional[int]) -> int:
+        if level is None:
+            return self.default_level
+        if not self.min_level <= level <= self.max_level:
+            raise ValueError(f"{self.name} level should be in range [{self.min_level}, {self.max_level}], got {level}")
+        return level
+
+    def open(self, file, mode: str = "rb", level: Optional[int] = None, **kwargs) -> IO:
+        """Opens path or file object like gzip.open, level is used only when writing."""
+        if not self.is_available():
+            raise ValueError(f"Codec {self.name} requires Python package {self.module}, which is not installed")
+        return self._open(file, mode, self.check_level(level), **kwargs)
+
+    def decompress(self, data: bytes) -> bytes:
+        """Decompresses whole file in one call, which has less overhead than streaming for small files."""
+        with self.open(io.BytesIO(data), "rb") as f:
+            return f.read()
+
+    def compress(self, data: bytes, level: Optional[int] = None) -> bytes:
+        """Compresses data to one standalone gzip member (or bzip2 stream, zstd or lz4 frame).
+        Concatenated members are a valid file, which is how sorted blocks are written, see record_sort."""
+        if not self.is_available():
+            raise ValueError(f"Codec {self.name} requires Python package {self.module}, which is not installed")
+        return self._compress(data, self.check_level(level))
+
+    @abstractmethod
+    def _open(self, file, mode: str, level: int, **kwargs) -> IO:
+        pass
+
+    @abstractmethod
+    def _compress(self, data: bytes, level: int) -> bytes:
+        pass
+
+
+class GzipCodec(Codec):
+    """Reads with the fastest installed backend of GZIP_BACKENDS, unless backend is given.
+    Writing always uses stdlib gzip, so the written files do not depend on the installed backends."""
+    name = "gzip"
+    extension = ".gz"
+    module = "gzip"
+    min_level, max_level, default_level = 1, 9, 9
+
+    def __init__(self, backend: Optional[str] = None):
+        if backend is not None and backend not in GZIP_BACKENDS:
+            raise ValueError(f"Unknown gzip backend {backend}, should be one of: {', '.join(GZIP_BACKENDS)}")
+        self._backend = backend
+
+    @property
+    def backend(self) -> str:
+        # Resolved lazily to keep imports light, see benchmarks.startup
+        if self._backend is None:
+            self._backend = available_gzip_backends()[0]
+        return self._backend
+
+    def _reader(self):
+        if not _is_installed(GZIP_BACKENDS[self.backend]):
+            raise ValueError(f"Gzip backend {self.backend} is not installed")
+        return importlib.import_module(GZIP_BACKENDS[self.backend])
+
+    def _open(self, file, mode, level, **kwargs):
+        if "r" in mode:
+            return self._reader().open(file, mode, **kwargs)
+        import gzip
+        return gzip.open(file, mode, compresslevel=level, **kwargs)
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._reader().decompress(data)
+
+    def _compress(self, data, level):
+        import gzip
+        # gzip.compress has no mtime before Python 3.8, zero mtime keeps the blocks deterministic
+        buffer = io.BytesIO()
+        with gzip.GzipFile(fileobj=buffer, mode="wb", compresslevel=level, mtime=0) as f:
+            f.write(data)
+        return buffer.getvalue()
+
+
+class Bzip2Codec(Codec):
+    name = "bzip2"
+    extension = ".bz2"
+    module = "bz2"
+    min_level, max_level, default_level = 1, 9, 9
+    splittable = True
+
+    def _open(self, file, mode, level, **kwargs):
+        import bz2
+        return bz2.open(file, mode, compresslevel=level, **kwargs)
+
+    def _compress(self, data, level):
+        import bz2
+        return bz2.compress(data, compresslevel=level)
+
+
+class ZstdCodec(Codec):
+    """Hadoop's ZStandardCodec arrived in Hadoop 2.9, so EMR reads the files from emr-5.30.0 (Hadoop 2.10)
+    and all 6.x releases, not with the default emr-5.23.0 (Hadoop 2.8.5)."""
+    name = "zstd"
+    extension = ".zst"
+    module = "zstandard"
+    min_emr_releases = {5: "emr-5.30.0", 6: "emr-6.0.0"}
+    min_level, max_level, default_level = 1, 22, 3
+
+    def _open(self, file, mode, level, **kwargs):
+        import zstandard
+        if "r" not in mode:
+            return zstandard.open(file, mode, cctx=zstandard.ZstdCompressor(level=level), **kwargs)
+        # zstandard.open stops at the end of the first frame, files of many frames are read to the end like zstd CLI
+        own_file = isinstance(file, (str, bytes, os.PathLike))
+        source = open(file, "rb") if own_file else file
+        reader = zstandard.ZstdDecompressor().stream_reader(source, read_across_frames=True, closefd=own_file)
+        return io.TextIOWrapper(reader, **kwargs) if "t" in mode else reader
+
+    def _compress(self, data, level):
+        import zstandard
+        return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+class Lz4Codec(Codec):
+    """LZ4 frame format. Hadoop's Lz4Codec claims .lz4 but uses its own block format,
+    so the files have extension .lz4f and are for fast local processing (local_runner, sampler) only."""
+    name = "lz4"
+    extension = ".lz4f"
+    module = "lz4"
+    hadoop_readable = False
+    min_level, max_level, default_level = 0, 16, 0
+
+    def _open(self, file, mode, level, **kwargs):
+        import lz4.frame
+        return lz4.frame.open(file, mode, compression_level=level, **kwargs)
+
+    def _compress(self, data, level):
+        import lz4.frame
+        return lz4.frame.compress(data, compression_level=level)
+
+
+CODECS = {codec.name: codec for codec in [GzipCodec(), Bzip2Codec(), ZstdCodec(), Lz4Codec()]}
+
+
+def available_codecs() -> List[str]:
+    return [name for name, codec in CODECS.items() if codec.is_available()]
+
+
+def get_codec(name: str) -> Codec:
+    if name not in CODECS:
+        raise ValueError(f"Unknown codec {name}, should be one of: {', '.join(CODECS)}")
+    return CODECS[name]
+
+
+def codec_for_path(path: str) -> Codec:
+    """Codec of the file by its extension, like Hadoop's CompressionCodecFactory."""
+    extension = os.path.splitext(path)[1]
+    for codec in CODECS.values():
+        if codec.extension == extension:
+            return codec
+    raise ValueError(f"Unknown compression extension of file: {path}")
+
+
+def open_compressed(path: str, mode: str = "rb", level: Optional[int] = None, **kwargs) -> IO:
+    """Opens compressed file with the codec matching its extension."""
+    return codec_for_path(path).open(path, mode, level, **kwargs)
@@ -0,0 +1,179 @@
+import csv
+from dataclasses import asdict, dataclass, fields
+import heapq
+import os
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from ncdc_analysis.preprocessing.compression import Codec, codec_for_path
+
+BLOCK_INDEX_FILE = "_blocks.csv"
+DEFAULT_SORT_MEMORY = 256 * 1024 * 1024
+DEFAULT_BLOCK_BYTES = 4 * 1024 * 1024  # uncompressed
+# Python bytes object header and list slot of a buffered record, so that memory budget is close to the real usage
+RECORD_OVERHEAD = 33 + 8
+# Maximum number of runs merged at once, more runs are merged in several passes to bound open files
+MERGE_FAN_IN = 64
+
+
+def record_key(record: bytes) -> bytes:
+    """Station (USAF + WBAN) and timestamp (yyyyMMddHHmm) of raw record, adjacent in the fixed width layout."""
+    return record[4:27]
+
+
+def _spill(records: List[bytes], tmp_dir: str) -> str:
+    records.sort(key=record_key)
+    with tempfile.NamedTemporaryFile("wb", dir=tmp_dir, suffix=".run", delete=False) as f:
+        f.writelines(records)
+        return f.name
+
+
+def _merge(runs: List[str], tmp_dir: str) -> str:
+    files = [open(run, "rb") for run in runs]
+    try:
+        with tempfile.NamedTemporaryFile("wb", dir=tmp_dir, suffix=".run", delete=False) as f:
+            f.writelines(heapq.merge(*files, key=record_key))
+            merged = f.name
+    finally:
+        for file in files:
+            file.close()
+    for run in runs:
+        os.remove(run)
+    return merged
+
+
+def external_sort(records: Iterable[bytes], tmp_dir: str, memory_bytes: int = DEFAULT_SORT_MEMORY) -> Iterator[bytes]:
+    """Sorts newline terminated raw records by station and timestamp (see record_key) in bounded memory.
+    Records are buffered up to memory_bytes, then sorted and spilled to tmp_dir as uncompressed runs,
+    which are merged lazily while iterating. Runs are deleted when the iterator is exhausted or closed."""
+    runs: List[str] = []
+    buffer: List[bytes] = []
+    buffered = 0
+    try:
+        for record in records:
+            buffer.append(record)
+            buffered += len(record) + RECORD_OVERHEAD
+            if buffered >= memory_bytes:
+                runs.append(_spill(buffer, tmp_dir))
+                buffer, buffered = [], 0
+        if not runs:
+            # Fits to memory, no disk round trip
+            buffer.sort(key=record_key)
+            yield from buffer
+            return
+        if buffer:
+            runs.append(_spill(buffer, tmp_dir))
+        buffer = []
+        while len(runs) > MERGE_FAN_IN:
+            runs = [_merge(runs[:MERGE_FAN_IN], tmp_dir)] + runs[MERGE_FAN_IN:]
+        files = [open(run, "rb") for run in runs]
+        try:
+            yield from heapq.merge(*files, key=record_key)
+        finally:
+            for file in files:
+                file.close()
+    finally:
+        for run in runs:
+            if os.path.exists(run):
+                os.remove(run)
+
+
+@dataclass
+class SortedBlock:
+    """Independently compressed block of a sorted yearly file. Keys are station + timestamp, see record_key."""
+    file: str
+    block: int
+    offset: int  # compressed bytes
+    length: int  # compressed bytes
+    records: int
+    first_key: str
+    last_key: str
+    min_timestamp: str
+    max_timestamp: str
+
+    def overlaps(self, stations: Optional[Set[str]] = None, start: Optional[str] = None,
+                 end: Optional[str] = None) -> bool:
+        """True if the block may contain records of the stations (any station if None) between start and end.
+        Stations are like in the station index, e.g. 010010-99999, timestamps are yyyyMMddHHmm or a prefix of it,
+        e.g. 19900601, and both ends are inclusive."""
+        start = (start or "").ljust(12, "0")
+        end = (end or "").ljust(12, "9")
+        if not stations:
+            return self.min_timestamp <= end and self.max_timestamp >= start
+        for station in stations:
+            station = station.replace("-", "")
+            if self.first_key <= station + end and self.last_key >= station + start:
+                return True
+        return False
+
+
+def write_sorted_blocks(records: Iterable[bytes], output_file: str, codec: Codec, level: Optional[int] = None,
+                        block_bytes: int = DEFAULT_BLOCK_BYTES) -> List[SortedBlock]:
+    """Writes sorted records to output_file as concatenated blocks of about block_bytes uncompressed data.
+    Each block is a standalone gzip member (or bzip2 stream, zstd or lz4 frame), so the file reads as one stream,
+    and a block can be read alone by seeking to its offset."""
+    blocks: List[SortedBlock] = []
+    name = os.path.basename(output_file)
+    with open(output_file, "wb") as f:
+        def flush(block: List[bytes]):
+            data = codec.compress(b"".join(block), level)
+            timestamps = [record[15:27] for record in block]
+            blocks.append(SortedBlock(file=name, block=len(blocks), offset=f.tell(), length=len(data),
+                                      records=len(block), first_key=record_key(block[0]).decode("ascii"),
+                                      last_key=record_key(block[-1]).decode("ascii"),
+                                      min_timestamp=min(timestamps).decode("ascii"),
+                                      max_timestamp=max(timestamps).decode("ascii")))
+            f.write(data)
+
+        block, size = [], 0
+        for record in records:
+            block.append(record)
+            size += len(record)
+            if size >= block_bytes:
+                flush(block)
+                block, size = [], 0
+        if block:
+            flush(block)
+    return blocks
+
+
+def write_block_index(blocks: Iterable[SortedBlock], index_file: str):
+    with open(index_file, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=[field.name for field in fields(SortedBlock)])
+        writer.writeheader()
+        writer.writerows(asdict(block) for block in blocks)
+
+
+def read_block_index(folder: str) -> Optional[Dict[str, List[SortedBlock]]]:
+    """Blocks of sorted yearly files by file name, returns None if the files were not sorted when combining."""
+    index_file = os.path.join(folder, BLOCK_INDEX_FILE)
+    if not os.path.exists(index_file):
+        return None
+    index: Dict[str, List[SortedBlock]] = {}
+    with open(index_file, newline="") as f:
+        for row in csv.DictReader(f):
+            block = SortedBlock(**{**row, **{key: int(row[key]) for key in ["block", "offset", "length", "records"]}})
+            index.setdefault(block.file, []).append(block)
+    return index
+
+
+def read_blocks(path: str, blocks: Iterable[SortedBlock]) -> Iterator[bytes]:
+    """Records of the given blocks of a sorted yearly file, other blocks are not read."""
+    codec = codec_for_path(path)
+    with open(path, "rb") as f:
+        for block in blocks:
+            f.seek(block.offset)
+            yield from codec.decompress(f.read(block.length)).splitlines(keepends=True)
+
+
+def read_range(folder: str, stations: Optional[Set[str]] = None, start: Optional[str] = None,
+               end: Optional[str] = None) -> Iterator[bytes]:
+    """Records of the sorted yearly files of folder in the blocks that overlap the stations and time range.
+    Blocks may include records outside the range, so the caller filters the records exactly."""
+    index = read_block_index(folder)
+    if index is None:
+        raise ValueError(f"Range reads require {BLOCK_INDEX_FILE} in {folder}, combine files with --sort")
+    for file, blocks in sorted(index.items()):
+        selected = [block for block in blocks if block.overlaps(stations, start, end)]
+        if selected:
+            yield from read_blocks(os.path.join(folder, file), selected)
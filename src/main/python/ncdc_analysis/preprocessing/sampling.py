@@ -0,0 +1,46 @@
+from glob import glob
+from itertools import islice
+import os
+import random
+from typing import Iterable, Iterator, List
+
+from ncdc_analysis.core.input_selection import year_from_key
+from ncdc_analysis.preprocessing.compression import codec_for_path
+
+
+def get_yearly_files(folder: str) -> List[str]:
+    """Combined yearly files written by file_combiner, sorted by year."""
+    files = [f for f in glob(os.path.join(folder, "*")) if year_from_key(f)]
+    return sorted(files, key=year_from_key)
+
+
+def year_rng(seed: int, year: str) -> random.Random:
+    """Each year is its own stratum with its own random state,
+    so the sample of a year does not depend on the other years in the input."""
+    return random.Random(f"{seed}:{year}")
+
+
+def sample_units(lines: Iterable[str], rate: float, rng: random.Random, block_size: int = 1) -> Iterator[List[str]]:
+    """Deterministic Bernoulli sample of blocks of block_size consecutive lines.
+    block_size 1 samples individual records."""
+    if not 0 < rate <= 1:
+        raise ValueError(f"Sample rate should be in range (0, 1], got {rate}")
+    lines = iter(lines)
+    while True:
+        unit = list(islice(lines, block_size))
+        if not unit:
+            return
+        if rate == 1 or rng.random() < rate:
+            yield unit
+
+
+def write_sample(input_folder: str, output_folder: str, rate: float, seed: int = 0, block_size: int = 1):
+    """Writes stratified-by-year sample of the combined yearly files in input_folder to output_folder.
+    Sample uses the same yearly file layout, so it can be uploaded and used as input for EMR jobs."""
+    for file in get_yearly_files(input_folder):
+        year = year_from_key(file)
+        codec = codec_for_path(file)
+        with codec.open(file, "rt") as infile, \
+                codec.open(os.path.join(output_folder, f"{year}{codec.extension}"), "wt") as outfile:
+            for unit in sample_units(infile, rate, year_rng(seed, year), block_size):
+                outfile.writelines(unit)
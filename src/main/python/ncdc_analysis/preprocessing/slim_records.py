@@ -0,0 +1,89 @@
+from dataclasses import dataclass, field
+import os
+import shutil
+from typing import Iterable, Iterator, List, Optional
+
+from ncdc_analysis.core.combine_files import STATION_INDEX_FILE
+from ncdc_analysis.core.input_selection import year_from_key
+from ncdc_analysis.parsers.ncdc_record_parser import to_slim_record
+from ncdc_analysis.preprocessing.compression import codec_for_path
+from ncdc_analysis.preprocessing.sampling import get_yearly_files
+
+
+@dataclass
+class SlimYearReport:
+    year: str
+    records: int = 0
+    slim_records: int = 0
+    raw_bytes: int = 0  # uncompressed
+    slim_bytes: int = 0  # uncompressed
+    raw_file_bytes: int = 0  # compressed
+    slim_file_bytes: int = 0  # compressed
+
+
+@dataclass
+class SlimReport:
+    years: List[SlimYearReport] = field(default_factory=list)
+
+    @property
+    def raw_bytes(self) -> int:
+        return sum(year.raw_bytes for year in self.years)
+
+    @property
+    def slim_bytes(self) -> int:
+        return sum(year.slim_bytes for year in self.years)
+
+    @property
+    def raw_file_bytes(self) -> int:
+        return sum(year.raw_file_bytes for year in self.years)
+
+    @property
+    def slim_file_bytes(self) -> int:
+        return sum(year.slim_file_bytes for year in self.years)
+
+    def report(self) -> str:
+        records = sum(year.records for year in self.years)
+        slim_records = sum(year.slim_records for year in self.years)
+        return "\n".join([
+            f"Slim records: {slim_records} of {records} records have valid temperature",
+            f"Uncompressed: {self.raw_bytes} -> {self.slim_bytes} bytes ({_ratio(self.raw_bytes, self.slim_bytes)})",
+            f"Compressed: {self.raw_file_bytes} -> {self.slim_file_bytes} bytes "
+            f"({_ratio(self.raw_file_bytes, self.slim_file_bytes)})"])
+
+
+def _ratio(raw: int, slim: int) -> str:
+    return f"{raw / slim:.1f}x smaller" if slim else "no data"
+
+
+def slim_lines(lines: Iterable[str], year_report: SlimYearReport) -> Iterator[str]:
+    """Projects raw lines to slim lines, invalid temperatures are dropped. Sizes are counted to year_report."""
+    for line in lines:
+        year_report.records += 1
+        year_report.raw_bytes += len(line)
+        slim = to_slim_record(line)
+        if slim is not None:
+            year_report.slim_records += 1
+            year_report.slim_bytes += len(slim) + 1
+            yield slim + "\n"
+
+
+def write_slim(input_folder: str, output_folder: str, level: Optional[int] = None) -> SlimReport:
+    """Writes combined yearly files of input_folder in the slim record format to output_folder.
+    Slim files use the same yearly file layout, codec (and station index), so they can be used as input for EMR jobs."""
+    report = SlimReport()
+    for file in get_yearly_files(input_folder):
+        codec = codec_for_path(file)
+        year_report = SlimYearReport(year=year_from_key(file))
+        output_file = os.path.join(output_folder, f"{year_report.year}{codec.extension}")
+        # NCDC records are ASCII, so str lengths are byte sizes
+        with codec.open(file, "rt", encoding="ascii") as infile, \
+                codec.open(output_file, "wt", level, encoding="ascii") as outfile:
+            outfile.writelines(slim_lines(infile, year_report))
+        year_report.raw_file_bytes = os.path.getsize(file)
+        year_report.slim_file_bytes = os.path.getsize(output_file)
+        report.years.append(year_report)
+
+    index_file = os.path.join(input_folder, STATION_INDEX_FILE)
+    if os.path.exists(index_file):
+        shutil.copyfile(index_file, os.path.join(output_folder, STATION_INDEX_FILE))
+    return report
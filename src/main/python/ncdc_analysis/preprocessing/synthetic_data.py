@@ -0,0 +1,176 @@
+from bisect import bisect
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+import gzip
+import math
+import os
+import random
+import re
+from itertools import accumulate
+from typing import Iterator, List, Sequence
+
+from ncdc_analysis.parsers.ncdc_record_parser import MISSING_TEMPERATURE
+
+SIZE_PATTERN = re.compile(r"^(?P<number>\d+(\.\d+)?)\s*(?P<unit>[KMGT]?B)?$", re.IGNORECASE)
+SIZE_UNITS = {"B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3, "TB": 1024 ** 4}
+
+# Quality codes of air temperature observations and their rates, 2, 3, 6 and 7 are not valid (see VALID_QUALITY_CODES)
+QUALITY_CODES = ["1", "5", "0", "4", "2", "3", "6", "7"]
+QUALITY_WEIGHTS = [0.9, 0.07, 0.01, 0.01, 0.004, 0.003, 0.002, 0.001]
+_QUALITY_CUMULATIVE = list(accumulate(QUALITY_WEIGHTS))
+MISSING_RATE = 0.03
+# Observations per station and year are log-normally distributed: most stations report every 3 hours
+# (~2900 records), few report hourly or more often and many only a few times a day
+RECORDS_MU = math.log(2000)
+RECORDS_SIGMA = 1.0
+MIN_RECORDS, MAX_RECORDS = 10, 24 * 366 * 2
+# Mandatory data section (105 characters) and additional data section with MA1 (pressure) element
+RECORD_BYTES = 105 + 18 + 1
+
+
+@dataclass(frozen=True)
+class Station:
+    usaf: str
+    wban: str
+    latitude: int  # thousandths of degree
+    longitude: int  # thousandths of degree
+    elevation: int  # meters
+    records_per_year: int
+
+    @property
+    def station_id(self) -> str:
+        return f"{self.usaf}-{self.wban}"
+
+    @property
+    def mean_temperature(self) -> float:
+        """Yearly mean in tenths of degree Celsius, colder towards poles and with elevation."""
+        return 270 - 0.075 * (self.latitude / 1000) ** 2 - self.elevation * 0.065
+
+    @property
+    def seasonal_amplitude(self) -> float:
+        return 10 + 2.5 * abs(self.latitude / 1000)
+
+
+@dataclass
+class GenerationReport:
+    files: int = 0
+    records: int = 0
+    bytes: int = 0  # uncompressed
+    years: List[str] = field(default_factory=list)
+
+    def add(self, other: "GenerationReport"):
+        self.files += other.files
+        self.records += other.records
+        self.bytes += other.bytes
+        self.years += other.years
+
+    def report(self) -> str:
+        return f"Generated {self.records} records to {self.files} station files of {len(self.years)} years, " \
+               f"{self.bytes / SIZE_UNITS['MB']:.1f} MB uncompressed"
+
+
+def parse_size(size: str) -> int:
+    """Parses size in bytes, e.g. '500MB' -> 524288000, '1.5GB', '1024'"""
+    match = SIZE_PATTERN.match(size.strip())
+    if not match:
+        raise ValueError(f"Invalid size: {size}")
+    return int(float(match.group("number")) * SIZE_UNITS[(match.group("unit") or "B").upper()])
+
+
+def station(seed: int, n: int) -> Station:
+    """n:th station of the seeded station pool, stations do not depend on each other."""
+    rng = random.Random(f"{seed}:station:{n}")
+    records = int(rng.lognormvariate(RECORDS_MU, RECORDS_SIGMA))
+    return Station(usaf=f"{10000 + n:06d}", wban="99999",
+                   latitude=int(math.degrees(math.asin(rng.uniform(-0.97, 0.99))) * 1000),
+                   longitude=rng.randint(-179999, 180000),
+                   elevation=min(5000, int(rng.expovariate(1 / 300))),
+                   records_per_year=min(MAX_RECORDS, max(MIN_RECORDS, records)))
+
+
+def stations_for_size(seed: int, year_bytes: int) -> List[Station]:
+    """Stations of the pool in order until their records fill year_bytes, the last station is cut to fit.
+    Every year has the same stations, only their records differ.
+    Station files are skewed in size like in the real archive."""
+    stations, total, n = [], 0, 0
+    while total < year_bytes:
+        s = station(seed, n)
+        remaining_records = max(MIN_RECORDS, math.ceil((year_bytes - total) / RECORD_BYTES))
+        if s.records_per_year > remaining_records:
+            s = replace(s, records_per_year=remaining_records)
+        stations.append(s)
+        total += s.records_per_year * RECORD_BYTES
+        n += 1
+    return stations
+
+
+def temperature(s: Station, day_of_year: float, rng: random.Random) -> int:
+    """Air temperature in tenths of degree Celsius with seasonal (by hemisphere) and diurnal cycles and noise.
+    day_of_year is fractional from 0, e.g. 1.5 is noon of the 2nd of January."""
+    season = math.cos(2 * math.pi * (day_of_year - 200) / 365.25)
+    if s.latitude < 0:
+        season = -season
+    day = math.cos(2 * math.pi * (day_of_year % 1 - 15 / 24))
+    value = s.mean_temperature + s.seasonal_amplitude * season + 40 * day + rng.gauss(0, 35)
+    return int(max(-932, min(618, round(value))))
+
+
+def station_records(s: Station, year: int, seed: int) -> Iterator[str]:
+    """Fixed width NCDC records of the station for the year in time order, see NcdcRecordParser for the layout."""
+    rng = random.Random(f"{seed}:{s.station_id}:{year}")
+    start = datetime(year, 1, 1)
+    minutes_in_year = (datetime(year + 1, 1, 1) - start).total_seconds() / 60
+    interval = minutes_in_year / s.records_per_year
+    location = f"{s.latitude:+06d}{s.longitude:+07d}FM-12{s.elevation:+05d}99999V020"
+    # Plain rng.random() based draws, as randint and choices are several times slower
+    for i in range(s.records_per_year):
+        minutes = int(i * interval)
+        timestamp = start + timedelta(minutes=minutes)
+        if rng.random() < MISSING_RATE:
+            air_temperature, quality = MISSING_TEMPERATURE, "9"
+        else:
+            air_temperature = temperature(s, minutes / 1440, rng)
+            quality = QUALITY_CODES[bisect(_QUALITY_CUMULATIVE, rng.random() * _QUALITY_CUMULATIVE[-1])]
+        wind = f"{int(rng.random() * 36) * 10:03d}1N{int(rng.random() * 151):04d}1"
+        pressure = 9800 + int(rng.random() * 601)
+        yield f"0018{s.usaf}{s.wban}{timestamp:%Y%m%d%H%M}4{location}{wind}22000" \
+              f"1CN0100001N9{air_temperature:+05d}{quality}+99999{pressure:05d}1ADDMA1{pressure:05d}1{pressure:05d}1\n"
+
+
+def write_station_file(s: Station, year: int, folder: str, seed: int) -> int:
+    """Writes <folder>/<station>-<year>.gz, returns the uncompressed size.
+    Gzip header has no timestamp, so the same seed always gives identical files."""
+    path = os.path.join(folder, f"{s.station_id}-{year}.gz")
+    data = "".join(station_records(s, year, seed)).encode("ascii")
+    with open(path, "wb") as f, gzip.GzipFile(filename="", mode="wb", fileobj=f, mtime=0) as gz:
+        gz.write(data)
+    return len(data)
+
+
+def generate_year(output_folder: str, year: int, year_bytes: int, seed: int) -> GenerationReport:
+    folder = os.path.join(output_folder, str(year))
+    os.makedirs(folder, exist_ok=True)
+    report = GenerationReport(years=[str(year)])
+    for s in stations_for_size(seed, year_bytes):
+        report.bytes += write_station_file(s, year, folder, seed)
+        report.records += s.records_per_year
+        report.files += 1
+    return report
+
+
+def generate_data(output_folder: str, years: Sequence[int], size: int, seed: int = 0,
+                  workers: int = 1) -> GenerationReport:
+    """Writes synthetic NCDC data of about size bytes (uncompressed) in the layout of the FTP download,
+    <output_folder>/<year>/<station>-<year>.gz, which is the input of file_combiner.
+    Data is deterministic by seed, years are generated in parallel with workers processes."""
+    years = sorted(years)
+    if any(not 1900 <= year <= 1999 for year in years):
+        raise ValueError("Years should be in range 1900-1999, as file_combiner reads year folders 19*")
+    year_bytes = size // len(years)
+    report = GenerationReport()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for year_report in executor.map(generate_year, [output_folder] * len(years), years,
+                                        [year_bytes] * len(years), [seed] * len(years)):
+            report.add(year_report)
+    return report
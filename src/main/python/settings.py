@@ -1,13 +1,32 @@
-from dotenv import load_dotenv, find_dotenv
 import os
-from pathlib import Path
 
-load_dotenv(find_dotenv())
+# Settings are read lazily on first access (PEP 562), so importing settings does not walk the directories for .env
+_ENV_VARIABLES = {
+    "AWS_REGION": "AWS_REGION",
+    "NCDC_S3_JAR_PATH": "NCDC_JARS_S3_PATH",
+    "NCDC_S3_LOGS_PATH": "NCDC_LOGS_S3_PATH",
+    "NCDC_S3_DATA_TEST_PATH": "NCDC_S3_DATA_TEST_PATH",
+    "NCDC_S3_DATA_PROD_PATH": "NCDC_S3_DATA_PROD_PATH",
+    "NCDC_S3_OUT_PATH": "NCDC_S3_OUT_PATH",
+    "LOCAL_OUTPUT_PATH": "LOCAL_OUTPUT_PATH",
+}
+_dotenv_loaded = False
 
-AWS_REGION = os.getenv("AWS_REGION")
-NCDC_S3_JAR_PATH = os.getenv("NCDC_JARS_S3_PATH")
-NCDC_S3_LOGS_PATH = os.getenv("NCDC_LOGS_S3_PATH")
-NCDC_S3_DATA_TEST_PATH = os.getenv("NCDC_S3_DATA_TEST_PATH")
-NCDC_S3_DATA_PROD_PATH = os.getenv("NCDC_S3_DATA_PROD_PATH")
-NCDC_S3_OUT_PATH = os.getenv("NCDC_S3_OUT_PATH")
-LOCAL_OUTPUT_PATH = os.getenv("LOCAL_OUTPUT_PATH")
+
+def _load_dotenv():
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        from dotenv import load_dotenv, find_dotenv
+        load_dotenv(find_dotenv())
+        _dotenv_loaded = True
+
+
+def __getattr__(name):
+    if name not in _ENV_VARIABLES:
+        raise AttributeError(f"module {__name__} has no attribute {name}")
+    _load_dotenv()
+    return os.getenv(_ENV_VARIABLES[name])
+
+
+def __dir__():
+    return sorted([*globals(), *_ENV_VARIABLES])
@@ -0,0 +1,32 @@
+import pytest
+from benchmarks.suite import CASES, Measurement, compare, measure_case, read_baseline, write_baseline
+
+BASELINE = {"clean_mapr_results/small": {"seconds": 1.0, "throughput_mb_s": 4.0, "peak_rss_mb": 100.0}}
+
+
+def test_compare_within_tolerance():
+    results = {"clean_mapr_results/small": Measurement(seconds=1.1, throughput_mb_s=3.7, peak_rss_mb=110.0),
+               "new_case/small": Measurement(seconds=10.0, throughput_mb_s=0.1, peak_rss_mb=1000.0)}
+    assert compare(results, BASELINE, tolerance=0.2) == []
+
+
+def test_compare_regressions():
+    results = {"clean_mapr_results/small": Measurement(seconds=1.5, throughput_mb_s=2.0, peak_rss_mb=150.0)}
+    regressions = compare(results, BASELINE, tolerance=0.2)
+    assert len(regressions) == 3
+    assert regressions[0].startswith("clean_mapr_results/small: wall time")
+
+
+def test_baseline_roundtrip(tmpdir):
+    path = str(tmpdir.join("baseline.json"))
+    assert read_baseline(path) is None
+    write_baseline(path, {"clean_mapr_results/small": Measurement(seconds=1.0, throughput_mb_s=4.0, peak_rss_mb=100.0)})
+    assert read_baseline(path) == BASELINE
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_measure_case(case, tmpdir):
+    measurement = measure_case(case, 64 * 1024, str(tmpdir), repeat=1)
+    assert measurement.seconds > 0
+    assert measurement.throughput_mb_s > 0
+    assert measurement.peak_rss_mb > 1
@@ -0,0 +1,42 @@
+import pytest
+from ncdc_analysis.aws.clients import ClientConfig, CLIENT_METRICS, get_client, get_session, clear_client_cache
+
+
+@pytest.fixture(autouse=True)
+def clean_clients():
+    clear_client_cache()
+    CLIENT_METRICS.reset()
+    yield
+    clear_client_cache()
+
+
+def test_clients_are_cached():
+    client = get_client("s3", region_name="us-east-1")
+    assert get_client("s3", region_name="us-east-1") is client
+    assert get_client("s3", region_name="eu-central-1") is not client
+    assert get_session() is get_session()
+
+
+def test_client_config():
+    config = ClientConfig(max_pool_connections=7, max_attempts=3, connect_timeout=1, read_timeout=2)
+    client = get_client("s3", region_name="us-east-1", config=config)
+    assert client is not get_client("s3", region_name="us-east-1")
+    assert client.meta.config.max_pool_connections == 7
+    assert client.meta.config.retries["mode"] == "adaptive"
+    assert client.meta.config.connect_timeout == 1
+    assert client.meta.config.read_timeout == 2
+
+
+def test_client_metrics(s3_bucket):
+    s3 = get_client("s3", region_name="us-east-1")
+    s3.put_object(Bucket="test-bucket", Key="key", Body=b"data")
+    s3.get_object(Bucket="test-bucket", Key="key")
+    with pytest.raises(s3.exceptions.NoSuchKey):
+        s3.get_object(Bucket="test-bucket", Key="missing")
+
+    get_object = CLIENT_METRICS.operations["s3.GetObject"]
+    assert get_object.calls == 2
+    assert get_object.errors == 1
+    assert 0 < get_object.avg_latency <= get_object.max_latency
+    assert CLIENT_METRICS.operations["s3.PutObject"].calls == 1
+    assert "s3.GetObject: 2 calls, 1 errors" in CLIENT_METRICS.report()
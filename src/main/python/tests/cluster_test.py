@@ -0,0 +1,122 @@
+import os
+import pandas as pd
+import pytest
+from ncdc_analysis.core import cluster
+from ncdc_analysis.filesystem import LocalPath
+
+PARTS = {
+    "1990": "1990\t-100, 200, 10.0, 2\n",
+    "1991": "1991\t-50, 150, 5.0, 4\n",
+    "1992": "1992\t-10, 10, 1.0, 1\n",
+}
+
+
+class FakeEMRRunner:
+    """Runs the shard locally: writes part file of the shard's years and fetches it from the local folder."""
+    configs = []
+    failing_year = None
+
+    def __init__(self, config, output_path, result_fetcher=None):
+        self.config = config
+        self.result_fetcher = result_fetcher
+        self.output_folder = os.path.join(os.environ["FAKE_EMR_ROOT"], output_path.key)
+        self.results = None
+
+    def execute(self):
+        FakeEMRRunner.configs.append(self.config.to_dict())
+        input_arg = self.config.to_dict()["Steps"][0]["HadoopJarStep"]["Args"][-2]
+        paths = [os.path.join(path, name) for path in input_arg.split(",") if os.path.isdir(path)
+                 for name in sorted(os.listdir(path))] or input_arg.split(",")
+        years = [os.path.basename(path)[:4] for path in paths]
+        if FakeEMRRunner.failing_year in years:
+            raise RuntimeError(f"Cluster of {self.config.to_dict()['Name']} terminated with errors")
+        os.makedirs(self.output_folder)
+        with open(os.path.join(self.output_folder, "part-r-00000"), "w") as f:
+            f.writelines(PARTS[year] for year in years)
+        self.results = self.result_fetcher.fetch(LocalPath(self.output_folder))
+
+
+@pytest.fixture()
+def fake_emr(tmpdir, monkeypatch):
+    monkeypatch.setenv("FAKE_EMR_ROOT", str(tmpdir.mkdir("emr")))
+    monkeypatch.setattr(cluster, "EMRRunner", FakeEMRRunner)
+    FakeEMRRunner.configs = []
+    FakeEMRRunner.failing_year = None
+    return FakeEMRRunner
+
+
+@pytest.fixture()
+def sized_yearly_folder(tmpdir, fake_emr):
+    folder = tmpdir.mkdir("sized_yearly")
+    for year, size in [("1990", 100), ("1991", 100), ("1992", 200)]:
+        folder.join(f"{year}.gz").write(b"x" * size)
+    return str(folder)
+
+
+def test_run_sharded_stats_job(sized_yearly_folder, tmpdir):
+    out_local = tmpdir.mkdir("out")
+    results = cluster.run_sharded_stats_job(input_path=sized_yearly_folder, jar_path="s3://bucket/jar.jar",
+                                            logs_path="s3://bucket/logs", out_s3="s3://bucket/out",
+                                            out_local=str(out_local), instance_count=2, instance_type="m4.large",
+                                            shards=2, out_formats=["csv"])
+
+    assert sorted(config["Name"] for config in FakeEMRRunner.configs) == ["MapReduce Job shard 1/2",
+                                                                          "MapReduce Job shard 2/2"]
+    assert list(results.index) == [1990, 1991, 1992]
+    assert list(results["count"]) == [2, 4, 1]
+    saved = pd.read_csv(out_local.listdir()[0], index_col="index")
+    pd.testing.assert_frame_equal(saved, results)
+
+
+def test_sharded_stats_job_filters_stations(sized_yearly_folder, tmpdir):
+    with open(os.path.join(sized_yearly_folder, "_index.csv"), "w") as f:
+        f.write("year,station,file\n1990,010010-99999,a\n1991,010014-99999,b\n1992,010010-99999,c\n")
+    results = cluster.run_sharded_stats_job(input_path=sized_yearly_folder, jar_path="s3://bucket/jar.jar",
+                                            logs_path="s3://bucket/logs", out_s3="s3://bucket/out",
+                                            out_local=str(tmpdir.mkdir("out")), instance_count=2,
+                                            instance_type="m4.large", shards=2, out_formats=["csv"],
+                                            stations={"010010-99999"})
+
+    args = [config["Steps"][0]["HadoopJarStep"]["Args"] for config in FakeEMRRunner.configs]
+    assert {tuple(arg[:2]) for arg in args} == {("-D", "ncdc.stations=010010-99999")}
+    assert list(results.index) == [1990, 1992]
+
+
+def test_sharded_results_have_unsharded_schema(sized_yearly_folder, tmpdir):
+    args = dict(input_path=sized_yearly_folder, jar_path="s3://bucket/jar.jar", logs_path="s3://bucket/logs",
+                out_s3="s3://bucket/out", instance_count=2, instance_type="m4.large", out_formats=["csv"])
+    unsharded = cluster.run_mapr_job(out_local=str(tmpdir.mkdir("unsharded")),
+                                     val_col_names=["min", "max", "avg", "count"], **args)
+    sharded = cluster.run_sharded_stats_job(out_local=str(tmpdir.mkdir("sharded")), shards=2, **args)
+
+    pd.testing.assert_frame_equal(sharded, unsharded)
+
+
+def test_sharded_stats_job_reports_succeeded_shards(sized_yearly_folder, tmpdir, capsys):
+    FakeEMRRunner.failing_year = "1992"
+    with pytest.raises(RuntimeError, match=r"1/2 shards failed: 1992-1992\. Succeeded shards: 1990-1991 "
+                                           r"\(s3://bucket/out/.*/shard-000\)"):
+        cluster.run_sharded_stats_job(input_path=sized_yearly_folder, jar_path="s3://bucket/jar.jar",
+                                      logs_path="s3://bucket/logs", out_s3="s3://bucket/out",
+                                      out_local=str(tmpdir.mkdir("out")), instance_count=2,
+                                      instance_type="m4.large", shards=2, out_formats=["csv"])
+    assert "Shard 1992-1992 failed" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("file_name, release_label, message", [
+    ("1990.zst", "emr-5.23.0", r"zstd \(requires emr-5.30.0 or later on 5.x or emr-6.0.0 or later on 6.x\): 1990.zst"),
+    ("1990.lz4f", "emr-6.15.0", r"lz4 \(local only\): 1990.lz4f"),
+])
+def test_check_input_codecs_rejects_unreadable_files(tmpdir, file_name, release_label, message):
+    tmpdir.mkdir("data").mkdir("1990").join(file_name).write(b"1990")
+    for input_path in [str(tmpdir.join("data")), str(tmpdir.join("data", "1990", file_name))]:
+        with pytest.raises(ValueError, match=message):
+            cluster.check_input_codecs(input_path, release_label)
+
+
+@pytest.mark.parametrize("release_label", ["emr-5.30.0", "emr-6.0.0"])
+def test_check_input_codecs_accepts_zstd_with_later_release(tmpdir, release_label):
+    tmpdir.join("1990.zst").write(b"1990")
+    tmpdir.join("1991.gz").write(b"1991")
+    tmpdir.join("_index.csv").write("year,station,file\n")
+    cluster.check_input_codecs(str(tmpdir), release_label)
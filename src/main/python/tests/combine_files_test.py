@@ -7,7 +7,7 @@ cur_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(cur_path)
 
 import pytest
-from ncdc_analysis.preprocessing.combine_files_to_yearly import get_path_last_item
+from ncdc_analysis.preprocessing.combine_files_to_yearly import get_path_last_item, get_station_id
 from ncdc_analysis.core.combine_files import combine_files
 
 
@@ -27,6 +27,10 @@ def test_get_path_last_item_is_file():
     assert last_item == "file.txt"
 
 
+def test_get_station_id():
+    assert get_station_id("/noaa/1990/010010-99999-1990.gz") == "010010-99999"
+
+
 def test_file_combine_functionality(tmpdir):
     """Functionality test of combine_files_to_yearly.
     Simulates input data using pytest's tmpdir fixture, compressing data and writing it to temporary folders,
@@ -67,3 +71,9 @@ def test_file_combine_functionality(tmpdir):
     with gzip.open(out_folder.join("1991.gz")) as combined_f_1991:
         content = combined_f_1991.read().decode("utf-8")
         assert content == test_lines_1991
+
+    with open(out_folder.join("_index.csv")) as index_f:
+        assert index_f.read().splitlines() == ["year,station,file",
+                                               "1990,file1,1990.gz",
+                                               "1990,file2,1990.gz",
+                                               "1991,file1,1991.gz"]
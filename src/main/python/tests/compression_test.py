@@ -0,0 +1,109 @@
+import gzip
+import pytest
+from benchmarks.compression import run_benchmark
+from benchmarks.gzip_backends import measure_backend
+from ncdc_analysis.core.combine_files import combine_files
+from ncdc_analysis.core.local_engine import compute_stats
+from ncdc_analysis.preprocessing.compression import CODECS, GzipCodec, available_codecs, available_gzip_backends, \
+    codec_for_path, get_codec, open_compressed
+
+
+@pytest.fixture()
+def data(ncdc_record):
+    return "".join(ncdc_record("1990", temperature) for temperature in range(-100, 100)).encode()
+
+
+@pytest.mark.parametrize("codec", available_codecs())
+def test_roundtrip(codec, tmpdir, data):
+    path = str(tmpdir.join(f"1990{CODECS[codec].extension}"))
+    with get_codec(codec).open(path, "wb", CODECS[codec].max_level) as f:
+        f.write(data)
+    assert codec_for_path(path) is CODECS[codec]
+    with open_compressed(path, "rb") as f:
+        assert f.read() == data
+
+
+def test_gzip_and_bzip2_are_always_available():
+    assert {"gzip", "bzip2"} <= set(available_codecs())
+    assert CODECS["bzip2"].splittable
+
+
+def test_invalid_codec_and_level():
+    with pytest.raises(ValueError):
+        get_codec("snappy")
+    with pytest.raises(ValueError):
+        CODECS["gzip"].check_level(10)
+    with pytest.raises(ValueError):
+        codec_for_path("1990.snappy")
+
+
+def test_combine_files_with_codec(tmpdir, data):
+    station_folder = tmpdir.mkdir("noaa").mkdir("1990")
+    with open(station_folder.join("010010-99999-1990.gz"), "wb") as f:
+        f.write(gzip.compress(data))
+    out_folder = tmpdir.mkdir("out")
+    combine_files(str(tmpdir.join("noaa")), str(out_folder), codec="bzip2", level=1)
+
+    with open_compressed(str(out_folder.join("1990.bz2"))) as f:
+        assert f.read() == data
+    with open(out_folder.join("_index.csv")) as f:
+        assert f.read().splitlines()[1] == "1990,010010-99999,1990.bz2"
+    assert compute_stats(str(out_folder)).loc["1990", "count"] == 200
+
+
+def test_run_benchmark(data):
+    results = run_benchmark(data, ["gzip", "bzip2"], levels=[1, 9], repeat=1)
+    assert [(result.codec, result.level) for result in results] == [("gzip", 1), ("gzip", 9), ("bzip2", 1),
+                                                                     ("bzip2", 9)]
+    assert all(result.ratio > 1 and result.raw_bytes == len(data) for result in results)
+
+
+def test_gzip_backends_fall_back_to_stdlib():
+    assert available_gzip_backends()[-1] == "gzip"
+    assert GzipCodec().backend == available_gzip_backends()[0]
+    with pytest.raises(ValueError):
+        GzipCodec("pigz")
+
+
+@pytest.mark.parametrize("backend", available_gzip_backends())
+def test_gzip_backends_are_identical(backend, tmpdir, data):
+    multi_member = gzip.compress(data[:1000]) + gzip.compress(data[1000:])
+    assert GzipCodec(backend).decompress(multi_member) == data
+    path = str(tmpdir.join("010010-99999-1990.gz"))
+    with open(path, "wb") as f:
+        f.write(multi_member)
+    with GzipCodec(backend).open(path, "rt") as f:
+        assert f.read() == data.decode()
+    assert measure_backend(backend, "decompress", [path], repeat=1).raw_bytes == len(data)
+
+
+@pytest.mark.parametrize("codec, module", [("zstd", "zstandard"), ("lz4", "lz4.frame")])
+def test_optional_codecs(codec, module, tmpdir, data):
+    pytest.importorskip(module)
+    compression = CODECS[codec]
+    path = str(tmpdir.join(f"1990{compression.extension}"))
+    # Concatenated frames, like sorted blocks of record_sort, read as one stream
+    with open(path, "wb") as f:
+        f.write(compression.compress(data[:1000], compression.max_level) + compression.compress(data[1000:]))
+    assert codec_for_path(path) is compression
+    with open_compressed(path, "rb") as f:
+        assert f.read() == data
+    with open_compressed(path, "rt", encoding="ascii") as f:
+        assert f.read() == data.decode()
+    with open(path, "rb") as f:
+        assert compression.decompress(f.read()) == data
+
+
+def test_optional_codec_combine_files(tmpdir, data):
+    pytest.importorskip("zstandard")
+    station_folder = tmpdir.mkdir("noaa").mkdir("1990")
+    with open(station_folder.join("010010-99999-1990.gz"), "wb") as f:
+        f.write(gzip.compress(data))
+    out_folder = tmpdir.mkdir("out")
+    combine_files(str(tmpdir.join("noaa")), str(out_folder), codec="zstd", level=1)
+    assert compute_stats(str(out_folder)).loc["1990", "count"] == 200
+
+
+def test_lz4_is_local_only():
+    assert CODECS["lz4"].extension == ".lz4f" and not CODECS["lz4"].hadoop_readable
+    assert all(codec.hadoop_readable for name, codec in CODECS.items() if name != "lz4")
@@ -0,0 +1,60 @@
+import boto3
+import gzip
+from moto import mock_s3
+import os
+import random
+import sys
+
+import pytest
+
+# Makes ncdc_analysis, settings and benchmarks importable regardless of the test collection order
+cur_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if cur_path not in sys.path:
+    sys.path.append(cur_path)
+
+# Shared NCDC test data, see ncdc_analysis.parsers.ncdc_record_parser for the record layout
+NCDC_RECORD = "0043011990999991950051518004+68750+023550FM-12+0382" \
+              "99999V0203201N00261220001CN9999999N9-00111+99999999999"
+
+
+def _ncdc_record(year: str, temperature: int, quality: str = "1") -> str:
+    return f"{NCDC_RECORD[:15]}{year}{NCDC_RECORD[19:87]}{temperature:+05d}{quality}{NCDC_RECORD[93:]}\n"
+
+
+@pytest.fixture()
+def raw_record():
+    """Raw record of 1950 with temperature -1.1 and quality 1."""
+    return NCDC_RECORD
+
+
+@pytest.fixture()
+def ncdc_record():
+    """Builds newline terminated raw records: ncdc_record(year, temperature, quality="1")."""
+    return _ncdc_record
+
+
+@pytest.fixture(params=["missing", "bad_quality"])
+def invalid_record(request):
+    """Raw records the jobs skip: missing temperature (9999) and bad quality code."""
+    return _ncdc_record("1950", 9999) if request.param == "missing" else _ncdc_record("1950", 100, quality="2")
+
+
+@pytest.fixture()
+def yearly_folder(tmpdir):
+    rng = random.Random(42)
+    folder = tmpdir.mkdir("yearly")
+    for year in ["1950", "1951"]:
+        lines = [_ncdc_record(year, rng.randint(-300, 300)) for _ in range(2000)]
+        lines += [_ncdc_record(year, 9999), _ncdc_record(year, 500, quality="3")]
+        with gzip.open(folder.join(f"{year}.gz"), "wt") as f:
+            f.writelines(lines)
+    return str(folder)
+
+
+@pytest.fixture()
+def s3_bucket():
+    """Client of the mocked S3 with an empty bucket test-bucket."""
+    with mock_s3():
+        s3 = boto3.client("s3")
+        s3.create_bucket(Bucket="test-bucket")
+        yield s3
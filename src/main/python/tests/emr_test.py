@@ -1,6 +1,8 @@
 import boto3
+import click
 from dataclasses import dataclass
-from ncdc_analysis.aws.emr import EMRConfigBuilder, EMRStep, EMRHadoopStep, EMRSparkStep, EMRRunner
+from ncdc_analysis.aws.emr import DEFAULT_RELEASE_LABEL, ClusterLayout, EMRConfigBuilder, EMRStep, EMRHadoopStep, \
+    EMRSparkStep, EMRRunner, parse_release_label, supports_managed_scaling
 from ncdc_analysis.aws.s3 import S3Path
 from ncdc_analysis.postprocessing.result_fetchers import EMRResultCsvFetcher
 from moto import mock_emr
@@ -303,3 +305,99 @@ class TestEMRRunner:
         output_path = S3Path.from_path("s3://my/output")
         runner = EMRRunner(config=emr_test_config, output_path=output_path, result_fetcher=EMRResultCsvFetcher)
         assert runner.result_fetcher == EMRResultCsvFetcher
+
+
+class TestClusterLayout:
+
+    @pytest.fixture()
+    def emr(self):
+        with mock_emr():
+            yield boto3.client("emr", region_name="us-east-1")
+
+    @staticmethod
+    def build_config(layout: ClusterLayout, release_label: str = DEFAULT_RELEASE_LABEL) -> EMRConfigBuilder:
+        config = EMRConfigBuilder(name="Test EMR Run", instance_count=3, instance_type="m4.large",
+                                  logs_path="s3://some-bucket/logs", release_label=release_label, layout=layout)
+        config.add_step(EMRHadoopStep(jar_path="s3://my/jar/path", jar_args=["s3://my/input", "s3://my/output"]))
+        return config
+
+    @staticmethod
+    def run(emr, config: EMRConfigBuilder) -> Dict[str, Dict]:
+        """Runs the config in the EMR stand-in, boto3 validates the request against the EMR API model.
+        Returns the created instance groups by role."""
+        cluster_id = emr.run_job_flow(**config.to_dict())["JobFlowId"]
+        assert emr.describe_cluster(ClusterId=cluster_id)["Cluster"]["ReleaseLabel"] == config.release_label
+        return {group["InstanceGroupType"]: group
+                for group in emr.list_instance_groups(ClusterId=cluster_id)["InstanceGroups"]}
+
+    def test_default_config_has_no_instance_groups(self, emr):
+        config = self.build_config(layout=None)
+        assert config.to_dict()["Instances"] == {"MasterInstanceType": "m4.large", "SlaveInstanceType": "m4.large",
+                                                 "InstanceCount": 3}
+        groups = self.run(emr, config)
+        assert groups["MASTER"]["RequestedInstanceCount"] == 1
+        assert groups["CORE"]["RequestedInstanceCount"] == 2
+
+    def test_separate_master_core_and_spot_task_groups(self, emr):
+        layout = ClusterLayout.from_options("m4.large", 3, master_instance_type="m5.xlarge",
+                                            core_instance_type="r5.xlarge", task_instance_count=4, task_spot=True,
+                                            task_bid_price="0.10")
+        groups = self.run(emr, self.build_config(layout, release_label="emr-6.15.0"))
+
+        assert groups["MASTER"]["InstanceType"] == "m5.xlarge"
+        assert (groups["CORE"]["InstanceType"], groups["CORE"]["RequestedInstanceCount"]) == ("r5.xlarge", 2)
+        assert groups["CORE"]["Market"] == "ON_DEMAND"
+        task = groups["TASK"]
+        assert (task["InstanceType"], task["RequestedInstanceCount"]) == ("r5.xlarge", 4)
+        assert (task["Market"], task["BidPrice"]) == ("SPOT", "0.10")
+
+    def test_managed_scaling(self, emr):
+        layout = ClusterLayout.from_options("m5.xlarge", 3, scaling="managed", task_spot=True, max_capacity=10)
+        config = self.build_config(layout, release_label="emr-6.15.0")
+        assert config.to_dict()["ManagedScalingPolicy"] == {"ComputeLimits": {
+            "UnitType": "Instances", "MinimumCapacityUnits": 2, "MaximumCapacityUnits": 10,
+            "MaximumCoreCapacityUnits": 2}}
+        groups = self.run(emr, config)
+        assert groups["TASK"]["Market"] == "SPOT"
+        assert groups["TASK"]["RequestedInstanceCount"] == 0
+
+    def test_managed_scaling_requires_release(self):
+        layout = ClusterLayout.from_options("m5.xlarge", 3, scaling="managed", max_capacity=10)
+        with pytest.raises(ValueError):
+            self.build_config(layout, release_label="emr-5.23.0")
+
+    def test_automatic_scaling(self, emr):
+        layout = ClusterLayout.from_options("m4.large", 3, scaling="automatic", min_capacity=1, max_capacity=6)
+        config = self.build_config(layout)
+        assert config.to_dict()["AutoScalingRole"] == "EMR_AutoScaling_DefaultRole"
+        task = self.run(emr, config)["TASK"]
+        assert task["RequestedInstanceCount"] == 1
+        assert task["AutoScalingPolicy"]["Constraints"] == {"MinCapacity": 1, "MaxCapacity": 6}
+        assert [rule["Name"] for rule in task["AutoScalingPolicy"]["Rules"]] == ["ScaleOutMemory", "ScaleInMemory"]
+
+    @pytest.mark.parametrize("task_instance_count", [1, 7])
+    def test_automatic_scaling_task_count_outside_capacity(self, task_instance_count):
+        with pytest.raises(click.BadParameter, match="outside automatic scaling capacity 2-6"):
+            ClusterLayout.from_options("m4.large", 3, task_instance_count=task_instance_count, scaling="automatic",
+                                       min_capacity=2, max_capacity=6)
+
+    @pytest.mark.parametrize("options", [dict(instance_count=1),
+                                         dict(scaling="elastic"),
+                                         dict(scaling="managed", min_capacity=5, max_capacity=3),
+                                         dict(task_bid_price="0.1", task_instance_count=1),
+                                         dict(task_spot=True),
+                                         dict(max_capacity=5)])
+    def test_invalid_layout(self, options):
+        with pytest.raises(ValueError):
+            ClusterLayout.from_options(**{"instance_type": "m4.large", "instance_count": 3, **options})
+
+    @pytest.mark.parametrize("release_label, supported", [("emr-5.23.0", False), ("emr-5.30.0", True),
+                                                          ("emr-6.0.0", False), ("emr-6.1.0", True),
+                                                          ("emr-7.0.0", True), ("emr-4.9.0", False)])
+    def test_supports_managed_scaling(self, release_label, supported):
+        assert supports_managed_scaling(release_label) == supported
+
+    def test_invalid_release_label(self):
+        assert parse_release_label("emr-6.15.0") > parse_release_label("emr-5.30.0")
+        with pytest.raises(ValueError):
+            parse_release_label("6.15.0")
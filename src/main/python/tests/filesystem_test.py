@@ -0,0 +1,61 @@
+import pytest
+from ncdc_analysis.aws.s3 import S3Path
+from ncdc_analysis.filesystem import LocalPath, iter_lines, read_split_lines, to_path
+
+LINES = ["first line", "second", "", "fourth line is longer", "last"]
+
+
+@pytest.fixture()
+def local_folder(tmp_path):
+    (tmp_path / "out").mkdir()
+    (tmp_path / "out" / "part-00000").write_text("\n".join(LINES) + "\n")
+    (tmp_path / "out" / "_SUCCESS").write_text("")
+    (tmp_path / "1990.gz").write_bytes(b"1990")
+    return LocalPath(str(tmp_path))
+
+
+def test_to_path():
+    assert to_path("s3://bucket/key") == S3Path("bucket", "key")
+    assert to_path("/tmp/data") == LocalPath("/tmp/data")
+
+
+def test_local_path_listing(local_folder):
+    assert [p.name for p in local_folder.iterdir()] == ["1990.gz", "out"]
+    assert [(p.name, stat.size) for p, stat in local_folder.scandir()] == [("1990.gz", 4)]
+    assert [(p.name, stat.size) for p, stat in local_folder.scantree()] == [("1990.gz", 4), ("_SUCCESS", 0),
+                                                                            ("part-00000", 46)]
+    assert [p.name for p in local_folder.glob("out/part-*")] == ["part-00000"]
+    assert local_folder.join("1990.gz").exists()
+    with pytest.raises(FileNotFoundError):
+        local_folder.join("missing").read_text()
+
+
+def test_iter_lines(local_folder):
+    assert list(iter_lines(local_folder.join("out/part-00000"))) == LINES
+
+
+@pytest.mark.parametrize("split_size", [1, 3, 7, 100])
+def test_read_split_lines_covers_every_line_once(local_folder, split_size):
+    path = local_folder.join("out/part-00000")
+    size = path.stat().size
+    lines = []
+    for start in range(0, size, split_size):
+        lines += read_split_lines(path, start, min(start + split_size, size))
+    assert [line.rstrip("\n") for line in lines] == LINES
+
+
+def test_read_split_lines_s3(s3_bucket):
+    s3_bucket.put_object(Bucket="test-bucket", Key="data/part-00000", Body=("\n".join(LINES) + "\n").encode())
+    path = S3Path.from_path("s3://test-bucket/data/part-00000")
+    assert read_split_lines(path, 0, 12) == ["first line\n", "second\n"]
+    assert read_split_lines(path, 12, 30) == ["\n", "fourth line is longer\n"]
+
+
+def test_fetch_results_from_local_folder(tmp_path):
+    from ncdc_analysis.postprocessing.result_fetchers import EMRResultFetcher
+    (tmp_path / "part-r-00001").write_text("1991\t-10, 30, 5.5, 4\n")
+    (tmp_path / "part-r-00000").write_text("1990\t-20, 25, 3.0, 2\n1992\t0, 1, 0.5, 2\n")
+    (tmp_path / "_SUCCESS").write_text("")
+    df = EMRResultFetcher._fetch_hadoop_style_results(LocalPath(str(tmp_path)), ["min", "max", "avg", "count"])
+    assert list(df.index) == ["1990", "1991", "1992"]
+    assert list(df["count"]) == ["2", "4", "2"]
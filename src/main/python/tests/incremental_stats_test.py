@@ -0,0 +1,82 @@
+import pandas as pd
+import pytest
+from ncdc_analysis.aws.s3 import S3Path
+from ncdc_analysis.core.input_selection import YearlyInput, list_yearly_inputs, to_input_arg, year_from_key
+from ncdc_analysis.postprocessing.incremental_stats import StatsTable, merge_stats, cast_stats
+from ncdc_analysis.postprocessing.map_reduce_utils import clean_mapr_results
+
+
+def _yearly_input(year, fingerprint):
+    return YearlyInput(year=year, path=S3Path("bucket", f"data/{year}.gz"), fingerprint=fingerprint)
+
+
+def _stats(rows):
+    raw = "\n".join(f"{year}\t{mn}, {mx}, {avg}, {cnt}" for year, mn, mx, avg, cnt in rows)
+    return clean_mapr_results(raw, col_names=["min", "max", "avg", "count"])
+
+
+def test_year_from_key():
+    assert year_from_key("data/gz/1990.gz") == "1990"
+    assert year_from_key("data/gz/1990") == "1990"
+    assert year_from_key("data/gz/_index.csv") == ""
+
+
+def test_list_yearly_inputs(s3_bucket):
+    for key in ["data/1991.gz", "data/1990.gz", "data/_SUCCESS"]:
+        s3_bucket.put_object(Bucket="test-bucket", Key=key, Body=key.encode())
+
+    inputs = list_yearly_inputs(S3Path.from_path("s3://test-bucket/data"))
+    assert [i.year for i in inputs] == ["1990", "1991"]
+    assert inputs[0].fingerprint != inputs[1].fingerprint
+    assert to_input_arg(inputs) == "s3://test-bucket/data/1990.gz,s3://test-bucket/data/1991.gz"
+
+
+def test_merge_stats_is_exact():
+    partials = cast_stats(_stats([("1990", -10, 20, 5.0, 2), ("1990", -30, 10, 2.0, 4), ("1991", 1, 2, 1.5, 2)]))
+    merged = merge_stats(partials)
+    assert merged.loc["1990", "min"] == -30
+    assert merged.loc["1990", "max"] == 20
+    assert merged.loc["1990", "count"] == 6
+    assert merged.loc["1990", "avg"] == pytest.approx((5.0 * 2 + 2.0 * 4) / 6)
+    assert merged.loc["1991"].tolist() == [1, 2, 1.5, 2]
+
+
+def test_stats_table_roundtrip_and_stale_inputs(tmpdir):
+    table = StatsTable.load(str(tmpdir))
+    inputs = [_yearly_input("1990", "a"), _yearly_input("1991", "b")]
+    assert table.stale_inputs(inputs) == inputs
+
+    replaced = table.update(_stats([("1990", -10, 20, 5.0, 2), ("1991", 1, 2, 1.5, 2)]), inputs)
+    assert replaced == []
+    table.save()
+
+    loaded = StatsTable.load(str(tmpdir))
+    pd.testing.assert_frame_equal(loaded.stats, table.stats)
+    changed_inputs = [_yearly_input("1990", "a"), _yearly_input("1991", "c"), _yearly_input("1992", "d")]
+    assert [i.year for i in loaded.stale_inputs(changed_inputs)] == ["1991", "1992"]
+
+
+def test_stats_table_replaces_recomputed_years(tmpdir):
+    table = StatsTable.load(str(tmpdir))
+    table.update(_stats([("1990", -10, 20, 5.0, 2), ("1991", 1, 2, 1.5, 2)]),
+                 [_yearly_input("1990", "a"), _yearly_input("1991", "b")])
+
+    replaced = table.update(_stats([("1991", 0, 4, 2.0, 3), ("1992", 3, 3, 3.0, 1)]),
+                            [_yearly_input("1991", "c"), _yearly_input("1992", "d")])
+    assert replaced == ["1991"]
+    assert list(table.stats.index) == ["1990", "1991", "1992"]
+    assert table.stats.loc["1991"].tolist() == [0, 4, 2.0, 3]
+    assert table.manifest == {"1990": "a", "1991": "c", "1992": "d"}
+
+
+def test_stats_table_keeps_years_without_results_stale(tmpdir):
+    table = StatsTable.load(str(tmpdir))
+    table.update(_stats([("1990", -10, 20, 5.0, 2), ("1991", 1, 2, 1.5, 2)]),
+                 [_yearly_input("1990", "a"), _yearly_input("1991", "b")])
+
+    changed_inputs = [_yearly_input("1990", "c"), _yearly_input("1991", "d")]
+    replaced = table.update(_stats([("1991", 0, 4, 2.0, 3)]), changed_inputs)
+    assert replaced == ["1991"]
+    assert table.stats.loc["1990"].tolist() == [-10, 20, 5.0, 2]
+    assert table.manifest == {"1990": "a", "1991": "d"}
+    assert [i.year for i in table.stale_inputs(changed_inputs)] == ["1990"]
@@ -0,0 +1,77 @@
+import pytest
+from ncdc_analysis.aws.s3 import S3Path
+from ncdc_analysis.core.input_selection import YearlyInput, parse_years, parse_stations, read_station_index, \
+    select_inputs, shard_inputs
+
+INDEX_CSV = "year,station,file\n1990,010010-99999,1990.gz\n1991,010010-99999,1991.gz\n1991,010014-99999,1991.gz\n"
+
+
+@pytest.fixture()
+def s3_yearly_data(s3_bucket):
+    for year in ["1990", "1991", "1992"]:
+        s3_bucket.put_object(Bucket="test-bucket", Key=f"data/{year}.gz", Body=year.encode())
+    return s3_bucket
+
+
+def test_parse_years():
+    assert parse_years("1930-1932,1960") == {"1930", "1931", "1932", "1960"}
+    assert parse_years("1990") == {"1990"}
+
+
+@pytest.mark.parametrize("years", ["1950-1930", "19x0", "1930-"])
+def test_parse_years_invalid(years):
+    with pytest.raises(ValueError):
+        parse_years(years)
+
+
+def test_parse_stations():
+    assert parse_stations("010010-99999, 010014-99999,") == {"010010-99999", "010014-99999"}
+
+
+def test_select_years(s3_yearly_data):
+    inputs = select_inputs(S3Path.from_path("s3://test-bucket/data"), years={"1991", "1992", "1993"})
+    assert [i.path.path for i in inputs] == ["s3://test-bucket/data/1991.gz", "s3://test-bucket/data/1992.gz"]
+
+
+def test_select_stations_without_index_raises(s3_yearly_data):
+    path = S3Path.from_path("s3://test-bucket/data")
+    assert read_station_index(path) is None
+    with pytest.raises(ValueError):
+        select_inputs(path, stations={"010014-99999"})
+
+
+def test_select_stations_with_index(s3_yearly_data):
+    s3_yearly_data.put_object(Bucket="test-bucket", Key="data/_index.csv", Body=INDEX_CSV.encode())
+    path = S3Path.from_path("s3://test-bucket/data")
+    assert [i.year for i in select_inputs(path, stations={"010014-99999"})] == ["1991"]
+    assert [i.year for i in select_inputs(path, years={"1990", "1992"},
+                                          stations={"010010-99999"})] == ["1990"]
+
+
+def test_select_nothing_raises(s3_yearly_data):
+    with pytest.raises(ValueError):
+        select_inputs(S3Path.from_path("s3://test-bucket/data"), years={"1850"})
+
+
+def _inputs(sizes):
+    return [YearlyInput(year=str(1990 + n), path=S3Path("test-bucket", f"data/{1990 + n}.gz"), fingerprint=str(n),
+                        size=size) for n, size in enumerate(sizes)]
+
+
+def test_shard_inputs_balances_bytes():
+    shards = shard_inputs(_inputs([10, 10, 10, 10, 40, 40]), 3)
+    assert [[i.year for i in shard] for shard in shards] == [["1990", "1991", "1992", "1993"], ["1994"], ["1995"]]
+
+
+def test_shard_inputs_keeps_all_years_in_order():
+    inputs = _inputs([5] * 10)
+    for shards in range(1, 12):
+        sharded = shard_inputs(list(reversed(inputs)), shards)
+        assert len(sharded) == min(shards, 10)
+        assert [i.year for shard in sharded for i in shard] == [i.year for i in inputs]
+    with pytest.raises(ValueError):
+        shard_inputs(inputs, 0)
+
+
+def test_list_yearly_inputs_has_sizes(s3_yearly_data):
+    assert [i.size for i in select_inputs(S3Path.from_path("s3://test-bucket/data"))] == [4, 4, 4]
@@ -0,0 +1,86 @@
+import gzip
+import math
+import pandas as pd
+import pytest
+from click.testing import CliRunner
+from ncdc_analysis.cli.local_runner import local_runner
+from ncdc_analysis.core.local_engine import compute_stats, max_errors
+from ncdc_analysis.parsers.ncdc_record_parser import NcdcRecord, parse_valid_temperature
+from ncdc_analysis.preprocessing.sampling import write_sample
+
+
+def test_parse_record(raw_record):
+    record = NcdcRecord.parse(raw_record)
+    assert record == NcdcRecord(year="1950", air_temperature=-11, quality="1")
+    assert record.is_valid_temperature()
+    assert parse_valid_temperature(raw_record) == ("1950", -11)
+
+
+def test_parse_invalid_temperature(invalid_record):
+    assert parse_valid_temperature(invalid_record) is None
+    assert parse_valid_temperature("short") is None
+
+
+def test_missing_quality_is_not_valid():
+    assert not NcdcRecord(year="1950", air_temperature=-11, quality="").is_valid_temperature()
+
+
+def test_full_stats_match_data(yearly_folder):
+    stats = compute_stats(yearly_folder)
+    assert list(stats.index) == ["1950", "1951"]
+    assert (stats["count"] == 2000).all()
+    assert (stats["avg_ci_low"] == stats["avg"]).all()
+    assert max_errors(stats) == {"avg": 0.0, "count": 0.0}
+
+
+@pytest.mark.parametrize("block_size", [1, 50])
+def test_sample_is_deterministic(yearly_folder, block_size):
+    sample = compute_stats(yearly_folder, sample_rate=0.3, seed=1, block_size=block_size)
+    pd.testing.assert_frame_equal(sample, compute_stats(yearly_folder, sample_rate=0.3, seed=1,
+                                                        block_size=block_size))
+    assert (sample["max"] <= compute_stats(yearly_folder)["max"]).all()
+
+
+@pytest.mark.parametrize("block_size", [1, 50])
+def test_sample_confidence_intervals_cover_full_result(yearly_folder, block_size):
+    """95% confidence intervals should cover the full data result in most of the samples."""
+    full = compute_stats(yearly_folder)
+    covered = {"avg": 0, "count": 0}
+    seeds = range(40)
+    for seed in seeds:
+        sample = compute_stats(yearly_folder, sample_rate=0.3, seed=seed, block_size=block_size)
+        for col in covered:
+            covered[col] += ((sample[f"{col}_ci_low"] <= full[col]) & (full[col] <= sample[f"{col}_ci_high"])).sum()
+    assert covered["avg"] / (2 * len(seeds)) > 0.8
+    assert covered["count"] / (2 * len(seeds)) > 0.8
+
+
+def test_write_sample(yearly_folder, tmpdir):
+    out = tmpdir.mkdir("sample")
+    write_sample(yearly_folder, str(out), rate=0.5, seed=1)
+    with gzip.open(out.join("1950.gz"), "rt") as f:
+        sampled = f.readlines()
+    assert 800 < len(sampled) < 1200
+    assert len(compute_stats(str(out))) == 2
+
+
+def test_local_runner_reruns_with_full_data(yearly_folder, tmpdir):
+    output = str(tmpdir.join("results.csv"))
+    result = CliRunner().invoke(local_runner, ["--input", yearly_folder, "--output", output,
+                                               "--sample-rate", "0.1", "--max-avg-error", "0.001"])
+    assert result.exit_code == 0
+    assert "rerunning with full data" in result.output
+    assert (pd.read_csv(output)["count"] == 2000).all()
+
+
+def test_local_runner_reruns_when_sample_is_empty(yearly_folder, tmpdir):
+    output = str(tmpdir.join("results.csv"))
+    assert max_errors(compute_stats(yearly_folder, sample_rate=1e-9)) == {"avg": math.inf, "count": math.inf}
+    unknown = pd.DataFrame({"count": [1], "avg_ci_low": [float("nan")], "avg_ci_high": [float("nan")],
+                            "count_ci_low": [0], "count_ci_high": [2]})
+    assert max_errors(unknown) == {"avg": math.inf, "count": 1.0}
+    result = CliRunner().invoke(local_runner, ["--input", yearly_folder, "--output", output,
+                                               "--sample-rate", "1e-9", "--max-avg-error", "1"])
+    assert result.exit_code == 0
+    assert "rerunning with full data" in result.output
+    assert (pd.read_csv(output)["count"] == 2000).all()
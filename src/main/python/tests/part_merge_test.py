@@ -0,0 +1,74 @@
+import pytest
+from ncdc_analysis.aws.s3 import S3Path
+from ncdc_analysis.postprocessing import part_merge
+from ncdc_analysis.postprocessing.part_merge import merge_mapr_parts, merge_spark_csv_parts, natural_key
+from ncdc_analysis.postprocessing.result_fetchers import EMRResultFetcher
+
+
+def test_natural_key():
+    assert sorted(["10", "9", "b", "a"], key=natural_key) == ["9", "10", "a", "b"]
+
+
+def test_merge_mapr_parts():
+    parts = [["1901\t1", "1905\t5", ""], ["1902\t2", "1903\t3"], [], ["1904\t4"]]
+    assert list(merge_mapr_parts(parts)) == ["1901\t1", "1902\t2", "1903\t3", "1904\t4", "1905\t5"]
+
+
+def test_merge_mapr_parts_is_lazy():
+    def part(lines):
+        for line in lines:
+            yield line
+        raise AssertionError("Part should not be read further than needed")
+
+    merged = merge_mapr_parts([part(["1901\t1", "1903\t3"]), part(["1902\t2", "1904\t4"])])
+    assert [next(merged) for _ in range(2)] == ["1901\t1", "1902\t2"]
+
+
+def test_merge_spark_csv_parts():
+    parts = [["year,max_temp", "999,1.0", "1950,3.0"], [], ["year,max_temp", "1000,2.0"]]
+    assert list(merge_spark_csv_parts(parts)) == ["year,max_temp", "999,1.0", "1000,2.0", "1950,3.0"]
+
+
+def test_merge_spark_csv_parts_different_headers_raises():
+    with pytest.raises(ValueError):
+        list(merge_spark_csv_parts([["year,max_temp", "1950,1"], ["year,min_temp", "1951,1"]]))
+
+
+def test_merge_reads_at_most_fan_in_parts_at_once(monkeypatch):
+    monkeypatch.setattr(part_merge, "MERGE_FAN_IN", 4)
+    open_parts = set()
+    max_open = 0
+
+    def part(n, lines):
+        nonlocal max_open
+        open_parts.add(n)
+        max_open = max(max_open, len(open_parts))
+        yield from lines
+        open_parts.remove(n)
+
+    years = list(range(1901, 2001))
+    parts = [part(n, [f"{year}\t{year}" for year in years[n::20]]) for n in range(20)]
+    merged = merge_mapr_parts(parts)
+    assert not isinstance(merged, list)
+    assert list(merged) == [f"{year}\t{year}" for year in years]
+    assert max_open <= 4
+
+
+def test_merge_spark_csv_parts_in_passes(monkeypatch):
+    monkeypatch.setattr(part_merge, "MERGE_FAN_IN", 2)
+    parts = [["year,max_temp", f"{year},1.0"] for year in range(1950, 1945, -1)] + [[]]
+    assert list(merge_spark_csv_parts(parts)) == ["year,max_temp"] + [f"{year},1.0" for year in range(1946, 1951)]
+    parts[3][0] = "year,min_temp"
+    with pytest.raises(ValueError):
+        list(merge_spark_csv_parts(parts))
+
+
+def test_fetch_merges_parts_in_order(s3_bucket):
+    s3_bucket.put_object(Bucket="test-bucket", Key="out/part-r-00000", Body=b"1901\t1, 2\n1904\t7, 8\n")
+    s3_bucket.put_object(Bucket="test-bucket", Key="out/part-r-00001", Body=b"1902\t3, 4\n1903\t5, 6\n")
+    s3_bucket.put_object(Bucket="test-bucket", Key="out/_SUCCESS", Body=b"")
+
+    results = EMRResultFetcher._fetch_hadoop_style_results(S3Path.from_path("s3://test-bucket/out"),
+                                                           col_names=["min", "max"])
+    assert list(results.index) == ["1901", "1902", "1903", "1904"]
+    assert list(results["max"]) == ["2", "4", "6", "8"]
@@ -0,0 +1,84 @@
+import gzip
+import os
+import random
+import pytest
+from ncdc_analysis.core.combine_files import combine_files
+from ncdc_analysis.core.local_engine import compute_stats
+from ncdc_analysis.preprocessing import record_sort
+from ncdc_analysis.preprocessing.compression import CODECS, available_codecs, open_compressed
+from ncdc_analysis.preprocessing.record_sort import external_sort, read_block_index, read_range, record_key
+from ncdc_analysis.preprocessing.synthetic_data import generate_data
+
+KB = 1024
+
+
+@pytest.fixture()
+def noaa_folder(tmpdir):
+    folder = str(tmpdir.join("noaa"))
+    generate_data(folder, [1950, 1951], 300 * KB, seed=1)
+    return folder
+
+
+def records(folder: str, year: str) -> list:
+    with gzip.open(os.path.join(folder, f"{year}.gz")) as f:
+        return f.read().splitlines(keepends=True)
+
+
+@pytest.mark.parametrize("fan_in", [2, 64])
+def test_external_sort_spills_and_merges(tmpdir, monkeypatch, fan_in):
+    monkeypatch.setattr(record_sort, "MERGE_FAN_IN", fan_in)
+    lines = [f"0018{random.Random(n).randint(10000, 10100):06d}99999{1950 + n % 3}0101{n % 2400:04d}rest\n".encode()
+             for n in range(2000)]
+    random.Random(0).shuffle(lines)
+    tmp_dir = str(tmpdir.mkdir("runs"))
+    assert list(external_sort(lines, tmp_dir, memory_bytes=10 * KB)) == sorted(lines, key=record_key)
+    assert os.listdir(tmp_dir) == []
+
+
+def test_external_sort_in_memory(tmpdir):
+    lines = [b"0018011990999991950051518004\n", b"0018010010999991950051518004\n"]
+    assert list(external_sort(lines, str(tmpdir))) == lines[::-1]
+
+
+@pytest.mark.parametrize("codec", available_codecs())
+def test_concatenated_blocks_read_as_one_file(codec, tmpdir):
+    path = str(tmpdir.join(f"1950{CODECS[codec].extension}"))
+    with open(path, "wb") as f:
+        f.write(CODECS[codec].compress(b"first\n") + CODECS[codec].compress(b"second\n"))
+    with open_compressed(path, "rb") as f:
+        assert f.read() == b"first\nsecond\n"
+
+
+def test_combine_files_sorted(noaa_folder, tmpdir):
+    unsorted_folder, sorted_folder = str(tmpdir.mkdir("unsorted")), str(tmpdir.mkdir("sorted"))
+    combine_files(noaa_folder, unsorted_folder)
+    combine_files(noaa_folder, sorted_folder, sort_memory=32 * KB, block_bytes=8 * KB)
+
+    assert sorted(os.listdir(sorted_folder)) == ["1950.gz", "1951.gz", "_blocks.csv", "_index.csv"]
+    for year in ["1950", "1951"]:
+        assert records(sorted_folder, year) == sorted(records(unsorted_folder, year), key=record_key)
+    assert compute_stats(sorted_folder).equals(compute_stats(unsorted_folder))
+
+    index = read_block_index(sorted_folder)
+    blocks = index["1950.gz"]
+    assert len(blocks) > 10
+    assert sum(block.records for block in blocks) == len(records(sorted_folder, "1950"))
+    assert all(a.offset + a.length == b.offset and a.last_key <= b.first_key for a, b in zip(blocks, blocks[1:]))
+    assert read_block_index(unsorted_folder) is None
+
+
+def test_read_range_prunes_blocks(noaa_folder, tmpdir):
+    folder = str(tmpdir.mkdir("sorted"))
+    combine_files(noaa_folder, folder, sort_memory=32 * KB, block_bytes=8 * KB)
+    station = "010000-99999"
+    expected = [r for r in records(folder, "1950") if r[4:15] == b"01000099999" and b"195006" <= r[15:27] < b"195007"]
+    assert expected
+
+    selected = list(read_range(folder, stations={station}, start="195006", end="195006"))
+    assert set(expected) <= set(selected)
+    index = read_block_index(folder)
+    assert len(selected) < sum(block.records for blocks in index.values() for block in blocks) / 10
+    assert list(read_range(folder, stations={station}, start="19520101")) == []
+
+    with pytest.raises(ValueError):
+        list(read_range(noaa_folder))
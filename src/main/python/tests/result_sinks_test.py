@@ -0,0 +1,71 @@
+import pandas as pd
+import pytest
+from ncdc_analysis.aws.s3 import S3Path
+from ncdc_analysis.postprocessing.map_reduce_utils import clean_mapr_results, infer_numeric_dtypes
+from ncdc_analysis.postprocessing.result_fetchers import EMRResultSinkFetcher
+from ncdc_analysis.postprocessing.result_sinks import CsvSink, FeatherSink, ParquetSink, ResultsDatasetSink, \
+    RunInfo, read_results_dataset
+
+RUN = RunInfo(run_timestamp="2019-06-01T12:00:00.000000", job_class="TemperatureStatsDriver")
+
+
+@pytest.fixture()
+def stats_df():
+    raw = "1990\t-10, 20, 5.5, 2\n1991\t1, 2, 1.5, 3"
+    return infer_numeric_dtypes(clean_mapr_results(raw, col_names=["min", "max", "avg", "count"]))
+
+
+def test_infer_numeric_dtypes(stats_df):
+    assert list(stats_df.dtypes) == ["int64", "int64", "float64", "int64"]
+    assert list(stats_df.index) == [1990, 1991]
+    assert stats_df.index.name == "index"
+
+
+def test_infer_numeric_dtypes_keeps_strings():
+    df = infer_numeric_dtypes(clean_mapr_results("key1\tval_a, 1", col_names=["name", "value"]))
+    assert df["name"].tolist() == ["val_a"]
+    assert df["value"].tolist() == [1]
+
+
+@pytest.mark.parametrize("sink_cls, read, extension", [(ParquetSink, pd.read_parquet, "parquet"),
+                                                       (FeatherSink, pd.read_feather, "feather")])
+def test_columnar_sinks_preserve_dtypes(tmpdir, stats_df, sink_cls, read, extension):
+    sink_cls(str(tmpdir)).write(stats_df, RUN)
+    result = read(str(tmpdir.join(f"{RUN.run_timestamp}_ncdc_emr_results.{extension}")))
+    pd.testing.assert_frame_equal(result, stats_df.reset_index())
+
+
+def test_csv_sink(tmpdir, stats_df):
+    CsvSink(str(tmpdir)).write(stats_df, RUN)
+    assert tmpdir.join(f"{RUN.run_timestamp}_ncdc_emr_results.csv").check()
+
+
+def test_results_dataset(tmpdir, stats_df):
+    sink = ResultsDatasetSink(str(tmpdir))
+    other_run = RunInfo(run_timestamp="2019-06-02T12:00:00.000000", job_class=RUN.job_class)
+    spark_run = RunInfo(run_timestamp="2019-06-02T12:00:00.000000", job_class="MaxTemperatureApp")
+    sink.write(stats_df, RUN)
+    sink.write(stats_df, other_run)
+    sink.write(pd.DataFrame({"year": [1990], "max_temp": [1.5]}), spark_run)
+
+    all_runs = read_results_dataset(str(tmpdir))
+    assert len(all_runs) == 5
+    stats_runs = read_results_dataset(str(tmpdir), job_class=RUN.job_class)
+    assert sorted(stats_runs["run_timestamp"].unique()) == [RUN.run_timestamp, other_run.run_timestamp]
+    assert stats_runs["count"].sum() == 10
+
+
+def test_results_dataset_is_append_only(tmpdir, stats_df):
+    sink = ResultsDatasetSink(str(tmpdir))
+    sink.write(stats_df, RUN)
+    with pytest.raises(ValueError):
+        sink.write(stats_df, RUN)
+
+
+def test_sink_fetcher(tmpdir, s3_bucket):
+    s3_bucket.put_object(Bucket="test-bucket", Key="out/part-r-00000", Body=b"1990\t-10, 20, 5.5, 2\n")
+
+    fetcher = EMRResultSinkFetcher(sinks=[ParquetSink(str(tmpdir))], run=RUN, col_names=["min", "max", "avg", "count"])
+    result = fetcher.fetch(S3Path.from_path("s3://test-bucket/out"))
+    assert result.loc[1990, "count"] == 2
+    assert tmpdir.join(f"{RUN.run_timestamp}_ncdc_emr_results.parquet").check()
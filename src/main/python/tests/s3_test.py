@@ -64,3 +64,53 @@ def test_s3_read_to_mem():
     assert data == "Hello memory"
 
 
+
+
+@pytest.fixture()
+def s3_folder(s3_bucket):
+    for key in ["data/1990.gz", "data/1991.gz", "data/out/part-00000", "data/out/part-00001", "data/out/_SUCCESS"]:
+        s3_bucket.put_object(Bucket="test-bucket", Key=key, Body=key.encode())
+    return s3_bucket
+
+
+def test_S3Path_iterdir_and_scandir(s3_folder):
+    path = S3Path.from_path("s3://test-bucket/data")
+    assert [p.key for p in path.iterdir(s3_client=s3_folder)] == ["data/out/", "data/1990.gz", "data/1991.gz"]
+    stats = dict((p.name, stat) for p, stat in path.scandir(s3_client=s3_folder))
+    assert list(stats) == ["1990.gz", "1991.gz"]
+    assert stats["1990.gz"].size == len(b"data/1990.gz")
+    assert stats["1990.gz"].etag != stats["1991.gz"].etag
+
+
+def test_S3Path_listing_is_paginated(s3_folder):
+    pages = list(S3Path.from_path("s3://test-bucket/data/out").list_objects(s3_client=s3_folder))
+    assert len(pages) == 1
+    paginator = s3_folder.get_paginator("list_objects_v2")
+    small_pages = list(paginator.paginate(Bucket="test-bucket", Prefix="data/", PaginationConfig={"PageSize": 2}))
+    assert len(small_pages) == 3
+    assert len(s3_listdir(s3_folder, S3Path.from_path("s3://test-bucket/data/"))) == 5
+
+
+def test_S3Path_glob(s3_folder):
+    path = S3Path.from_path("s3://test-bucket/data/out")
+    assert [p.name for p in path.glob("part-*", s3_client=s3_folder)] == ["part-00000", "part-00001"]
+
+
+def test_S3Path_stat_and_exists(s3_folder):
+    path = S3Path.from_path("s3://test-bucket/data/1990.gz")
+    assert path.stat(s3_client=s3_folder).size == len(b"data/1990.gz")
+    assert path.exists(s3_client=s3_folder)
+    assert not path.join("missing").exists(s3_client=s3_folder)
+    with pytest.raises(FileNotFoundError):
+        path.join("missing").read_bytes(s3_client=s3_folder)
+
+
+def test_S3Path_open_seek_and_read_range(s3_folder):
+    path = S3Path.from_path("s3://test-bucket/data/1990.gz")
+    with path.open(buffer_size=4, s3_client=s3_folder) as f:
+        assert f.read(4) == b"data"
+        f.seek(5)
+        assert f.read() == b"1990.gz"
+        assert f.read() == b""
+    assert path.read_range(5, 9, s3_client=s3_folder) == b"1990"
+    assert path.read_text(s3_client=s3_folder) == "data/1990.gz"
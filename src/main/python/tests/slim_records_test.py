@@ -0,0 +1,42 @@
+import gzip
+import pandas as pd
+import pytest
+from ncdc_analysis.core.local_engine import compute_stats
+from ncdc_analysis.parsers.ncdc_record_parser import NcdcRecord, SLIM_RECORD_LENGTH, parse_valid_temperature, \
+    to_slim_record
+from ncdc_analysis.preprocessing.slim_records import write_slim
+
+
+def test_to_slim_record(raw_record):
+    slim = to_slim_record(raw_record)
+    assert slim == "01199099999195005151800-00111"
+    assert len(slim) == SLIM_RECORD_LENGTH
+    assert NcdcRecord.parse(slim) == NcdcRecord.parse(raw_record)
+    assert parse_valid_temperature(slim + "\n") == ("1950", -11)
+
+
+def test_to_slim_record_drops_invalid(invalid_record):
+    assert to_slim_record(invalid_record) is None
+
+
+@pytest.mark.parametrize("record", ["short", ""])
+def test_to_slim_record_drops_short(record):
+    assert to_slim_record(record) is None
+
+
+def test_write_slim(yearly_folder, tmpdir):
+    with open(f"{yearly_folder}/_index.csv", "w") as f:
+        f.write("year,station,file\n")
+    slim_folder = tmpdir.mkdir("slim")
+    report = write_slim(yearly_folder, str(slim_folder))
+
+    assert [year.year for year in report.years] == ["1950", "1951"]
+    assert all(year.records == 2002 and year.slim_records == 2000 for year in report.years)
+    assert report.raw_bytes > 3 * report.slim_bytes
+    assert report.slim_file_bytes < report.raw_file_bytes
+    assert "Slim records: 4000 of 4004 records" in report.report()
+    assert slim_folder.join("_index.csv").exists()
+    with gzip.open(slim_folder.join("1950.gz"), "rt") as f:
+        assert all(len(line) == SLIM_RECORD_LENGTH + 1 for line in f)
+
+    pd.testing.assert_frame_equal(compute_stats(str(slim_folder)), compute_stats(yearly_folder))
@@ -0,0 +1,125 @@
+import pytest
+from ncdc_analysis.aws.emr import ClusterLayout, EMRSparkStep
+from ncdc_analysis.aws.s3 import S3Path
+from ncdc_analysis.aws.spark_tuning import INSTANCE_TYPES, derive_tuning, parse_spark_conf
+from ncdc_analysis.core.cluster import input_size, spark_conf
+
+GIB = 1024 ** 3
+
+
+def test_derive_tuning_m5_xlarge():
+    tuning = derive_tuning("m5.xlarge", instance_count=5)
+    assert tuning.executor_cores == 4
+    assert tuning.executor_instances == 3  # 4 core nodes, one slot for the driver
+    assert tuning.executor_memory_mb + tuning.executor_memory_overhead_mb == 12288
+    assert tuning.executor_memory_overhead_mb == 1229
+    assert tuning.shuffle_partitions == 24
+
+
+def test_derive_tuning_large_instances_leave_core_for_daemons():
+    tuning = derive_tuning("m5.4xlarge", instance_count=3)
+    assert tuning.executor_cores == 5
+    assert tuning.executor_instances == 5  # 3 executors of 15 usable cores per node
+    assert tuning.executor_memory_mb + tuning.executor_memory_overhead_mb == 49152 // 3
+
+
+@pytest.mark.parametrize("instance_type", INSTANCE_TYPES)
+@pytest.mark.parametrize("instance_count", [1, 2, 10])
+def test_derive_tuning_fits_instance(instance_type, instance_count):
+    instance = INSTANCE_TYPES[instance_type]
+    tuning = derive_tuning(instance_type, instance_count)
+    executors_per_node = (instance.vcpus - (instance.vcpus > 4)) // tuning.executor_cores
+    assert tuning.executor_cores <= instance.vcpus
+    assert executors_per_node * (tuning.executor_memory_mb + tuning.executor_memory_overhead_mb) \
+        <= instance.yarn_memory_mb
+    assert tuning.executor_memory_overhead_mb >= 384
+    assert tuning.executor_instances >= 1
+
+
+def test_shuffle_partitions_scale_with_input():
+    assert derive_tuning("m5.xlarge", 5, input_bytes=GIB).shuffle_partitions == 24
+    assert derive_tuning("m5.xlarge", 5, input_bytes=100 * GIB).shuffle_partitions == 800
+
+
+def test_unknown_instance_type_raises():
+    with pytest.raises(ValueError):
+        derive_tuning("x9.huge", 3)
+
+
+def test_parse_spark_conf():
+    assert parse_spark_conf(["spark.sql.shuffle.partitions=64", "spark.executor.extraJavaOptions=-Da=b"]) == \
+        {"spark.sql.shuffle.partitions": "64", "spark.executor.extraJavaOptions": "-Da=b"}
+    with pytest.raises(ValueError):
+        parse_spark_conf(["spark.executor.cores"])
+
+
+def test_spark_conf_overrides(tmpdir):
+    tmpdir.join("1990.gz").write(b"x" * 100)
+    tmpdir.join("1991.gz").write(b"x" * 50)
+    assert input_size(str(tmpdir)) == 150
+    assert input_size(str(tmpdir.join("1990.gz"))) == 100
+
+    conf = spark_conf("m5.xlarge", 5, str(tmpdir), overrides={"spark.executor.cores": "2"})
+    assert conf["spark.executor.cores"] == "2"
+    assert conf["spark.executor.memory"] == "11059m"
+    assert conf["spark.dynamicAllocation.enabled"] == "false"
+    assert spark_conf("x9.huge", 5, str(tmpdir), overrides={"spark.executor.cores": "2"}) == \
+        {"spark.executor.cores": "2"}
+
+
+def test_input_size_of_nested_folders(tmpdir):
+    tmpdir.mkdir("1990").join("010010-99999-1990.gz").write(b"x" * 100)
+    tmpdir.mkdir("1991").mkdir("part").join("010010-99999-1991.gz").write(b"x" * 50)
+    assert input_size(str(tmpdir)) == 150
+    assert input_size(str(tmpdir.join("missing"))) is None
+
+
+def test_input_size_of_nested_s3_prefix(monkeypatch, s3_bucket):
+    listings = []
+    list_objects = S3Path.list_objects
+
+    def counting_list_objects(self, **kwargs):
+        listings.append(kwargs["prefix"])
+        return list_objects(self, **kwargs)
+
+    monkeypatch.setattr(S3Path, "list_objects", counting_list_objects)
+    s3_bucket.put_object(Bucket="test-bucket", Key="noaa/1990/010010-99999-1990.gz", Body=b"x" * 100)
+    s3_bucket.put_object(Bucket="test-bucket", Key="noaa/1991/010010-99999-1991.gz", Body=b"x" * 50)
+    assert input_size("s3://test-bucket/noaa") == 150
+    assert listings == ["noaa/"]  # one recursive listing, not one per level
+    assert input_size("s3://test-bucket/noaa/1990/010010-99999-1990.gz,s3://test-bucket/noaa/1991") == 150
+    assert input_size("s3://test-bucket/missing") is None
+    # Unknown input size falls back to sizing by the instances
+    conf = spark_conf("m5.xlarge", 5, "s3://test-bucket/missing")
+    assert conf["spark.sql.shuffle.partitions"] == str(derive_tuning("m5.xlarge", 5).shuffle_partitions)
+
+
+def test_spark_conf_with_layout(tmpdir):
+    tmpdir.join("1990.gz").write(b"x" * 100)
+    # Executors are sized by the r5.xlarge core and task nodes, not the m5.xlarge master
+    layout = ClusterLayout.from_options("m5.xlarge", 3, core_instance_type="r5.xlarge", task_instance_count=2)
+    conf = spark_conf("m5.xlarge", 3, str(tmpdir), layout=layout)
+    assert conf["spark.executor.instances"] == str(derive_tuning("r5.xlarge", 5).executor_instances)
+    assert conf["spark.executor.memory"] == spark_conf("r5.xlarge", 5, str(tmpdir))["spark.executor.memory"]
+
+    # Task nodes of another type: executors fit the smaller c5.xlarge nodes and are allocated dynamically
+    mixed = ClusterLayout.from_options("m5.xlarge", 3, core_instance_type="r5.xlarge", task_instance_type="c5.xlarge",
+                                       task_instance_count=4)
+    conf = spark_conf("m5.xlarge", 3, str(tmpdir), layout=mixed)
+    assert "spark.executor.instances" not in conf and "spark.dynamicAllocation.enabled" not in conf
+    assert conf["spark.executor.memory"] == f"{derive_tuning('c5.xlarge', 7).executor_memory_mb}m"
+
+    scaling = ClusterLayout.from_options("m5.xlarge", 3, scaling="automatic", min_capacity=1, max_capacity=4)
+    conf = spark_conf("m5.xlarge", 3, str(tmpdir), layout=scaling)
+    assert "spark.executor.instances" not in conf and "spark.dynamicAllocation.enabled" not in conf
+    assert conf["spark.executor.cores"] == "4"
+
+
+def test_spark_step_conf_args():
+    step = EMRSparkStep(jar_path="s3://my/jar/path", jar_class="MySparkApp", jar_args=["s3://in", "s3://out"],
+                        conf={"spark.sql.shuffle.partitions": "64", "spark.executor.cores": "4"})
+    assert step.to_dict()["HadoopJarStep"]["Args"] == ["spark-submit", "--deploy-mode", "cluster", "--master", "yarn",
+                                                       "--class", "MySparkApp",
+                                                       "--conf", "spark.executor.cores=4",
+                                                       "--conf", "spark.sql.shuffle.partitions=64",
+                                                       "s3://my/jar/path", "s3://in", "s3://out"]
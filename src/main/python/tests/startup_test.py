@@ -0,0 +1,12 @@
+import pytest
+from benchmarks.startup import CLI_MODULES, loaded_heavy_modules
+
+
+@pytest.mark.parametrize("module", CLI_MODULES)
+def test_cli_import_does_not_load_heavy_modules(module):
+    """boto3, pandas and .env should be loaded only when a job is run, see benchmarks.startup"""
+    assert loaded_heavy_modules(module) == []
+
+
+def test_settings_loaded_lazily():
+    assert loaded_heavy_modules("settings") == []
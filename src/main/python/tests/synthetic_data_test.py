@@ -0,0 +1,54 @@
+import filecmp
+import gzip
+import pytest
+from ncdc_analysis.parsers.ncdc_record_parser import NcdcRecord, MISSING_TEMPERATURE
+from ncdc_analysis.preprocessing.combine_files_to_yearly import get_gz_files, get_ncdc_folders, get_station_id
+from ncdc_analysis.preprocessing.synthetic_data import RECORD_BYTES, generate_data, parse_size, station, \
+    station_records
+
+
+def test_parse_size():
+    assert parse_size("500MB") == 500 * 1024 ** 2
+    assert parse_size("1.5 gb") == int(1.5 * 1024 ** 3)
+    assert parse_size("1024") == 1024
+    with pytest.raises(ValueError):
+        parse_size("lots")
+
+
+def test_records_are_valid_fixed_width():
+    s = station(seed=1, n=0)
+    records = list(station_records(s, 1950, seed=1))
+    assert len(records) == s.records_per_year
+    assert all(len(record) == RECORD_BYTES for record in records)
+    parsed = [NcdcRecord.parse(record) for record in records]
+    assert {record.year for record in parsed} == {"1950"}
+    assert records == sorted(records, key=lambda record: record[15:27])
+    missing = sum(record.air_temperature == MISSING_TEMPERATURE for record in parsed) / len(parsed)
+    valid = [record.air_temperature for record in parsed if record.is_valid_temperature()]
+    assert 0.005 < missing < 0.1
+    assert 0.8 < len(valid) / len(parsed) < 0.99
+    assert -932 <= min(valid) < max(valid) <= 618
+
+
+def test_generate_data_is_deterministic_and_in_ftp_layout(tmpdir):
+    first, second = tmpdir.mkdir("first"), tmpdir.mkdir("second")
+    report = generate_data(str(first), [1950, 1951], size=2 * 1024 ** 2, seed=3)
+    generate_data(str(second), [1950, 1951], size=2 * 1024 ** 2, seed=3)
+
+    folders = sorted(get_ncdc_folders(str(first)), key=lambda folder: folder.year)
+    assert [folder.year for folder in folders] == ["1950", "1951"]
+    files = get_gz_files(folders[0].path)
+    assert len(files) == report.files // 2
+    assert get_station_id(sorted(files)[0]) == "010000-99999"
+    sizes = []
+    for file in files:
+        with gzip.open(file) as f:
+            sizes.append(len(f.read()))
+        assert filecmp.cmp(file, str(second.join("1950", file.rsplit("/", 1)[-1])), shallow=False)
+    assert max(sizes) > 3 * min(sizes)  # station file sizes are skewed
+    assert 2 * 1024 ** 2 <= report.bytes < 3 * 1024 ** 2
+
+
+def test_generate_data_years_must_fit_combiner(tmpdir):
+    with pytest.raises(ValueError):
+        generate_data(str(tmpdir), [2001], size=1024)
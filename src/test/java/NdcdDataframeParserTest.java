@@ -7,6 +7,7 @@ import org.apache.spark.sql.SparkSession;
 import org.junit.Test;
 
 import java.util.Arrays;
+import java.util.List;
 
 import static org.apache.spark.sql.functions.col;
 import static org.junit.Assert.assertEquals;
@@ -38,11 +39,33 @@ public class NdcdDataframeParserTest {
         Dataset<Row> df = NcdcRecordParser.parse(dataset);
         Integer year = (Integer) df.select(col("year")).first().getInt(0);
         Double temp = (Double) df.select(col("temperature")).first().getDouble(0);
+        String station = df.select(col("station")).first().getString(0);
         assertEquals(new Integer(1950), year);
         assertEquals(new Double(-1.1), temp);
+        assertEquals("01199099999", station);
 
     }
 
+    @Test
+    public void processesSlimRecords() {
+        initSparkSession();
+
+        Dataset<String> dataset =
+                spark.createDataset(Arrays.asList(
+                        "01199099999195005151800-00111",
+                        // Year ^^^^       ^^^^^ Temperature
+                        "01199099999195105151800+00221\r"
+                ), Encoders.STRING());
+
+        List<Row> rows = NcdcRecordParser.parse(dataset).collectAsList();
+        assertEquals(2, rows.size());
+        assertEquals(1950, rows.get(0).getInt(0));
+        assertEquals(-1.1, rows.get(0).getDouble(1), 1e-6);
+        assertEquals(1951, rows.get(1).getInt(0));
+        assertEquals(2.2, rows.get(1).getDouble(1), 1e-6);
+        assertEquals("01199099999", rows.get(0).getString(2));
+    }
+
     @Test
     public void ignoreMissingTemps() {
         initSparkSession();
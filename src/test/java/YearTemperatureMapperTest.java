@@ -22,6 +22,38 @@ public class YearTemperatureMapperTest {
                 .runTest();
     }
 
+    @Test
+    public void processesSlimRecord() throws IOException, InterruptedException {
+        Text value = new Text("01199099999195005151800-00111");
+                                      // Year ^^^^       ^^^^^ Temperature
+        new MapDriver<LongWritable, Text, Text, IntWritable>()
+                .withMapper(new YearTemperatureMapper())
+                .withInput(new LongWritable(0), value)
+                .withOutput(new Text("1950"), new IntWritable(-11))
+                .runTest();
+    }
+
+    @Test
+    public void processesSlimRecordWithCarriageReturn() throws IOException, InterruptedException {
+        Text value = new Text("01199099999195005151800+00221\r");
+        new MapDriver<LongWritable, Text, Text, IntWritable>()
+                .withMapper(new YearTemperatureMapper())
+                .withInput(new LongWritable(0), value)
+                .withOutput(new Text("1950"), new IntWritable(22))
+                .runTest();
+    }
+
+    @Test
+    public void includesOnlyGivenStations() throws IOException, InterruptedException {
+        MapDriver<LongWritable, Text, Text, IntWritable> driver =
+                new MapDriver<LongWritable, Text, Text, IntWritable>().withMapper(new YearTemperatureMapper());
+        driver.getConfiguration().set(YearTemperatureMapper.STATIONS_PROPERTY, "011990-99999,012650-99999");
+        driver.withInput(new LongWritable(0), new Text("01199099999195005151800-00111"))
+                .withInput(new LongWritable(1), new Text("01001099999195005151800+00501"))
+                .withOutput(new Text("1950"), new IntWritable(-11))
+                .runTest();
+    }
+
     @Test
     public void ignoresMissingTemperatureRecord() throws IOException,
             InterruptedException {